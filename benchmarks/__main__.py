@@ -0,0 +1,100 @@
+"""
+Runs the benchmarks with their default sizes and writes all results as JSON
+lines, preceded by a line describing the environment, so runs on different
+commits can be compared with `python -m benchmarks.compare`.
+
+    python -m benchmarks [--only hashes,graph_validator] [--out results.jsonl] [--seed 0]
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import os
+import platform
+import random
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+# (name, module, attribute holding its default sizes)
+BENCHMARKS = [
+    ("hashes", "benchmarks.bench_hashes", "DEFAULT_FANOUTS"),
+    ("graph_validator", "benchmarks.bench_graph_validator", "DEFAULT_ENTITIES"),
+    ("validation_pool", "benchmarks.bench_validation_pool", "DEFAULT_POOL_SIZES"),
+    ("content_encodings", "benchmarks.bench_content_encodings", "DEFAULT_ENTITIES"),
+    ("sync_records", "benchmarks.bench_sync_records", "DEFAULT_ENTITIES"),
+    ("synchronizer", "benchmarks.bench_synchronizer", "DEFAULT_SIZES"),
+    ("ihash_index", "benchmarks.bench_ihash_index", "DEFAULT_SIZES"),
+    ("req_handler", "benchmarks.bench_req_handler", "DEFAULT_REQUESTS"),
+    ("graph_store_http", "benchmarks.bench_graph_store_http", "DEFAULT_REQUESTS"),
+    ("logging", "benchmarks.bench_logging", "DEFAULT_REQUESTS"),
+    ("startup", "benchmarks.bench_startup", "DEFAULT_REPEATS"),
+]
+
+
+def _module_version(name):
+    try:
+        return importlib.import_module(name).__version__
+    except Exception:
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _metadata(names, seed):
+    return {
+        "name": "meta",
+        "params": {"benchmarks": names, "seed": seed},
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "rdflib": _module_version("rdflib"),
+    }
+
+
+def run(names, seed, stream):
+    report(_metadata(names, seed), stream)
+    for name, module_name, defaults in BENCHMARKS:
+        if name not in names:
+            continue
+
+        print("Running '{}'...".format(name), file=sys.stderr)
+        random.seed(seed)
+        module = importlib.import_module(module_name)
+        with contextlib.redirect_stdout(stream):
+            module.run(getattr(module, defaults))
+
+
+def main():
+    all_names = [name for name, _, _ in BENCHMARKS]
+    parser = argparse.ArgumentParser(description="Runs graphchain benchmarks")
+    parser.add_argument("--only", default=",".join(all_names),
+                        help="comma separated benchmarks to run, out of: {}".format(", ".join(all_names)))
+    parser.add_argument("--out", help="file to write results to, stdout by default")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the global random generator")
+    args = parser.parse_args()
+
+    names = [name for name in args.only.split(",") if name]
+    unknown = set(names) - set(all_names)
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+
+    if args.out is None:
+        run(names, args.seed, sys.stdout)
+    else:
+        with open(args.out, "w") as stream:
+            run(names, args.seed, stream)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Measures how much LEI graph content encodings shrink the content stored in
+the graphchain ledger (base64, as in the txn) and what decoding costs.
+
+    python -m benchmarks.bench_content_encodings [1,10,100]
+"""
+import sys
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from plenum.server.plugin.graphchain.constants import GRAPH_CONTENT_FIELD, GRAPH_FORMAT_FIELD, \
+    GRAPH_ENCODING_FIELD
+from plenum.server.plugin.graphchain.content_encodings import supported_encodings, encode_content, \
+    decode_lei_content
+from plenum.server.plugin.graphchain.helpers import to_base64
+
+DEFAULT_ENTITIES = [1, 10, 100]
+FORMATS = ['turtle', 'xml', 'nt']
+
+
+def run(entities_list):
+    for entities in entities_list:
+        graph = make_lei_graph(entities=entities)
+        for graph_format in FORMATS:
+            graph_raw_content = serialize_graph(graph, graph_format)
+            identity_size = len(to_base64(graph_raw_content))
+
+            for encoding in supported_encodings():
+                lei = {
+                    GRAPH_CONTENT_FIELD: to_base64(encode_content(graph_raw_content, encoding)).decode(),
+                    GRAPH_FORMAT_FIELD: graph_format,
+                    GRAPH_ENCODING_FIELD: encoding,
+                }
+                stored_size = len(lei[GRAPH_CONTENT_FIELD])
+
+                durations = measure(lambda: decode_lei_content(lei), repeat=50)
+                result = summarize("content_encodings.decode.{}".format(encoding), durations,
+                                   entities=entities, format=graph_format)
+                result["stored_bytes"] = stored_size
+                result["identity_bytes"] = identity_size
+                result["ratio"] = stored_size / identity_size
+                report(result)
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_ENTITIES))
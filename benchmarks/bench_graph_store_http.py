@@ -0,0 +1,66 @@
+"""
+Latency of triple store round-trips against a local stub SPARQL server:
+a new connection per request (as with a fresh SPARQLWrapper or a bare
+requests call) compared with the pooled keep-alive session of GraphStore,
+and the write and batched existence paths of every backend.
+
+    python -m benchmarks.bench_graph_store_http [200]
+"""
+import sys
+
+import requests
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from benchmarks.stub_sparql_server import StubSparqlServer
+from plenum.server.plugin.graphchain.graph_store import GraphStore
+from plenum.server.plugin.graphchain.http_session import SPARQL_RESULTS_JSON
+from plenum.server.plugin.graphchain.neptune_graph_store import NeptuneGraphStore
+from plenum.server.plugin.graphchain.stardog_graph_store import StardogGraphStore
+
+DEFAULT_REQUESTS = [200]
+GRAPH_HASH = "0" * 64
+GRAPH_FORMAT = 'turtle'
+BATCH_SIZE = 100
+
+
+def _ask_without_pool(url):
+    query = GraphStore.ASK_IF_GRAPH_IS_ALREADY_STORED.format(GraphStore.IHASH_PREFIX.format(GRAPH_HASH))
+    r = requests.post(url, data={'query': query}, headers={'Accept': SPARQL_RESULTS_JSON})
+    return r.json()['boolean']
+
+
+def run(request_counts):
+    with StubSparqlServer() as server:
+        stores = {
+            "stardog": StardogGraphStore("db", server.url, "user", "pass"),
+            "neptune": NeptuneGraphStore("db", server.url),
+        }
+
+        for count in request_counts:
+            report(summarize("graph_store_http.new_connection",
+                             measure(lambda: _ask_without_pool(server.url + "/db/query"), repeat=count),
+                             requests=count))
+
+            for name, store in stores.items():
+                report(summarize("graph_store_http.pooled",
+                                 measure(lambda: store.check_if_graph_is_already_stored(GRAPH_HASH), repeat=count),
+                                 requests=count, backend=name))
+
+        graph_raw_content = serialize_graph(make_lei_graph(entities=5), GRAPH_FORMAT)
+        graph_hashes = ["{:064x}".format(i) for i in range(BATCH_SIZE)]
+        batch = [(graph_hash, graph_raw_content, GRAPH_FORMAT, None) for graph_hash in graph_hashes]
+        for name, store in stores.items():
+            report(summarize("graph_store_http.add_graph",
+                             measure(lambda: store.add_graph(graph_raw_content, GRAPH_FORMAT, GRAPH_HASH), repeat=20),
+                             backend=name, graph_bytes=len(graph_raw_content)))
+            report(summarize("graph_store_http.add_graphs",
+                             measure(lambda: store.add_graphs(batch), repeat=5),
+                             backend=name, graphs=BATCH_SIZE, graph_bytes=len(graph_raw_content)))
+            report(summarize("graph_store_http.which_graphs_exist",
+                             measure(lambda: store.which_graphs_exist(graph_hashes), repeat=20),
+                             backend=name, graphs=BATCH_SIZE))
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_REQUESTS))
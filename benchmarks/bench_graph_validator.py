@@ -0,0 +1,39 @@
+"""
+Parsing cost of GraphValidator per graph format and graph size, next to
+parse_graph, which hashes line-oriented formats without building a Graph.
+
+    python -m benchmarks.bench_graph_validator [1,10,100]
+"""
+import sys
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from plenum.server.plugin.graphchain.graphs import GraphValidator
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+from plenum.server.plugin.graphchain.parsed_graphs import parse_graph
+
+DEFAULT_ENTITIES = [1, 10, 100]
+FORMATS = ['n3', 'nt', 'trix', 'turtle', 'xml']
+
+
+def run(entities_list):
+    validator = GraphValidator()
+    calculator = InterwovenHashCalculator()
+
+    for entities in entities_list:
+        graph = make_lei_graph(entities=entities)
+        for graph_format in FORMATS:
+            graph_raw_content = serialize_graph(graph, graph_format)
+            params = {"entities": entities, "format": graph_format, "bytes": len(graph_raw_content)}
+
+            report(summarize("graph_validator.validate",
+                             measure(lambda: validator.validate_graph(graph_raw_content, graph_format), repeat=10),
+                             **params))
+            report(summarize("graph_validator.parse_graph",
+                             measure(lambda: parse_graph(graph_raw_content, graph_format, validator, calculator),
+                                     repeat=10),
+                             **params))
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_ENTITIES))
@@ -0,0 +1,81 @@
+"""
+Benchmarks InterwovenHashCalculator over synthetic graphs with growing
+blank-node fan-out and checks the digests against the reference
+(per-blank-node rescan) algorithm; golden vectors are in tests/test_hashes.py.
+The streaming N-Triples path is compared with parsing into a Graph first.
+
+    python -m benchmarks.bench_hashes [1,4,16,64]
+"""
+import sys
+from hashlib import sha256
+
+from rdflib import BNode, Graph
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+
+DEFAULT_FANOUTS = [1, 4, 16, 64]
+ENTITIES = 10
+BATCH_SIZE = 50
+
+
+def reference_calculate_hash(graph: Graph) -> str:
+    """The original algorithm, which rescans the graph for every blank node."""
+    mod_operand = 2 ** 256
+
+    def encode(resource, bnode_name):
+        return bnode_name if isinstance(resource, BNode) else resource.n3()
+
+    def triple_hash(s, p, o):
+        encoded_triple = encode(s, "Magic_S") + p.n3() + encode(o, "Magic_O")
+        return int(sha256(encoded_triple.encode()).hexdigest(), base=16)
+
+    def linked_hash(pattern):
+        return sum(triple_hash(*t) for t in graph.triples(pattern))
+
+    graph_hash = 0
+    for s, p, o in graph:
+        graph_hash += triple_hash(s, p, o)
+        for resource in (s, o):
+            if isinstance(resource, BNode):
+                graph_hash += linked_hash((None, None, resource))
+                graph_hash += linked_hash((resource, None, None))
+
+    return "{0:064x}".format(graph_hash % mod_operand)
+
+
+def run(fanouts):
+    calculator = InterwovenHashCalculator()
+
+    for fanout in fanouts:
+        g = make_lei_graph(entities=ENTITIES, bnodes_per_entity=2, bnode_fanout=fanout)
+        if calculator.calculate_hash(g) != reference_calculate_hash(g):
+            raise AssertionError("Digest differs from the reference algorithm for fan-out {}".format(fanout))
+
+        params = dict(triples=len(g), bnode_fanout=fanout)
+        report(summarize("hashes.interwoven", measure(lambda: calculator.calculate_hash(g), repeat=10), **params))
+        report(summarize("hashes.reference", measure(lambda: reference_calculate_hash(g), repeat=3), **params))
+
+        raw = g.serialize(format='nt')
+        report(summarize("hashes.parse_and_hash_nt",
+                         measure(lambda: _parse_and_hash(calculator, raw), repeat=10), **params))
+        report(summarize("hashes.streaming_nt",
+                         measure(lambda: calculator.calculate_hash_from_raw(raw, 'nt'), repeat=10), **params))
+
+        batch = [make_lei_graph(entities=1, bnodes_per_entity=2, bnode_fanout=fanout, seed=seed)
+                 for seed in range(BATCH_SIZE)]
+        params = dict(graphs=BATCH_SIZE, bnode_fanout=fanout)
+        report(summarize("hashes.one_by_one", measure(lambda: [calculator.calculate_hash(g) for g in batch],
+                                                      repeat=10), **params))
+        report(summarize("hashes.batch", measure(lambda: calculator.calculate_hashes(batch), repeat=10), **params))
+
+
+def _parse_and_hash(calculator, raw):
+    g = Graph()
+    g.parse(data=raw, format='nt')
+    return calculator.calculate_hash(g)
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_FANOUTS))
@@ -0,0 +1,73 @@
+"""
+Compares GET_LEI lookup latency: full ledger scan (``ledger.get``) against
+the ihash => seqNo index kept in the graphchain state.
+
+    python -m benchmarks.bench_ihash_index [10000,100000,1000000]
+"""
+import random
+import sys
+import tempfile
+from hashlib import sha256
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from plenum.common.ledger import Ledger
+from plenum.common.txn_util import append_txn_metadata
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from plenum.server.plugin.graphchain.constants import ADD_LEI, GRAPH_IHASH_FIELD
+from plenum.server.plugin.graphchain.graph_req_handler import GraphchainReqHandler
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+LOOKUPS = 20
+
+
+def _make_txn(seq_no):
+    graph_hash = sha256(str(seq_no).encode()).hexdigest()
+    txn = {
+        "txn": {"type": ADD_LEI, "data": {"lei": {"content": "", "format": "nt"}}, "metadata": {}},
+        "txnMetadata": {},
+        "reqSignature": {},
+        "ver": "1",
+        GRAPH_IHASH_FIELD: graph_hash,
+    }
+    return append_txn_metadata(txn, seq_no=seq_no, txn_time=0)
+
+
+def _build_handler(data_dir, size):
+    ledger = Ledger(CompactMerkleTree(hashStore=MemoryHashStore()), dataDir=data_dir, fileName="bench_ledger")
+    for seq_no in range(1, size + 1):
+        ledger.add(_make_txn(seq_no))
+
+    state = PruningState(KeyValueStorageInMemory())
+    synchronizer = GraphStoreSynchronizer(data_dir, "bench_sync")
+    return GraphchainReqHandler(ledger, state, None, synchronizer)
+
+
+def run(sizes):
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            handler = _build_handler(data_dir, size)
+
+            rebuild = measure(handler.rebuild_ihash_index_if_missing, repeat=1, warmup=0)
+            report(summarize("ihash_index.rebuild", rebuild, txns=size))
+
+            hashes = [_make_txn(random.randint(1, size))[GRAPH_IHASH_FIELD] for _ in range(LOOKUPS)]
+
+            def scan():
+                for graph_hash in hashes:
+                    handler.ledger.get(**{GRAPH_IHASH_FIELD: graph_hash})
+
+            def indexed():
+                for graph_hash in hashes:
+                    handler._get_txn_by_ihash(graph_hash)
+
+            report(summarize("ihash_index.ledger_scan", measure(scan, repeat=3), txns=size, lookups=LOOKUPS))
+            report(summarize("ihash_index.indexed", measure(indexed, repeat=50), txns=size, lookups=LOOKUPS))
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_SIZES))
@@ -0,0 +1,76 @@
+"""
+ADD_LEI write throughput (static validation + apply) with the plugin's
+logging off, at INFO and at DEBUG with cut and with whole graph payloads.
+Log lines are written to os.devnull, so the numbers show the cost of
+building them.
+
+    python -m benchmarks.bench_logging [200]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from plenum.common.ledger import Ledger
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+
+from benchmarks.common import report, parse_sizes
+from benchmarks.data import make_add_lei_requests
+from benchmarks.stub_sparql_server import StubSparqlServer
+from plenum.server.plugin.graphchain.constants import STARDOG
+from plenum.server.plugin.graphchain.graph_req_handler import GraphchainReqHandler
+from plenum.server.plugin.graphchain.graph_store import load_graph_store_class
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.logger import get_logger, configure_logging
+
+DEFAULT_REQUESTS = [200]
+
+# name => (log level, max payload length)
+MODES = {
+    "off": ('WARNING', 200),
+    "info": ('INFO', 200),
+    "debug_cut": ('DEBUG', 200),
+    "debug_full": ('DEBUG', 10 ** 9),
+}
+
+
+def _make_handler(data_dir, name, graph_store):
+    ledger = Ledger(CompactMerkleTree(hashStore=MemoryHashStore()), dataDir=data_dir, fileName=name + "_ledger")
+    state = PruningState(KeyValueStorageInMemory())
+    synchronizer = GraphStoreSynchronizer(data_dir, name + "_sync")
+    return GraphchainReqHandler(ledger, state, graph_store, synchronizer), synchronizer
+
+
+def run(request_counts):
+    logger = get_logger()
+    logger.propagate = False
+    with open(os.devnull, "w") as devnull:
+        logger.addHandler(logging.StreamHandler(devnull))
+
+        with StubSparqlServer() as server, tempfile.TemporaryDirectory() as data_dir:
+            graph_store = load_graph_store_class(STARDOG)("db", server.url, "user", "pass")
+            for count in request_counts:
+                for i, (mode, (level, max_payload_length)) in enumerate(MODES.items()):
+                    # Every mode gets its own graphs, as stored ones are rejected as duplicates.
+                    requests = make_add_lei_requests(count, i * count)
+                    configure_logging(level, max_payload_length)
+                    handler, synchronizer = _make_handler(data_dir, "{}_{}".format(mode, count), graph_store)
+
+                    start = time.perf_counter()
+                    for request in requests:
+                        handler.doStaticValidation(request)
+                        handler.apply(request, int(time.time()))
+                    elapsed = time.perf_counter() - start
+
+                    handler.graph_store_writer.stop()
+                    synchronizer.stop()
+                    report({"name": "logging.add_lei", "params": {"mode": mode, "requests": count}, "runs": 1,
+                            "seconds": elapsed, "requests_per_second": count / elapsed})
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_REQUESTS))
@@ -0,0 +1,94 @@
+"""
+GraphchainReqHandler end to end against a temporary Ledger and a stub
+triple store: static validation and apply of ADD_LEI requests, then
+GET_LEI of the committed graphs, first from the ihash index and the ledger
+and then from the response cache.
+
+    python -m benchmarks.bench_req_handler [100,1000]
+"""
+import sys
+import tempfile
+import time
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from plenum.common.constants import TXN_TYPE
+from plenum.common.ledger import Ledger
+from plenum.common.request import Request
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_add_lei_requests, IDENTIFIER
+from benchmarks.stub_sparql_server import StubSparqlServer
+from plenum.server.plugin.graphchain.constants import GET_LEI, GRAPH_IHASH_FIELD, STARDOG
+from plenum.server.plugin.graphchain.graph_req_handler import GraphchainReqHandler
+from plenum.server.plugin.graphchain.graph_store import load_graph_store_class
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+
+DEFAULT_REQUESTS = [100, 1000]
+ENTITIES = 5
+
+
+def _make_handler(data_dir, name, graph_store):
+    ledger = Ledger(CompactMerkleTree(hashStore=MemoryHashStore()), dataDir=data_dir, fileName=name + "_ledger")
+    state = PruningState(KeyValueStorageInMemory())
+    synchronizer = GraphStoreSynchronizer(data_dir, name + "_sync")
+    return GraphchainReqHandler(ledger, state, graph_store, synchronizer), synchronizer
+
+
+def _report_throughput(name, elapsed, count, **params):
+    report({"name": name, "params": dict(params, requests=count), "runs": 1, "seconds": elapsed,
+            "requests_per_second": count / elapsed})
+
+
+def _commit_all(handler):
+    # The node commits batches through the handler; here everything applied
+    # is committed at once, the same way the ihash index rebuild does it.
+    # The response cache is left empty, so the first GET_LEI pass reads the
+    # ledger and fills it.
+    handler.ledger.commitTxns(handler.ledger.uncommitted_size - handler.ledger.size)
+    handler.state.commit(rootHash=handler.state.headHash)
+
+
+def run(request_counts):
+    with StubSparqlServer() as server, tempfile.TemporaryDirectory() as data_dir:
+        graph_store = load_graph_store_class(STARDOG)("db", server.url, "user", "pass")
+        first_seed = 0
+        for count in request_counts:
+            # The stub keeps graphs of earlier sizes, so every size gets new ones.
+            requests = make_add_lei_requests(count, first_seed, entities=ENTITIES)
+            first_seed += count
+            handler, synchronizer = _make_handler(data_dir, "bench_{}".format(count), graph_store)
+
+            start = time.perf_counter()
+            for request in requests:
+                handler.doStaticValidation(request)
+            _report_throughput("req_handler.static_validation", time.perf_counter() - start, count,
+                               entities=ENTITIES)
+
+            start = time.perf_counter()
+            for request in requests:
+                handler.apply(request, int(time.time()))
+            _report_throughput("req_handler.apply", time.perf_counter() - start, count, entities=ENTITIES)
+
+            _commit_all(handler)
+            get_requests = [Request(identifier=IDENTIFIER, reqId=seq_no,
+                                    operation={TXN_TYPE: GET_LEI, GRAPH_IHASH_FIELD: txn[GRAPH_IHASH_FIELD]},
+                                    protocolVersion=2)
+                            for seq_no, txn in handler.ledger.getAllTxn()]
+
+            def get_all():
+                for request in get_requests:
+                    handler.get_query_response(request)
+
+            report(summarize("req_handler.get_lei", measure(get_all, repeat=1, warmup=0), requests=count,
+                             cache="cold"))
+            report(summarize("req_handler.get_lei", measure(get_all, repeat=5), requests=count, cache="warm"))
+
+            handler.graph_store_writer.stop()
+            synchronizer.stop()
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_REQUESTS))
@@ -0,0 +1,91 @@
+"""
+Measures plugin startup by phase: importing modules (each in a fresh
+interpreter, so nothing is cached), creating the local stores and the
+request handler, and probing the triple store, which `main` now does in
+the background.
+
+    python -m benchmarks.bench_startup [5]
+"""
+import subprocess
+import sys
+import tempfile
+import threading
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from plenum.common.ledger import Ledger
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.stub_sparql_server import StubSparqlServer
+from plenum.server.plugin.graphchain.blob_store import BlobStore
+from plenum.server.plugin.graphchain.constants import STARDOG
+from plenum.server.plugin.graphchain.graph_memo import GraphMemo
+from plenum.server.plugin.graphchain.graph_req_handler import GraphchainReqHandler
+from plenum.server.plugin.graphchain.graph_store import load_graph_store_class
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.known_graphs import KnownGraphs
+from plenum.server.plugin.graphchain.main import _probe_graph_store
+
+DEFAULT_REPEATS = [5]
+MODULES = [
+    "rdflib",
+    "requests",
+    "plenum.server.plugin.graphchain.graph_store",
+    "plenum.server.plugin.graphchain.stardog_graph_store",
+    "plenum.server.plugin.graphchain.neptune_graph_store",
+    "plenum.server.plugin.graphchain.graph_req_handler",
+    "plenum.server.plugin.graphchain.main",
+]
+IMPORT_SCRIPT = "import time; t = time.perf_counter(); import {}; print(time.perf_counter() - t)"
+
+
+def _import_time(module):
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT.format(module)])
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def _make_handler(data_dir):
+    ledger = Ledger(CompactMerkleTree(hashStore=MemoryHashStore()), dataDir=data_dir, fileName="bench_ledger")
+    state = PruningState(KeyValueStorageInMemory())
+    synchronizer = GraphStoreSynchronizer(data_dir, "bench_sync")
+    handler = GraphchainReqHandler(ledger, state, None, synchronizer)
+    handler.graph_store_writer.stop()
+    synchronizer.stop()
+
+
+def run(repeats):
+    repeat = repeats[0]
+    for module in MODULES:
+        durations = [_import_time(module) for _ in range(repeat)]
+        report(summarize("startup.import", durations, module=module))
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        counter = iter(range(10 ** 6))
+        phases = {
+            "blob_store": lambda: BlobStore(data_dir, "blobs-{}".format(next(counter))).stop(),
+            "graph_memo": lambda: GraphMemo(data_dir, "memo-{}".format(next(counter)), 100000),
+            "known_graphs": lambda: KnownGraphs(data_dir, "known-{}".format(next(counter)), 1000000, 0.01),
+            "request_handler": lambda: _make_handler(data_dir),
+        }
+        for phase, func in phases.items():
+            report(summarize("startup.init", measure(func, repeat=repeat), phase=phase))
+
+    with StubSparqlServer(latency=0.05) as server:
+        graph_store = load_graph_store_class(STARDOG)("db", server.url, "user", "pass")
+
+        def blocking():
+            _probe_graph_store(graph_store, "db", 1, 0)
+
+        def background():
+            thread = threading.Thread(target=blocking)
+            thread.daemon = True
+            thread.start()
+
+        report(summarize("startup.ts_probe", measure(blocking, repeat=repeat), mode="blocking"))
+        report(summarize("startup.ts_probe", measure(background, repeat=repeat), mode="background"))
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_REPEATS))
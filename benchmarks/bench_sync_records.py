@@ -0,0 +1,88 @@
+"""
+Compares graph store synchronizer records: the former JSON records with
+decoded content, binary records with raw or compressed content, and
+records holding only the ledger seqNo. Reports the on-disk size of the
+synchronizer db and the time of a sweep decoding all its entries.
+
+    python -m benchmarks.bench_sync_records [1,10,100]
+"""
+import os
+import sys
+import tempfile
+from hashlib import sha256
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.helpers import bytes_to_dict, dict_to_bytes, bytes_to_str
+from plenum.server.plugin.graphchain.sync_records import encode_content_record, encode_ledger_record, \
+    decode_sync_record
+
+DEFAULT_ENTITIES = [1, 10, 100]
+RECORDS = 1000
+GRAPH_FORMAT = 'turtle'
+
+
+def _json_record(graph_raw_content, seq_no):
+    return dict_to_bytes({"content": bytes_to_str(graph_raw_content), "format": GRAPH_FORMAT})
+
+
+def _binary_record(graph_raw_content, seq_no):
+    return encode_content_record(graph_raw_content, GRAPH_FORMAT, compression_threshold=None)
+
+
+def _compressed_record(graph_raw_content, seq_no):
+    return encode_content_record(graph_raw_content, GRAPH_FORMAT, compression_threshold=0)
+
+
+def _ledger_record(graph_raw_content, seq_no):
+    return encode_ledger_record(seq_no, GRAPH_FORMAT)
+
+
+def _sweep_json(synchronizer):
+    for _, value in synchronizer.list_all():
+        graph_dict = bytes_to_dict(value.tobytes())
+        graph_dict["content"].encode()
+
+
+def _sweep_binary(synchronizer):
+    for _, value in synchronizer.list_all():
+        record = decode_sync_record(value)
+        if record.content is not None:
+            record.content.tobytes()
+
+
+ENCODINGS = [
+    ("json", _json_record, _sweep_json),
+    ("binary", _binary_record, _sweep_binary),
+    ("binary_compressed", _compressed_record, _sweep_binary),
+    ("ledger_ref", _ledger_record, _sweep_binary),
+]
+
+
+def _db_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def run(entities_list):
+    for entities in entities_list:
+        graph_raw_content = serialize_graph(make_lei_graph(entities=entities), GRAPH_FORMAT)
+
+        for name, encode, sweep in ENCODINGS:
+            with tempfile.TemporaryDirectory() as data_dir:
+                synchronizer = GraphStoreSynchronizer(data_dir, "bench_sync")
+                for seq_no in range(1, RECORDS + 1):
+                    key = sha256(str(seq_no).encode()).hexdigest().encode()
+                    synchronizer.add(key, encode(graph_raw_content, seq_no))
+                synchronizer.db.compact_range()
+
+                durations = measure(lambda: sweep(synchronizer), repeat=10)
+                result = summarize("sync_records.sweep.{}".format(name), durations,
+                                   entities=entities, records=RECORDS, graph_bytes=len(graph_raw_content))
+                result["db_bytes"] = _db_size(os.path.join(data_dir, "bench_sync"))
+                report(result)
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_ENTITIES))
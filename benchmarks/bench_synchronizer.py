@@ -0,0 +1,70 @@
+"""
+GraphStoreSynchronizer writes and reads: adding entries one by one and in
+batches, iterating over all entries and taking due entries for a sync run.
+
+    python -m benchmarks.bench_synchronizer [1000,10000]
+"""
+import sys
+import tempfile
+import time
+from hashlib import sha256
+
+from benchmarks.common import measure, summarize, report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.sync_records import encode_content_record
+
+DEFAULT_SIZES = [1000, 10000]
+GRAPH_FORMAT = 'turtle'
+ADD_MANY_BATCH_SIZE = 100
+
+
+def _make_pairs(count, prefix):
+    record = encode_content_record(serialize_graph(make_lei_graph(entities=5), GRAPH_FORMAT), GRAPH_FORMAT)
+    return [(sha256("{}{}".format(prefix, i).encode()).hexdigest().encode(), record) for i in range(count)]
+
+
+def _report_throughput(name, elapsed, count, **params):
+    report({"name": name, "params": dict(params, entries=count), "runs": 1, "seconds": elapsed,
+            "entries_per_second": count / elapsed})
+
+
+def run(sizes):
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            synchronizer = GraphStoreSynchronizer(data_dir, "bench_sync", initial_backoff=0)
+
+            pairs = _make_pairs(size, "one")
+            start = time.perf_counter()
+            for key, value in pairs:
+                synchronizer.add(key, value)
+            _report_throughput("synchronizer.add", time.perf_counter() - start, size)
+
+            pairs = _make_pairs(size, "many")
+            start = time.perf_counter()
+            for i in range(0, size, ADD_MANY_BATCH_SIZE):
+                synchronizer.add_many(pairs[i:i + ADD_MANY_BATCH_SIZE])
+            _report_throughput("synchronizer.add_many", time.perf_counter() - start, size,
+                               batch_size=ADD_MANY_BATCH_SIZE)
+
+            report(summarize("synchronizer.list_all",
+                             measure(lambda: sum(1 for _ in synchronizer.list_all()), repeat=5),
+                             entries=2 * size))
+
+            # The scheduler thread is not started, so due entries are only
+            # taken here and the job does nothing with them. Taken entries
+            # are rescheduled with no backoff, so the loop stops once every
+            # entry has been taken once.
+            synchronizer._scheduled_job = lambda due: None
+            start = time.perf_counter()
+            taken = 0
+            while taken < 2 * size:
+                handled = synchronizer.run_once()
+                if not handled:
+                    break
+                taken += handled
+            _report_throughput("synchronizer.take_due", time.perf_counter() - start, taken)
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_SIZES))
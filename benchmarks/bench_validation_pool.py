@@ -0,0 +1,55 @@
+"""
+Throughput of ADD_LEI graph validation and hashing on GraphValidationPool
+with a growing number of worker processes, compared with validating the
+same batch inline.
+
+    python -m benchmarks.bench_validation_pool [1,2,4,8]
+"""
+import base64
+import sys
+import time
+
+from benchmarks.common import report, parse_sizes
+from benchmarks.data import make_lei_graph, serialize_graph
+from plenum.server.plugin.graphchain.validation_pool import GraphValidationPool, validate_and_hash
+
+DEFAULT_POOL_SIZES = [1, 2, 4, 8]
+BATCH_SIZE = 64
+GRAPH_FORMAT = 'turtle'
+TIMEOUT = 60
+
+
+def _make_batch():
+    return {
+        seed: (base64.b64encode(serialize_graph(make_lei_graph(entities=5, bnode_fanout=8, seed=seed),
+                                                GRAPH_FORMAT)).decode(), GRAPH_FORMAT, None)
+        for seed in range(BATCH_SIZE)
+    }
+
+
+def _report_throughput(name, elapsed, **params):
+    report({"name": name, "params": params, "runs": 1, "seconds": elapsed,
+            "graphs_per_second": BATCH_SIZE / elapsed})
+
+
+def run(pool_sizes):
+    batch = _make_batch()
+
+    start = time.perf_counter()
+    for content, graph_format, encoding in batch.values():
+        validate_and_hash(content, graph_format, encoding)
+    _report_throughput("validation_pool.inline", time.perf_counter() - start, graphs=BATCH_SIZE)
+
+    for pool_size in pool_sizes:
+        pool = GraphValidationPool(pool_size, TIMEOUT)
+        pool.validate({0: batch[0]})  # start the workers before measuring
+
+        start = time.perf_counter()
+        pool.validate(batch)
+        _report_throughput("validation_pool.parallel", time.perf_counter() - start,
+                           graphs=BATCH_SIZE, pool_size=pool_size)
+        pool.stop()
+
+
+if __name__ == '__main__':
+    run(parse_sizes(sys.argv, DEFAULT_POOL_SIZES))
@@ -0,0 +1,44 @@
+import json
+import statistics
+import sys
+import time
+
+
+def measure(func, repeat: int = 100, warmup: int = 1):
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    return durations
+
+
+def summarize(name: str, durations, **params) -> dict:
+    ordered = sorted(durations)
+    return {
+        "name": name,
+        "params": params,
+        "runs": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.mean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def report(result: dict, stream=None):
+    # sys.stdout is looked up on every call, so the runner can redirect it.
+    stream = stream or sys.stdout
+    stream.write(json.dumps(result, sort_keys=True) + "\n")
+    stream.flush()
+
+
+def parse_sizes(argv, default):
+    if len(argv) > 1:
+        return [int(size) for size in argv[1].split(",")]
+    return default
@@ -0,0 +1,88 @@
+"""
+Compares two result files written by `python -m benchmarks` and reports
+benchmarks which got slower than `--threshold` (relative), matching results
+by name and params. Timings compare medians, throughputs (`*_per_second`)
+compare the rate. Exits with 1 when any regression is found.
+
+    python -m benchmarks.compare baseline.jsonl current.jsonl [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+PER_SECOND_SUFFIX = "_per_second"
+
+
+def load_results(path) -> dict:
+    results = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("name") == "meta":
+                continue
+            results[_key(result)] = result
+    return results
+
+
+def _key(result):
+    return result["name"], json.dumps(result.get("params", {}), sort_keys=True)
+
+
+def _metric(result):
+    """
+    :return: (metric name, value, whether higher values are better)
+    """
+    for field, value in sorted(result.items()):
+        if field.endswith(PER_SECOND_SUFFIX):
+            return field, value, True
+    return "median", result.get("median"), False
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    :return: list of (key, metric, baseline value, current value, relative change, regressed)
+        where a positive change is always an improvement
+    """
+    rows = []
+    for key in sorted(baseline.keys() & current.keys()):
+        metric, old, higher_is_better = _metric(baseline[key])
+        new = current[key].get(metric)
+        if not old or new is None:
+            continue
+
+        change = (new - old) / old if higher_is_better else (old - new) / old
+        rows.append((key, metric, old, new, change, change < -threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression, 0.1 by default")
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    rows = compare(baseline, current, args.threshold)
+
+    for (name, params), metric, old, new, change, regressed in rows:
+        print("{} {:<40} {:<60} {:<20} {:>12.6g} -> {:<12.6g} {:+.1%}".format(
+            "!" if regressed else " ", name, params, metric, old, new, change))
+
+    for label, keys in (("only in baseline", baseline.keys() - current.keys()),
+                        ("only in current", current.keys() - baseline.keys())):
+        for name, params in sorted(keys):
+            print("  {:<40} {:<60} {}".format(name, params, label))
+
+    regressions = sum(1 for row in rows if row[-1])
+    print("{} compared, {} regressed by more than {:.0%}".format(len(rows), regressions, args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Synthetic, GLEIF-like LEI records used by the benchmarks.
+
+Every generated entity has a handful of literal attributes plus a number of
+blank-node structures (addresses, relationships), so both the graph size and
+the blank-node fan-out can be scaled independently. Generation is seeded and
+fully reproducible.
+"""
+import base64
+import random
+
+from plenum.common.constants import TXN_TYPE
+from plenum.common.request import Request
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+
+from plenum.server.plugin.graphchain.constants import ADD_LEI, LEI_FIELD, GRAPH_CONTENT_FIELD, GRAPH_FORMAT_FIELD
+
+LEI = Namespace("http://lei.info/voc/l1/")
+ENTITY_IRI = "http://lei.info/entity/{}"
+IDENTIFIER = "Th7MpTaRZVRYnPiabds81Y"
+
+_CITIES = ["Warsaw", "Lodz", "Frankfurt", "London", "New York", "Tokyo", "Paris", "Madrid"]
+_COUNTRIES = ["PL", "DE", "GB", "US", "JP", "FR", "ES"]
+
+
+def make_lei_code(rnd: random.Random) -> str:
+    return "".join(rnd.choice("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(20))
+
+
+def make_lei_graph(entities: int = 1, bnodes_per_entity: int = 2, bnode_fanout: int = 4, seed: int = 0) -> Graph:
+    """
+    :param entities: number of legal entities in the graph
+    :param bnodes_per_entity: number of address/relationship blank-node pairs per entity
+    :param bnode_fanout: number of address lines attached to every address blank node
+    """
+    rnd = random.Random(seed)
+    g = Graph()
+
+    for _ in range(entities):
+        lei = make_lei_code(rnd)
+        entity = URIRef(ENTITY_IRI.format(lei))
+        g.add((entity, LEI.lei, Literal(lei)))
+        g.add((entity, LEI.legalName, Literal("Company {} S.A.".format(lei[:6]), lang="en")))
+        g.add((entity, LEI.status, Literal("ACTIVE")))
+
+        for i in range(bnodes_per_entity):
+            address = BNode()
+            g.add((entity, LEI.legalAddress if i == 0 else LEI.otherAddress, address))
+            for line in range(bnode_fanout):
+                g.add((address, LEI.line, Literal("{} Street {} / {}".format(rnd.randint(1, 999), i, line))))
+            g.add((address, LEI.city, Literal(rnd.choice(_CITIES))))
+            g.add((address, LEI.country, Literal(rnd.choice(_COUNTRIES))))
+            g.add((address, LEI.postalCode, Literal("{:05d}".format(rnd.randint(0, 99999)))))
+
+            relationship = BNode()
+            g.add((relationship, LEI.startNode, entity))
+            g.add((relationship, LEI.endNode, URIRef(ENTITY_IRI.format(make_lei_code(rnd)))))
+            g.add((relationship, LEI.address, address))
+
+    return g
+
+
+def serialize_graph(graph: Graph, graph_format: str) -> bytes:
+    return graph.serialize(format=graph_format)
+
+
+def make_add_lei_requests(count: int, first_seed: int = 0, entities: int = 5, graph_format: str = 'turtle') -> list:
+    """
+    ADD_LEI requests with distinct graphs, one per seed starting at `first_seed`.
+    """
+    requests = []
+    for seed in range(first_seed, first_seed + count):
+        content = serialize_graph(make_lei_graph(entities=entities, seed=seed), graph_format)
+        operation = {
+            TXN_TYPE: ADD_LEI,
+            LEI_FIELD: {GRAPH_CONTENT_FIELD: base64.b64encode(content).decode(), GRAPH_FORMAT_FIELD: graph_format}
+        }
+        requests.append(Request(identifier=IDENTIFIER, reqId=seed, operation=operation, protocolVersion=2))
+    return requests
@@ -0,0 +1,102 @@
+"""
+Minimal in-process SPARQL 1.1 protocol server used by the graph store
+benchmarks. It remembers names of inserted graphs and answers the ASK and
+SELECT queries issued by the plugin; everything else gets an empty result.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+_GRAPH_NAME = re.compile(r"GRAPH\s+<([^>]+)>")
+_VALUES_IRI = re.compile(r"<([^>]+)>")
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubSparqlServer:
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.graphs = set()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _handle_update(self, update):
+        with self._lock:
+            self.graphs.update(_GRAPH_NAME.findall(update))
+        return None
+
+    def _handle_query(self, query):
+        with self._lock:
+            if query.lstrip().upper().startswith("ASK"):
+                names = _GRAPH_NAME.findall(query)
+                return {"head": {}, "boolean": bool(names) and names[0] in self.graphs}
+
+            values = query[query.find("VALUES"):] if "VALUES" in query else ""
+            bindings = [{"g": {"type": "uri", "value": iri}}
+                        for iri in _VALUES_IRI.findall(values) if iri in self.graphs]
+            return {"head": {"vars": ["g"]}, "results": {"bindings": bindings}}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._respond({"head": {}, "results": {"bindings": []}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                if 'update' in form:
+                    self._respond(stub._handle_update(form['update'][0]))
+                else:
+                    self._respond(stub._handle_query(form.get('query', [""])[0]))
+
+            def _respond(self, result):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                body = json.dumps(result).encode() if result is not None else b""
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/sparql-results+json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
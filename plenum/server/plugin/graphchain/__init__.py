@@ -5,8 +5,11 @@ LEDGER_IDS = {GRAPHCHAIN_LEDGER_ID, }
 
 AcceptableWriteTypes = {
     GraphTransactions.ADD_LEI.value,
+    GraphTransactions.ADD_LEIS.value,
 }
 
 AcceptableQueryTypes = {
     GraphTransactions.GET_LEI.value,
+    GraphTransactions.GET_LEIS.value,
+    GraphTransactions.GET_METRICS.value,
 }
@@ -0,0 +1,127 @@
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from hashlib import sha256
+
+import rocksdb
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+
+UTF_8 = "utf-8"
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024
+INDEX_NAME = "index"
+SEGMENT_FILE_TEMPLATE = "segment-{:06d}.blob"
+
+# Index value: segment number, offset and size of the blob, then its SHA-256.
+INDEX_ENTRY = struct.Struct(">IQQ32s")
+
+BlobRef = namedtuple('BlobRef', ['digest', 'size'])
+
+
+def make_blob_ref(graph_raw_content) -> BlobRef:
+    return BlobRef(sha256(graph_raw_content).hexdigest(), len(graph_raw_content))
+
+
+class BlobStore:
+    """
+    Content-addressed store of graph bodies keyed by ihash.
+
+    Blobs are appended to segment files, which are read through memory maps,
+    so `get` returns a memoryview of the mapped file without copying the
+    blob. A RocksDB index maps ihashes to blob locations and digests; a blob
+    is written only once, however many times it is put.
+    """
+
+    def __init__(self, data_dir: str, name: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        logger.info("Initializing graph blob store...")
+        self._dir = os.path.join(data_dir, name)
+        os.makedirs(self._dir, exist_ok=True)
+        self.db = rocksdb.DB(os.path.join(self._dir, INDEX_NAME),
+                             rocksdb.Options(
+                                 create_if_missing=True))
+        self._segment_size = segment_size
+        self._lock = threading.Lock()
+        self._maps = {}
+
+        self._segment_no = self._last_segment_no()
+        self._segment = open(self._segment_path(self._segment_no), "ab")
+
+    def put(self, graph_hash: str, graph_raw_content: bytes) -> BlobRef:
+        # A graph is stored under its ihash in the serialization it was put
+        # with. Another serialization of the same graph (e.g. of a reverted
+        # txn followed by a committed one) replaces it in the index.
+        key = graph_hash.encode(UTF_8)
+        digest = sha256(graph_raw_content).digest()
+        with self._lock:
+            entry = self.db.get(key)
+            if entry is not None and INDEX_ENTRY.unpack(entry)[3] == digest:
+                return BlobRef(digest.hex(), len(graph_raw_content))
+
+            if self._segment.tell() > 0 and self._segment.tell() + len(graph_raw_content) > self._segment_size:
+                self._roll_segment()
+
+            # The blob is on disk before it is indexed; a crash in between
+            # leaves only unreferenced bytes in the segment.
+            offset = self._segment.tell()
+            self._segment.write(graph_raw_content)
+            self._segment.flush()
+
+            self.db.put(key, INDEX_ENTRY.pack(self._segment_no, offset, len(graph_raw_content), digest))
+            return BlobRef(digest.hex(), len(graph_raw_content))
+
+    def get(self, graph_hash: str):
+        """
+        :return: memoryview of the blob or None if there is no such blob
+        """
+        entry = self.db.get(graph_hash.encode(UTF_8))
+        if entry is None:
+            return None
+
+        segment_no, offset, size, _ = INDEX_ENTRY.unpack(entry)
+        if size == 0:
+            return memoryview(b"")
+        return memoryview(self._get_map(segment_no, offset + size))[offset:offset + size]
+
+    def ref(self, graph_hash: str):
+        entry = self.db.get(graph_hash.encode(UTF_8))
+        if entry is None:
+            return None
+
+        _, _, size, digest = INDEX_ENTRY.unpack(entry)
+        return BlobRef(digest.hex(), size)
+
+    def __contains__(self, graph_hash: str):
+        return self.db.get(graph_hash.encode(UTF_8)) is not None
+
+    def stop(self):
+        with self._lock:
+            self._segment.close()
+
+    def _get_map(self, segment_no, min_size):
+        with self._lock:
+            segment_map = self._maps.get(segment_no)
+            if segment_map is None or len(segment_map) < min_size:
+                # Maps of a growing segment are replaced, never closed:
+                # memoryviews handed out earlier may still refer to them.
+                with open(self._segment_path(segment_no), "rb") as f:
+                    segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment_no] = segment_map
+            return segment_map
+
+    def _roll_segment(self):
+        self._segment.close()
+        self._segment_no += 1
+        self._segment = open(self._segment_path(self._segment_no), "ab")
+        logger.debug("Graph blob store switched to segment {}.".format(self._segment_no))
+
+    def _last_segment_no(self):
+        numbers = [int(name[len("segment-"):-len(".blob")]) for name in os.listdir(self._dir)
+                   if name.startswith("segment-") and name.endswith(".blob")]
+        return max(numbers) if numbers else 1
+
+    def _segment_path(self, segment_no):
+        return os.path.join(self._dir, SEGMENT_FILE_TEMPLATE.format(segment_no))
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+
+class LruCache:
+    """
+    Least recently used cache bounded by the number of entries.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._items = OrderedDict()
+
+    def put(self, key, value):
+        if self._max_size <= 0:
+            return
+
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def pop(self, key):
+        return self._items.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SizedLruCache:
+    """
+    Least recently used cache bounded by the total size of its values, as
+    estimated by `sizeof`. Hits and misses of `get` are counted.
+    """
+
+    def __init__(self, max_bytes: int, sizeof=len):
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._items = OrderedDict()
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        if size > self._max_bytes:
+            return
+
+        self.pop(key)
+        self._items[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def pop(self, key):
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+
+        self._bytes -= item[1]
+        return item[0]
+
+    def metrics(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._items),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": self._hits / lookups if lookups else 0.0,
+        }
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,121 @@
+import time
+
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.graph_store_writer import GraphStoreWriter
+from plenum.server.plugin.graphchain.helpers import str_to_bytes
+from plenum.server.plugin.graphchain.logger import get_logger
+
+logger = get_logger()
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class CatchupReplayer:
+    """
+    Replays graphchain txns received during catch-up into the triple store.
+
+    Graphs are buffered and `batch_size` at a time persisted in the
+    synchronizer with a single write, which also records the seqNo of the
+    last of them, and handed to the graph store writer, whose threads
+    insert them in parallel batches. Graphs the writer cannot take are
+    retried by the synchronizer's scheduler.
+
+    The recorded seqNo is kept until the catch-up completes. Buffered
+    graphs are already in the ledger, so if the node stops before they are
+    flushed, `replay_interrupted` finds them again from that seqNo.
+    """
+
+    def __init__(self, graph_store_synchronizer: GraphStoreSynchronizer, graph_store_writer: GraphStoreWriter,
+                 make_sync_record, batch_size: int = DEFAULT_BATCH_SIZE):
+        self._graph_store_synchronizer = graph_store_synchronizer
+        self._graph_store_writer = graph_store_writer
+        self._make_sync_record = make_sync_record
+        self._batch_size = max(1, batch_size)
+        self._buffer = []
+
+        self._started_at = None
+        self._replayed = 0
+        self._last_seq_no = None
+
+    def start(self, ledger_size: int):
+        """
+        :param ledger_size: seqNo of the last txn before the catch-up
+        """
+        logger.info("Catch-up of graphchain ledger started.")
+        self.flush()
+        if self._graph_store_synchronizer.catchup_seq_no() is None:
+            self._graph_store_synchronizer.set_catchup_seq_no(ledger_size)
+        self._started_at = time.perf_counter()
+        self._replayed = 0
+        self._last_seq_no = None
+
+    def replay_interrupted(self, ledger_txns):
+        """
+        Replays graphs of a catch-up which was interrupted before they were
+        flushed.
+
+        :param ledger_txns: callable returning iterable of
+            (seq_no, graph_hash, graph_raw_content, graph_format) of ledger
+            txns from the given seqNo
+        """
+        seq_no = self._graph_store_synchronizer.catchup_seq_no()
+        if seq_no is None:
+            return
+
+        logger.info("Replaying graphs of an interrupted catch-up from seqNo {}...".format(seq_no + 1))
+        self.start(seq_no)
+        for item in ledger_txns(seq_no + 1):
+            self.add(*item)
+        self.complete()
+
+    def add(self, seq_no, graph_hash, graph_raw_content, graph_format):
+        # Outside of catch-up, graphs are not kept in the buffer.
+        self._buffer.append((seq_no, graph_hash, graph_raw_content, graph_format))
+        if self._started_at is None or len(self._buffer) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        buffer, self._buffer = self._buffer, []
+        self._graph_store_synchronizer.add_many(
+            [(str_to_bytes(graph_hash), self._make_sync_record(graph_raw_content, graph_format, seq_no))
+             for seq_no, graph_hash, graph_raw_content, graph_format in buffer],
+            catchup_seq_no=buffer[-1][0] if self._started_at is not None else None)
+        self._graph_store_writer.enqueue_many(
+            [(graph_hash, graph_raw_content, graph_format, None)
+             for _, graph_hash, graph_raw_content, graph_format in buffer])
+
+        self._replayed += len(buffer)
+        self._last_seq_no = buffer[-1][0]
+        if self._started_at is None:
+            return
+
+        progress = self.progress()
+        logger.info("Catch-up replayed {} graphs (last seqNo {}), {:.1f} graphs/s; writer: {}"
+                    .format(progress["replayed"], progress["last_seq_no"], progress["throughput"],
+                            self._graph_store_writer.metrics()))
+
+    def complete(self):
+        self.flush()
+        if self._started_at is None:
+            return
+
+        self._graph_store_synchronizer.set_catchup_seq_no(None)
+
+        progress = self.progress()
+        logger.info("Catch-up of graphchain ledger completed: {} graphs replayed in {:.1f}s ({:.1f} graphs/s)."
+                    .format(progress["replayed"], progress["elapsed"], progress["throughput"]))
+        self._started_at = None
+
+    def progress(self) -> dict:
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "replayed": self._replayed,
+            "buffered": len(self._buffer),
+            "last_seq_no": self._last_seq_no,
+            "elapsed": elapsed,
+            "throughput": self._replayed / elapsed if elapsed else 0.0,
+        }
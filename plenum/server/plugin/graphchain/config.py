@@ -6,4 +6,42 @@ def update_nodes_config_with_plugin_settings(config):
     config.graphchainStateStorage = KeyValueStorageType.Rocksdb
     config.graphchainStateDbName = 'graphchain_state'
     config.graphStoreSynchronizerFile = 'graph_store_sync'
+    config.graphStoreSyncInitialBackoff = 5
+    config.graphStoreSyncMaxBackoff = 3600
+    config.graphStoreSyncBatchSize = 500
+    config.graphStoreSyncDrainRate = 100
+    config.graphStoreSyncRecordMode = 'content'
+    config.graphStoreSyncCompressionThreshold = 64 * 1024
+    config.graphStoreCatchupBatchSize = 500
+    config.graphchainBlobStoreEnabled = False
+    config.graphchainBlobStoreDir = 'graphchain_blobs'
+    config.graphchainBlobStoreSegmentSize = 256 * 1024 * 1024
+    config.graphchainGraphMemoFile = 'graphchain_graph_memo'
+    config.graphchainGraphMemoCapacity = 100000
+    config.graphStoreKnownGraphsFile = 'graph_store_known'
+    config.graphStoreKnownGraphsCapacity = 1000000
+    config.graphStoreKnownGraphsFalsePositiveRate = 0.01
+    config.graphchainParsedGraphCacheSize = 100
+    config.graphchainGetLeisMaxHashes = 1000
+    config.graphchainGetLeisMaxResponseSize = 10 * 1024 * 1024
+    config.graphchainAddLeisMaxItems = 1000
+    config.graphchainResponseCacheSize = 64 * 1024 * 1024
+    config.graphchainResponseCacheWarmTxns = 1000
+    config.graphchainMetricsEnabled = True
+    config.graphchainLogLevel = 'INFO'
+    config.graphchainLogMaxPayloadLength = 200
+    config.graphchainRequestLogSampleRate = 1
+    config.graphchainValidationPoolSize = 2
+    config.graphchainValidationTimeout = 30
+    config.graphStoreWriterConcurrency = 2
+    config.graphStoreWriterQueueSize = 1000
+    config.graphStoreWriterBatchSize = 50
+    config.graphStoreProbeInBackground = True
+    config.graphStoreProbeRetries = 10
+    config.graphStoreProbeInterval = 1
+    config.graphStoreMaxUpdateSize = 1024 * 1024
+    config.graphStoreHttpPoolSize = 10
+    config.graphStoreHttpTimeout = 30
+    config.graphStoreHttpRetries = 3
+    config.graphStoreHttpBackoffFactor = 0.5
     return config
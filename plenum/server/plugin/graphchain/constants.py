@@ -3,14 +3,23 @@ from plenum.server.plugin.graphchain.transactions import GraphTransactions
 GRAPHCHAIN_LEDGER_ID = 785
 
 ADD_LEI = GraphTransactions.ADD_LEI.value
+ADD_LEIS = GraphTransactions.ADD_LEIS.value
 GET_LEI = GraphTransactions.GET_LEI.value
+GET_LEIS = GraphTransactions.GET_LEIS.value
+GET_METRICS = GraphTransactions.GET_METRICS.value
 
 GRAPHCHAIN_HASH_STORE_NAME = 'graphchain'
 
 GRAPH_CONTENT_FIELD = "content"
 GRAPH_FORMAT_FIELD = "format"
+GRAPH_ENCODING_FIELD = "encoding"
 GRAPH_IHASH_FIELD = "ihash"
+GRAPH_IHASHES_FIELD = "ihashes"
 LEI_FIELD = "lei"
+LEIS_FIELD = "leis"
+LEI_INDEX_FIELD = "leiIndex"
+TRUNCATED_FIELD = "truncated"
+METRICS_FIELD = "metrics"
 DATA_FIELD = "data"
 SYNC_PAIR_GRAPH_CONTENT = "content"
 SYNC_PAIR_GRAPH_FORMAT = "format"
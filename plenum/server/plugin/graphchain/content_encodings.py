@@ -0,0 +1,70 @@
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+from plenum.server.plugin.graphchain.constants import GRAPH_CONTENT_FIELD, GRAPH_ENCODING_FIELD
+from plenum.server.plugin.graphchain.helpers import from_base64
+
+# Encodings of LEI graph content. The content is stored in the ledger as the
+# client submitted it, so encoded LEIs take less space on disk and during
+# catch-up; nodes decode it wherever the graph itself is needed.
+IDENTITY = 'identity'
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+
+# Limit on decoded content, so a small request cannot expand without bound.
+MAX_DECODED_SIZE = 64 * 1024 * 1024
+
+
+def supported_encodings() -> list:
+    encodings = [IDENTITY, ZLIB]
+    if zstandard is not None:
+        encodings.append(ZSTD)
+    return encodings
+
+
+def validate_encoding(encoding: str):
+    if encoding is None or encoding in supported_encodings():
+        return True, None
+    return False, "Graph content encoding '{}' not supported.".format(encoding)
+
+
+def encode_content(graph_raw_content: bytes, encoding: str) -> bytes:
+    if encoding is None or encoding == IDENTITY:
+        return graph_raw_content
+    if encoding == ZLIB:
+        return zlib.compress(graph_raw_content, 9)
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=19).compress(graph_raw_content)
+    raise ValueError("Graph content encoding '{}' not supported.".format(encoding))
+
+
+def decode_content(encoded_content: bytes, encoding: str, max_size: int = MAX_DECODED_SIZE) -> bytes:
+    if encoding is None or encoding == IDENTITY:
+        return encoded_content
+
+    if encoding == ZLIB:
+        decompressor = zlib.decompressobj()
+        graph_raw_content = decompressor.decompress(encoded_content, max_size)
+        if decompressor.unconsumed_tail:
+            raise ValueError("Decoded graph content exceeds {} bytes.".format(max_size))
+        if not decompressor.eof:
+            raise ValueError("Graph content is not a complete zlib stream.")
+        return graph_raw_content
+
+    if encoding == ZSTD and zstandard is not None:
+        # max_output_size only applies to frames without the content size in
+        # their header, so a declared size is checked against the limit first.
+        content_size = zstandard.frame_content_size(encoded_content)
+        if content_size > max_size:
+            raise ValueError("Decoded graph content exceeds {} bytes.".format(max_size))
+        return zstandard.ZstdDecompressor().decompress(encoded_content, max_output_size=max_size)
+
+    raise ValueError("Graph content encoding '{}' not supported.".format(encoding))
+
+
+def decode_lei_content(lei: dict) -> bytes:
+    return decode_content(from_base64(lei.get(GRAPH_CONTENT_FIELD)), lei.get(GRAPH_ENCODING_FIELD))
@@ -0,0 +1,120 @@
+import os
+import struct
+import threading
+from hashlib import sha256
+
+import rocksdb
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+
+UTF_8 = "utf-8"
+
+# Entries and their insertion order share one db:
+#   ORDER_PREFIX + 8-byte sequence number => memo key
+#   ENTRY_PREFIX + memo key => result
+# Sequence numbers of stored entries are contiguous, so the oldest entry is
+# found without scanning when the memo is full.
+ORDER_PREFIX = b"\x00"
+ENTRY_PREFIX = b"\x01"
+SEQ = struct.Struct(">Q")
+
+VALID = b"\x01"
+INVALID = b"\x00"
+
+
+class GraphMemo:
+    """
+    Persistent memo of graph validation results keyed by SHA-256 of the
+    decoded graph content and its format. A graph submitted again with the
+    same bytes gets its ihash (or the reason it was invalid) without being
+    parsed. The oldest entries are evicted once `capacity` is reached.
+    """
+
+    def __init__(self, data_dir: str, name: str, capacity: int):
+        logger.info("Initializing graph memo...")
+        self._store_path = os.path.join(data_dir, name)
+        self.db = rocksdb.DB(self._store_path,
+                             rocksdb.Options(
+                                 create_if_missing=True))
+        self._capacity = max(1, capacity)
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+
+        self._first_seq_no, self._next_seq_no = self._load_order()
+
+    def get(self, graph_raw_content: bytes, graph_format: str):
+        """
+        :return: (ihash, None) or (None, reason) when the result is memoized,
+            otherwise None
+        """
+        value = self.db.get(ENTRY_PREFIX + self._make_key(graph_raw_content, graph_format))
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+
+        if value[:1] == VALID:
+            return value[1:].decode(UTF_8), None
+        return None, value[1:].decode(UTF_8)
+
+    def put(self, graph_raw_content: bytes, graph_format: str, ihash: str = None, reason: str = None):
+        key = self._make_key(graph_raw_content, graph_format)
+        value = VALID + ihash.encode(UTF_8) if ihash is not None else INVALID + (reason or "").encode(UTF_8)
+
+        with self._lock:
+            if self.db.get(ENTRY_PREFIX + key) is not None:
+                return
+
+            batch = rocksdb.WriteBatch()
+            batch.put(ORDER_PREFIX + SEQ.pack(self._next_seq_no), key)
+            batch.put(ENTRY_PREFIX + key, value)
+            self._next_seq_no += 1
+
+            while self._next_seq_no - self._first_seq_no > self._capacity:
+                order_key = ORDER_PREFIX + SEQ.pack(self._first_seq_no)
+                evicted = self.db.get(order_key)
+                batch.delete(order_key)
+                if evicted is not None:
+                    batch.delete(ENTRY_PREFIX + evicted)
+                self._first_seq_no += 1
+
+            self.db.write(batch)
+
+    def __len__(self):
+        with self._lock:
+            return self._next_seq_no - self._first_seq_no
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": self._next_seq_no - self._first_seq_no,
+            }
+
+    @staticmethod
+    def _make_key(graph_raw_content, graph_format):
+        return (graph_format or "").encode(UTF_8) + b":" + sha256(graph_raw_content).digest()
+
+    def _load_order(self):
+        first_seq_no = None
+        last_seq_no = None
+        it = self.db.iterkeys()
+        it.seek(ORDER_PREFIX)
+        for key in it:
+            if not key.startswith(ORDER_PREFIX):
+                break
+            seq_no = SEQ.unpack(key[len(ORDER_PREFIX):])[0]
+            if first_seq_no is None:
+                first_seq_no = seq_no
+            last_seq_no = seq_no
+
+        if first_seq_no is None:
+            return 0, 0
+        logger.info("Loaded graph memo with {} entries.".format(last_seq_no - first_seq_no + 1))
+        return first_seq_no, last_seq_no + 1
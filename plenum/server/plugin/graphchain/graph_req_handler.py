@@ -1,36 +1,86 @@
-from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
+from collections import deque
+
 from common.serializers.json_serializer import JsonSerializer
 from common.serializers.serialization import ledger_txn_serializer
 from plenum.common.constants import TXN_TIME, TXN_TYPE
 from plenum.common.exceptions import InvalidClientRequest
 from plenum.common.request import Request
-from plenum.common.txn_util import reqToTxn, append_txn_metadata
+from plenum.common.txn_util import reqToTxn, append_txn_metadata, get_seq_no, init_empty_txn, \
+    append_payload_metadata, set_payload_data, get_protocol_version, get_from, get_req_id, get_digest
 from plenum.common.types import f
 from plenum.server.ledger_req_handler import LedgerRequestHandler
-from rdflib import Graph
 
-from plenum.server.plugin.graphchain.constants import ADD_LEI, GET_LEI, \
-    LEI_FIELD, GRAPH_CONTENT_FIELD, GRAPH_FORMAT_FIELD, \
-    GRAPH_IHASH_FIELD, TXN_FIELD, DATA_FIELD, TXN_METADATA_FIELD, SYNC_PAIR_GRAPH_CONTENT, SYNC_PAIR_GRAPH_FORMAT
+from plenum.server.plugin.graphchain.blob_store import BlobStore
+from plenum.server.plugin.graphchain.caches import LruCache, SizedLruCache
+from plenum.server.plugin.graphchain.catchup_replayer import CatchupReplayer, \
+    DEFAULT_BATCH_SIZE as DEFAULT_CATCHUP_BATCH_SIZE
+from plenum.server.plugin.graphchain.constants import ADD_LEI, ADD_LEIS, GET_LEI, GET_LEIS, GET_METRICS, \
+    METRICS_FIELD, LEI_FIELD, LEIS_FIELD, GRAPH_IHASHES_FIELD, TRUNCATED_FIELD, GRAPH_CONTENT_FIELD, \
+    GRAPH_FORMAT_FIELD, GRAPH_ENCODING_FIELD, GRAPH_IHASH_FIELD, TXN_FIELD, DATA_FIELD, \
+    TXN_METADATA_FIELD, LEI_INDEX_FIELD
+from plenum.server.plugin.graphchain.content_encodings import validate_encoding, decode_content, \
+    decode_lei_content
+from plenum.server.plugin.graphchain.graph_memo import GraphMemo
+from plenum.server.plugin.graphchain.graph_store import GraphStore
 from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.graph_store_writer import GraphStoreWriter, DEFAULT_CONCURRENCY, \
+    DEFAULT_QUEUE_SIZE, DEFAULT_BATCH_SIZE
 from plenum.server.plugin.graphchain.graphs import FormatValidator, \
     GraphValidator
 from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
-from plenum.server.plugin.graphchain.helpers import from_base64, dict_to_bytes, str_to_bytes, bytes_to_str, \
-    bytes_to_dict
-from plenum.server.plugin.graphchain.logger import get_debug_logger
+from plenum.server.plugin.graphchain.helpers import from_base64, to_base64, str_to_bytes, bytes_to_str
+from plenum.server.plugin.graphchain.known_graphs import KnownGraphs
+from plenum.server.plugin.graphchain.logger import get_logger, log_request, Payload
+from plenum.server.plugin.graphchain.metrics import Metrics
+from plenum.server.plugin.graphchain.parsed_graphs import ParsedGraph, parse_graph
+from plenum.server.plugin.graphchain.sync_records import SYNC_RECORD_CONTENT, SYNC_RECORD_LEDGER, \
+    SYNC_RECORD_BLOB, DEFAULT_COMPRESSION_THRESHOLD, encode_content_record, \
+    encode_blob_record, decode_sync_record
+from plenum.server.plugin.graphchain.validation_pool import GraphValidationPool
 
-logger = get_debug_logger()
+logger = get_logger()
 
 
 UTF_8 = "utf-8"
+DEFAULT_PARSED_GRAPH_CACHE_SIZE = 100
+DEFAULT_GET_LEIS_MAX_HASHES = 1000
+DEFAULT_ADD_LEIS_MAX_ITEMS = 1000
+DEFAULT_RESPONSE_CACHE_SIZE = 64 * 1024 * 1024
+# Rough size of the dicts of a cached GET_LEI response besides its content
+RESPONSE_OVERHEAD = 512
+DEFAULT_GET_LEIS_MAX_RESPONSE_SIZE = 10 * 1024 * 1024
+
+# Names of operations in metrics
+OP_NAMES = {
+    ADD_LEI: "add_lei",
+    ADD_LEIS: "add_leis",
+    GET_LEI: "get_lei",
+    GET_LEIS: "get_leis",
+    GET_METRICS: "get_metrics",
+}
 
 
 class GraphchainReqHandler(LedgerRequestHandler):
-    write_types = {ADD_LEI}
-    query_types = {GET_LEI}
-
-    def __init__(self, ledger, state, graph_store, graph_store_synchronizer: GraphStoreSynchronizer):
+    write_types = {ADD_LEI, ADD_LEIS}
+    query_types = {GET_LEI, GET_LEIS, GET_METRICS}
+
+    def __init__(self, ledger, state, graph_store, graph_store_synchronizer: GraphStoreSynchronizer,
+                 parsed_graph_cache_size: int = DEFAULT_PARSED_GRAPH_CACHE_SIZE,
+                 get_leis_max_hashes: int = DEFAULT_GET_LEIS_MAX_HASHES,
+                 get_leis_max_response_size: int = DEFAULT_GET_LEIS_MAX_RESPONSE_SIZE,
+                 add_leis_max_items: int = DEFAULT_ADD_LEIS_MAX_ITEMS,
+                 response_cache_size: int = DEFAULT_RESPONSE_CACHE_SIZE,
+                 validation_pool: GraphValidationPool = None,
+                 graph_store_writer_concurrency: int = DEFAULT_CONCURRENCY,
+                 graph_store_writer_queue_size: int = DEFAULT_QUEUE_SIZE,
+                 graph_store_writer_batch_size: int = DEFAULT_BATCH_SIZE,
+                 known_graphs: KnownGraphs = None,
+                 sync_record_mode: str = SYNC_RECORD_CONTENT,
+                 sync_compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+                 catchup_batch_size: int = DEFAULT_CATCHUP_BATCH_SIZE,
+                 blob_store: BlobStore = None,
+                 graph_memo: GraphMemo = None,
+                 metrics: Metrics = None):
         super().__init__(ledger, state)
 
         self._format_validator = FormatValidator()
@@ -38,69 +88,195 @@ class GraphchainReqHandler(LedgerRequestHandler):
         self._hash_calculator = InterwovenHashCalculator()
         self._graph_store = graph_store
         self._graph_store_synchronizer = graph_store_synchronizer
-
+        # Items of an ADD_LEIS request are cached one by one, so caches have
+        # to fit a whole request on top of the single ADD_LEI requests.
+        self._parsed_graphs = LruCache(parsed_graph_cache_size + add_leis_max_items)
+        self._prevalidation_failures = LruCache(parsed_graph_cache_size + add_leis_max_items)
+        self._ts_existence = LruCache(parsed_graph_cache_size + add_leis_max_items)
+        # Committed LEIs never change, so their GET_LEI responses are cached.
+        self._responses = SizedLruCache(response_cache_size, self._get_lei_result_size)
+        self._get_leis_max_hashes = get_leis_max_hashes
+        self._get_leis_max_response_size = get_leis_max_response_size
+        self._add_leis_max_items = add_leis_max_items
+        self._validation_pool = validation_pool
+        self._known_graphs = known_graphs
+        if sync_record_mode == SYNC_RECORD_LEDGER:
+            # Sync records are resolved on the synchronizer's thread, which
+            # must not read the ledger; see `convert_ledger_sync_records`.
+            logger.warning("Sync records referencing the ledger are not supported, graph content is stored instead.")
+            sync_record_mode = SYNC_RECORD_CONTENT
+        self._sync_record_mode = sync_record_mode
+        self._sync_compression_threshold = sync_compression_threshold
+        self._blob_store = blob_store
+        self._graph_memo = graph_memo
+        self._metrics = metrics if metrics is not None else Metrics()
+
+        # ADD_LEIS requests append many txns to the ledger, while commit and
+        # revert of a 3PC batch count requests; see `commit`.
+        self._applied_txn_counts = []
+        self._uncommitted_batch_txn_counts = deque()
+
+        self._graph_store_writer = GraphStoreWriter(self.update_graph_store_with_sync_batch,
+                                                    graph_store_writer_concurrency,
+                                                    graph_store_writer_queue_size,
+                                                    graph_store_writer_batch_size)
+        self._graph_store_writer.start()
+        self._catchup_replayer = CatchupReplayer(self._graph_store_synchronizer,
+                                                 self._graph_store_writer,
+                                                 self._make_sync_record,
+                                                 catchup_batch_size)
         self._graph_store_synchronizer.start(self._graph_store_sync_job)
 
         self.query_handlers = {
-            GET_LEI: self.handle_get_lei
+            GET_LEI: self.handle_get_lei,
+            GET_LEIS: self.handle_get_leis,
+            GET_METRICS: self.handle_get_metrics
         }
 
     def get_query_response(self, req: Request):
-        return self.query_handlers[req.operation[TXN_TYPE]](req)
+        op_type = req.operation[TXN_TYPE]
+        with self._metrics.timer("query.{}".format(OP_NAMES.get(op_type, op_type))):
+            return self.query_handlers[op_type](req)
+
+    def handle_get_metrics(self, req: Request):
+        log_request(logger, "Handling '%s' read operation...", req.operation.get(TXN_TYPE))
+        return {
+            TXN_TYPE: GET_METRICS,
+            f.IDENTIFIER.nm: req.identifier,
+            f.REQ_ID.nm: req.reqId,
+            METRICS_FIELD: self.metrics(),
+        }
+
+    def metrics(self) -> dict:
+        # Stage timings of this handler together with metrics of its components
+        result = self._metrics.snapshot()
+        components = {
+            "response_cache": self._responses,
+            "graph_store_writer": self._graph_store_writer,
+            "graph_store_synchronizer": self._graph_store_synchronizer,
+            "known_graphs": self._known_graphs,
+            "graph_memo": self._graph_memo,
+        }
+        result["components"] = {name: component.metrics()
+                                for name, component in components.items() if component is not None}
+        return result
 
     def handle_get_lei(self, req: Request, show_debug: bool = False):
         op = req.operation
         op_type = op.get(TXN_TYPE)
-        logger.info("Handling '{}' read operation...".format(op_type))
-        logger.debug("Request's details: {}".format(req))
+        log_request(logger, "Handling '%s' read operation...", op_type)
+        logger.debug("Request's details: %s", Payload(req))
         graph_hash = op.get(GRAPH_IHASH_FIELD)
 
-        found_data = self.ledger.get(**{GRAPH_IHASH_FIELD: graph_hash})
-        logger.debug("found_data: {}".format(found_data))
-
         if show_debug:
-            self._print_debug_data(found_data)
+            self._print_debug_data(self._get_txn_by_ihash(graph_hash))
 
-        if found_data is not None:
-            txn_fragment = found_data.get(TXN_FIELD)
-            data_fragment = dict(txn_fragment.get(DATA_FIELD))
-            lei_data = dict(data_fragment.get(LEI_FIELD))
-            logger.debug("request:        {}".format(req))
-            logger.debug("data_fragment:  {}".format(data_fragment))
+        lei_result = self._get_lei_result(graph_hash)
+        if lei_result is not None:
 
-            return {
-                TXN_TYPE: txn_fragment.get(TXN_TYPE),
+            result = {
                 f.IDENTIFIER.nm: req.identifier,
                 f.REQ_ID.nm: req.reqId,
-
-                f.SEQ_NO.nm: found_data.get(TXN_METADATA_FIELD).get(f.SEQ_NO.nm),
-                TXN_TIME: found_data.get(TXN_METADATA_FIELD).get(TXN_TIME),
-
-                GRAPH_IHASH_FIELD: found_data.get(GRAPH_IHASH_FIELD),
-                LEI_FIELD: {
-                    GRAPH_CONTENT_FIELD: lei_data.get(GRAPH_CONTENT_FIELD),
-                    GRAPH_FORMAT_FIELD: lei_data.get(GRAPH_FORMAT_FIELD)
-                },
-
-                # TARGET_NYM: data_fragment.get(TARGET_NYM)  # Should this be returned?
             }
+            result.update(lei_result)
+            return result
         else:
-            logger.info("Data for '{}' not found in the ledger.".format(graph_hash))
+            log_request(logger, "Data for '%s' not found in the ledger.", graph_hash)
             return {
                 f.IDENTIFIER.nm: req.identifier,
                 f.REQ_ID.nm: req.reqId,
                 LEI_FIELD: None
             }
 
+    def handle_get_leis(self, req: Request):
+        op = req.operation
+        log_request(logger, "Handling '%s' read operation...", op.get(TXN_TYPE))
+        graph_hashes = op.get(GRAPH_IHASHES_FIELD)
+
+        # Plenum calls query handlers even when static validation failed (it
+        # only sends a NACK then), so invalid requests are answered with no
+        # LEIs instead of being resolved.
+        reason = self._validate_get_leis_hashes(graph_hashes)
+        if reason is not None:
+            log_request(logger, "Not resolving invalid '%s' request: %s", GET_LEIS, reason)
+            return self._make_get_leis_result(req, [], [])
+
+        # Hashes missing in the response cache are looked up in the index
+        # first, so the ledger is read once, in seqNo order, and txns of
+        # repeated hashes are read only once.
+        lei_results = {}
+        for graph_hash in graph_hashes:
+            lei_result = self._responses.get(graph_hash)
+            if lei_result is not None:
+                lei_results[graph_hash] = lei_result
+
+        seq_nos = {graph_hash: self._get_seq_no_by_ihash(graph_hash)
+                   for graph_hash in graph_hashes if graph_hash not in lei_results}
+        for seq_no in sorted({seq_no for seq_no in seq_nos.values() if seq_no is not None}):
+            with self._metrics.timer("ledger.read"):
+                txn = self.ledger.getBySeqNo(seq_no)
+            if txn is not None:
+                lei_result = self._make_lei_result(txn)
+                lei_results[lei_result[GRAPH_IHASH_FIELD]] = lei_result
+                self._responses.put(lei_result[GRAPH_IHASH_FIELD], lei_result)
+
+        leis = []
+        truncated = []
+        response_size = 0
+        for graph_hash in graph_hashes:
+            lei_result = lei_results.get(graph_hash)
+            if lei_result is None:
+                leis.append({GRAPH_IHASH_FIELD: graph_hash, LEI_FIELD: None})
+                continue
+
+            size = len(lei_result[LEI_FIELD][GRAPH_CONTENT_FIELD] or "")
+            # At least one LEI is returned; the rest is left out from the
+            # first one which exceeds the cap, so the client can re-request it.
+            if truncated or (response_size > 0 and response_size + size > self._get_leis_max_response_size):
+                truncated.append(graph_hash)
+                continue
+            response_size += size
+            leis.append(lei_result)
+
+        if truncated:
+            log_request(logger, "Response of '%s' request truncated: %s LEIs left out.", GET_LEIS, len(truncated))
+
+        return self._make_get_leis_result(req, leis, truncated)
+
+    def _validate_get_leis_hashes(self, graph_hashes):
+        if not isinstance(graph_hashes, list) or not graph_hashes or \
+                not all(isinstance(graph_hash, str) for graph_hash in graph_hashes):
+            return "{} attribute is missing or not a list of hashes: '{}'".format(GRAPH_IHASHES_FIELD, graph_hashes)
+
+        if len(graph_hashes) > self._get_leis_max_hashes:
+            return "Too many hashes requested: {} (max {})".format(len(graph_hashes), self._get_leis_max_hashes)
+
+        return None
+
+    @staticmethod
+    def _make_get_leis_result(req: Request, leis, truncated):
+        return {
+            TXN_TYPE: GET_LEIS,
+            f.IDENTIFIER.nm: req.identifier,
+            f.REQ_ID.nm: req.reqId,
+            LEIS_FIELD: leis,
+            TRUNCATED_FIELD: truncated,
+        }
+
     def doStaticValidation(self, request: Request):
+        op_type = request.operation.get(TXN_TYPE)
+        with self._metrics.timer("static_validation.{}".format(OP_NAMES.get(op_type, op_type))):
+            self._do_static_validation(request)
+
+    def _do_static_validation(self, request: Request):
         identifier, req_id, op = request.identifier, request.reqId, \
                                  request.operation
         op_type = op.get(TXN_TYPE)
-        logger.debug("Static validation for the '{}' operation type: \n"
-                     "   identifier = {},\n"
-                     "   reqId = {},\n"
-                     "   operation = {}"
-                     .format(op_type, identifier, req_id, op))
+        logger.debug("Static validation for the '%s' operation type: \n"
+                     "   identifier = %s,\n"
+                     "   reqId = %s,\n"
+                     "   operation = %s",
+                     op_type, identifier, req_id, Payload(op))
 
         if op_type == ADD_LEI:
             logger.debug("Static validation of ADD_LEI op type...")
@@ -110,141 +286,583 @@ class GraphchainReqHandler(LedgerRequestHandler):
                 msg = "{} attribute is missing or not in proper format: '{}'".format(LEI_FIELD, lei)
                 raise InvalidClientRequest(identifier, req_id, msg)
 
-            self._validate_add_lei_request(identifier, req_id, lei)
+            parsed_graph = self._validate_add_lei_request(identifier, req_id, lei, request.digest)
+            self._parsed_graphs.put(request.digest, parsed_graph)
+
+        elif op_type == ADD_LEIS:
+            logger.debug("Static validation of ADD_LEIS op type...")
+            leis = op.get(LEIS_FIELD)
+
+            if not isinstance(leis, list) or not leis or not all(isinstance(lei, dict) for lei in leis):
+                msg = "{} attribute is missing or not a list of LEIs: '{}'".format(LEIS_FIELD, leis)
+                raise InvalidClientRequest(identifier, req_id, msg)
+
+            if len(leis) > self._add_leis_max_items:
+                msg = "Too many LEIs in one request: {} (max {})".format(len(leis), self._add_leis_max_items)
+                raise InvalidClientRequest(identifier, req_id, msg)
+
+            # Graphs are parsed (on the validation pool if there is one) and
+            # checked against the TS in bulk; items are then validated as
+            # single ADD_LEI requests would be.
+            self._prevalidate_items(self._get_lei_items(request), parse_inline=True)
+
+            graph_hashes = set()
+            for i, lei in enumerate(leis):
+                key = self._make_lei_item_key(request.digest, i)
+                parsed_graph = self._validate_add_lei_request(identifier, req_id, lei, key, item_index=i)
+                if parsed_graph.ihash in graph_hashes:
+                    msg = "LEI #{}: graph with hash '{}' occurs more than once in the request" \
+                        .format(i, parsed_graph.ihash)
+                    raise InvalidClientRequest(identifier, req_id, msg)
+                graph_hashes.add(parsed_graph.ihash)
+                self._parsed_graphs.put(key, parsed_graph)
 
         elif op_type == GET_LEI:
             logger.debug("Static validation of GET_LEI op type: nothing for now")
 
-        logger.info("Static validation finished without errors.")
+        elif op_type == GET_LEIS:
+            logger.debug("Static validation of GET_LEIS op type...")
+            reason = self._validate_get_leis_hashes(op.get(GRAPH_IHASHES_FIELD))
+            if reason is not None:
+                raise InvalidClientRequest(identifier, req_id, reason)
+
+        log_request(logger, "Static validation finished without errors.")
+
+    def prevalidate_requests(self, requests):
+        # Parses and hashes graphs of a batch of incoming ADD_LEI and ADD_LEIS
+        # requests on the validation pool; doStaticValidation picks up the results.
+        if self._validation_pool is None:
+            return
+
+        items = {}
+        for request in requests:
+            if isinstance(request, Request):
+                items.update(self._get_lei_items(request))
+
+        self._prevalidate_items(items)
+
+    def _prevalidate_items(self, items, parse_inline=False):
+        """
+        :param items: cache key => (base64 graph content, graph format, content encoding)
+        :param parse_inline: parse graphs on this thread if there is no pool
+        """
+        items = {key: item for key, item in items.items()
+                 if key not in self._parsed_graphs and key not in self._prevalidation_failures}
+        if not items:
+            return
+
+        ihashes = set()
+        if self._validation_pool is not None:
+            # Graphs with memoized results are not sent to the pool.
+            pending = {}
+            raw_contents = {}
+            for key, (graph_base64, graph_format, encoding) in items.items():
+                graph_raw_content = self._try_decode(graph_base64, encoding)
+                memoized = self._get_memoized_graph(graph_raw_content, graph_format)
+                if memoized is None:
+                    pending[key] = items[key]
+                    raw_contents[key] = graph_raw_content
+                elif memoized[0] is None:
+                    self._prevalidation_failures.put(key, memoized[1])
+                else:
+                    self._parsed_graphs.put(key, memoized[0])
+                    ihashes.add(memoized[0].ihash)
+
+            if pending:
+                logger.debug("Prevalidating %s graphs on the validation pool...", len(pending))
+                with self._metrics.timer("validation_pool.validate"):
+                    results = self._validation_pool.validate(pending)
+                for key, (ihash, reason) in results.items():
+                    graph_raw_content = raw_contents[key]
+                    if ihash is None or graph_raw_content is None:
+                        # Failures of the pool (e.g. timeouts) are not memoized.
+                        self._prevalidation_failures.put(key, reason)
+                    else:
+                        graph_format = pending[key][1]
+                        self._memoize_graph(graph_raw_content, graph_format, ihash, None)
+                        self._parsed_graphs.put(key, ParsedGraph(graph_raw_content, graph_format, None, ihash))
+                        ihashes.add(ihash)
+        elif parse_inline:
+            for key, (graph_base64, graph_format, encoding) in items.items():
+                parsed_graph, reason = self._decode_and_parse_graph(graph_base64, graph_format, encoding)
+                if parsed_graph is None:
+                    self._prevalidation_failures.put(key, reason)
+                else:
+                    self._parsed_graphs.put(key, parsed_graph)
+                    ihashes.add(parsed_graph.ihash)
+
+        self._prefetch_ts_existence(ihashes)
+
+    def _get_lei_items(self, request):
+        # Graphs of a request which can be prevalidated: cache key => (content, format, encoding)
+        op_type = request.operation.get(TXN_TYPE)
+        if op_type == ADD_LEI:
+            leis = [(request.digest, request.operation.get(LEI_FIELD))]
+        elif op_type == ADD_LEIS and isinstance(request.operation.get(LEIS_FIELD), list):
+            leis = [(self._make_lei_item_key(request.digest, i), lei)
+                    for i, lei in enumerate(request.operation.get(LEIS_FIELD))]
+        else:
+            return {}
+
+        return {key: (lei.get(GRAPH_CONTENT_FIELD), lei.get(GRAPH_FORMAT_FIELD), lei.get(GRAPH_ENCODING_FIELD))
+                for key, lei in leis if isinstance(lei, dict) and lei.get(GRAPH_CONTENT_FIELD)}
+
+    def _prefetch_ts_existence(self, ihashes):
+        # One query answers the duplicate checks of the whole batch; the
+        # answers are consumed by _check_whether_hash_is_already_in_ts.
+        # Graphs found in the ledger are never looked up in the TS.
+        ihashes = {ihash for ihash in ihashes if not self._check_whether_hash_is_in_ihash_index(ihash)}
+        if self._known_graphs is not None:
+            ihashes = {ihash for ihash in ihashes if self._known_graphs.might_be_stored(ihash)}
+        if not ihashes:
+            return
+
+        try:
+            with self._metrics.timer("ts.which_graphs_exist"):
+                existing = self._graph_store.which_graphs_exist(ihashes)
+        except Exception as ex:
+            logger.warn("Exception thrown while checking whether hashes are already in TS. Details: {}".format(ex))
+            return
+
+        for ihash in ihashes:
+            self._ts_existence.put(ihash, ihash in existing)
 
     def validate(self, request: Request):
         op = request.operation
         op_type = op.get(TXN_TYPE)
         # lei = op.get(LEI_FIELD)
-        logger.debug("Validation request '{}': operation = {}".format(op_type, op))
+        logger.debug("Validation request '%s': operation = %s", op_type, Payload(op))
 
         if op_type == ADD_LEI:
-            logger.debug("There is not any dynamic validation for '{}' op.".format(op_type))
+            logger.debug("There is not any dynamic validation for '%s' op.", op_type)
             # We don't need to do anything here for now, but in the future
             # we may want to validate whether the client from whom this request
             # came (LOU) is permissioned to handle this specific LEI.
 
     def apply(self, req: Request, cons_time: int):
+        op_type = req.operation.get(TXN_TYPE)
+        with self._metrics.timer("apply.{}".format(OP_NAMES.get(op_type, op_type))):
+            return self._apply(req, cons_time)
+
+    def _apply(self, req: Request, cons_time: int):
         op = req.operation
         op_type = op.get(TXN_TYPE)
-        logger.info("Applying op '{}' type...".format(op_type))
+        log_request(logger, "Applying op '%s' type...", op_type)
 
         if op_type == ADD_LEI:
             lei = op.get(LEI_FIELD)
-            graph_hash = self._calculate_hash(lei)
-            logger.debug("Calculated hash: {}".format(graph_hash))
+            parsed_graph = self._get_parsed_graph(req, lei)
+            graph_hash = parsed_graph.ihash
+            logger.debug("Calculated hash: %s", graph_hash)
+
+            graph_raw_content = parsed_graph.raw_content
+            graph_format = parsed_graph.graph_format
 
             txn = self._req_to_txn(req)
             txn = append_txn_metadata(txn, txn_id=self._gen_txn_path(txn))
 
-            self.ledger.append_txns_metadata([txn], cons_time)
-            (start, end), _ = self.ledger.appendTxns([self._transform_txn_for_ledger(txn, graph_hash)])
-            self.updateState([txn])
-
-            graph_raw_content = from_base64(lei.get(GRAPH_CONTENT_FIELD))
-            graph_format = lei.get(GRAPH_FORMAT_FIELD)
+            self._observe_graph(parsed_graph)
+            with self._metrics.timer("ledger.append"):
+                self.ledger.append_txns_metadata([txn], cons_time)
+                (start, end), _ = self.ledger.appendTxns([self._transform_txn_for_ledger(txn, graph_hash)])
+            with self._metrics.timer("state.update"):
+                self.updateState([txn])
+            self._put_blob(graph_hash, graph_raw_content)
 
             logger.debug("Attempting to add a new pair to synchronizer...")
 
-            self._graph_store_synchronizer.add(
-                str_to_bytes(graph_hash),
-                dict_to_bytes({SYNC_PAIR_GRAPH_CONTENT: bytes_to_str(graph_raw_content),
-                               SYNC_PAIR_GRAPH_FORMAT: graph_format}))
+            with self._metrics.timer("synchronizer.add"):
+                self._graph_store_synchronizer.add(
+                    str_to_bytes(graph_hash),
+                    self._make_sync_record(graph_raw_content, graph_format, start))
 
-            self.update_graph_store_with_sync(graph_hash, graph_raw_content, graph_format)
+            with self._metrics.timer("graph_store_writer.enqueue"):
+                self._graph_store_writer.enqueue(graph_hash, graph_raw_content, graph_format,
+                                                 self._get_ntriples_if_parsed(parsed_graph))
+            self._applied_txn_counts.append(1)
 
             return start, txn
 
+        elif op_type == ADD_LEIS:
+            # Every LEI is stored as a separate txn with its own ihash and LEI,
+            # so the index, GET_LEI, catch-up and the TS see no difference.
+            req_txn = self._req_to_txn(req)
+            txns = []
+            parsed_graphs = []
+            for i, lei in enumerate(op.get(LEIS_FIELD)):
+                parsed_graph = self._get_parsed_graph(req, lei, self._make_lei_item_key(req.digest, i))
+                txn = append_txn_metadata(self._make_lei_item_txn(req_txn, lei, i), txn_id=self._gen_txn_path(req_txn))
+                txns.append(self._transform_txn_for_ledger(txn, parsed_graph.ihash))
+                parsed_graphs.append(parsed_graph)
+            logger.debug("Calculated hashes: %s", Payload([parsed_graph.ihash for parsed_graph in parsed_graphs]))
+
+            for parsed_graph in parsed_graphs:
+                self._observe_graph(parsed_graph)
+            with self._metrics.timer("ledger.append"):
+                self.ledger.append_txns_metadata(txns, cons_time)
+                (start, end), _ = self.ledger.appendTxns(txns)
+            with self._metrics.timer("state.update"):
+                self.updateState(txns)
+            for parsed_graph in parsed_graphs:
+                self._put_blob(parsed_graph.ihash, parsed_graph.raw_content)
+
+            with self._metrics.timer("synchronizer.add"):
+                self._graph_store_synchronizer.add_many(
+                    [(str_to_bytes(parsed_graph.ihash),
+                      self._make_sync_record(parsed_graph.raw_content, parsed_graph.graph_format, seq_no))
+                     for seq_no, parsed_graph in enumerate(parsed_graphs, start)])
+
+            with self._metrics.timer("graph_store_writer.enqueue"):
+                self._graph_store_writer.enqueue_many(
+                    [(parsed_graph.ihash, parsed_graph.raw_content, parsed_graph.graph_format,
+                      self._get_ntriples_if_parsed(parsed_graph))
+                     for parsed_graph in parsed_graphs])
+            self._applied_txn_counts.append(len(txns))
+
+            return start, txns[0]
+
+        else:
+            logger.info("Not supported op type: '%s'.", op_type)
+
+    def onBatchCreated(self, *args, **kwargs):
+        super().onBatchCreated(*args, **kwargs)
+        self._uncommitted_batch_txn_counts.append(self._applied_txn_counts)
+        self._applied_txn_counts = []
+
+    def onBatchRejected(self, *args, **kwargs):
+        # The node discards one ledger txn per request of the rejected batch;
+        # the other txns appended by ADD_LEIS requests are discarded here.
+        super().onBatchRejected(*args, **kwargs)
+        if self._applied_txn_counts:
+            txn_counts, self._applied_txn_counts = self._applied_txn_counts, []
+        elif self._uncommitted_batch_txn_counts:
+            txn_counts = self._uncommitted_batch_txn_counts.pop()
         else:
-            logger.info("Not supported op type: '{}'.".format(op_type))
+            return
+
+        extra_txns = sum(txn_counts) - len(txn_counts)
+        if extra_txns > 0:
+            logger.debug("Discarding {} more txns of rejected ADD_LEIS requests.".format(extra_txns))
+            self.ledger.discardTxns(extra_txns)
+
+    def commit(self, txnCount, *args, **kwargs):
+        # txnCount is the number of requests of the batch being committed;
+        # it is translated to the number of txns they appended to the ledger.
+        if self._uncommitted_batch_txn_counts:
+            txn_counts = self._uncommitted_batch_txn_counts.popleft()
+            if len(txn_counts) == txnCount:
+                txnCount = sum(txn_counts)
+            else:
+                logger.warning("Batch of {} requests committed, but {} were applied.".format(txnCount,
+                                                                                            len(txn_counts)))
+        committed_txns = super().commit(txnCount, *args, **kwargs)
+        self._cache_lei_results(committed_txns)
+        return committed_txns
+
+    def warm_response_cache(self, txn_count):
+        # Responses for the most recently committed LEIs are cached at startup.
+        frm = max(1, self.ledger.size - txn_count + 1)
+        if txn_count <= 0 or frm > self.ledger.size:
+            return
+
+        self._cache_lei_results(txn for _, txn in self.ledger.getAllTxn(frm=frm))
+        logger.info("Response cache warmed from txns starting at seqNo {}: {}".format(frm, self._responses.metrics()))
+
+    @property
+    def response_cache(self) -> SizedLruCache:
+        return self._responses
+
+    def _get_lei_result(self, graph_hash):
+        lei_result = self._responses.get(graph_hash)
+        if lei_result is not None:
+            return lei_result
+
+        found_data = self._get_txn_by_ihash(graph_hash)
+        logger.debug("found_data: %s", Payload(found_data))
+        if found_data is None:
+            return None
+
+        lei_result = self._make_lei_result(found_data)
+        self._responses.put(graph_hash, lei_result)
+        return lei_result
+
+    def _cache_lei_results(self, txns):
+        for txn in txns or []:
+            graph_hash = txn.get(GRAPH_IHASH_FIELD)
+            if graph_hash is not None:
+                self._responses.put(graph_hash, self._make_lei_result(txn))
 
     def updateState(self, txns, isCommitted=False):
-        logger.debug("Updating state for a new txns:")
+        logger.debug("Updating state for %s new txns.", len(txns))
         for txn in txns:
-            logger.debug("  {}".format(txn))
             self._updateStateWithSingleTxn(txn, isCommitted=isCommitted)
 
-    def update_graph_store_with_sync(self, graph_hash, graph_raw_content, graph_format):
-        logger.debug("Updating graph store (with sync) for graph with hash '{}'.".format(graph_hash))
+    @property
+    def graph_store_writer(self) -> GraphStoreWriter:
+        return self._graph_store_writer
+
+    @property
+    def known_graphs(self) -> KnownGraphs:
+        return self._known_graphs
+
+    @property
+    def catchup_replayer(self) -> CatchupReplayer:
+        return self._catchup_replayer
+
+    @property
+    def blob_store(self) -> BlobStore:
+        return self._blob_store
+
+    @property
+    def graph_memo(self) -> GraphMemo:
+        return self._graph_memo
+
+    @property
+    def metrics_registry(self) -> Metrics:
+        return self._metrics
+
+    def update_graph_store_with_sync(self, graph_hash, graph_raw_content, graph_format, ntriples=None):
+        return graph_hash in self.update_graph_store_with_sync_batch(
+            [(graph_hash, graph_raw_content, graph_format, ntriples)])
+
+    def update_graph_store_with_sync_batch(self, batch):
+        # Called on the graph store writer's threads with a list of
+        # (graph_hash, graph_raw_content, graph_format, ntriples); returns hashes
+        # of graphs which have been stored in the TS and removed from the
+        # synchronizer. Failed graphs stay in the synchronizer and are retried.
+        logger.debug("Updating graph store (with sync) for %s graphs.", len(batch))
+
+        for _, _, _, ntriples in batch:
+            if ntriples is not None:
+                self._metrics.observe("graph.triples", ntriples.count("\n"))
+
+        added = set()
+        with self._metrics.timer("ts.add_graphs"):
+            results = self._graph_store.add_graphs(batch)
+        for graph_hash, ex in results.items():
+            if ex is None:
+                added.add(graph_hash)
+            else:
+                # Errors of SPARQL updates may quote the whole update.
+                logger.warn("Exception thrown while updating graph store. graph_hash = '%s'\nDetails: %s",
+                            graph_hash, Payload(ex))
 
-        try:
-            self._update_graph_store(graph_hash, graph_raw_content, graph_format)
+        if not added:
+            return set()
 
-            if self._check_whether_hash_is_already_in_ts(graph_hash):
-                logger.debug("Graph with hash '{}' successfully added to TS. Removing from synchronizer..."
-                             .format(graph_hash))
-                self._graph_store_synchronizer.remove(str_to_bytes(graph_hash))
-            else:
-                logger.warn("Graph with hash '{}' was not added to the TS for some reasons.")
-        except RecursionError as ex:
-            logger.warn("RecursionError was thrown while updating graph store. Details: {}".format(ex))
-        except SPARQLWrapperException as ex:
-            logger.warn("Exception thrown while updating graph store. "
-                        "graph_hash = '{}', graph_raw_content = '{}', graph_format = '{}'\nDetails: {}"
-                        .format(graph_hash, graph_raw_content, graph_format, ex))
+        try:
+            # The ledger is not used as a fallback here: it is not safe to read
+            # it from the writer's threads, and a failed check is retried later.
+            with self._metrics.timer("ts.which_graphs_exist"):
+                written = self._graph_store.which_graphs_exist(added)
         except Exception as ex:
-            logger.warn("Unspecified exception was thrown while updating graph store with sync. "
-                        "graph_hash = '{}', graph_raw_content = '{}', graph_format = '{}'\nDetails: {}"
-                        .format(graph_hash, graph_raw_content, graph_format, ex))
+            logger.warn("Exception thrown while checking whether {} graphs were added to the TS. Details: {}"
+                        .format(len(added), ex))
+            return set()
+
+        for graph_hash in added - written:
+            logger.warn("Graph with hash '{}' was not added to the TS for some reasons.".format(graph_hash))
 
-    def _update_graph_store(self, graph_hash, graph_raw_content, graph_format):
-        self._graph_store.add_graph(graph_raw_content, graph_format, graph_hash)
+        self._metrics.increment("ts.graphs_written", len(written))
+        for graph_hash in written:
+            logger.debug("Graph with hash '%s' successfully added to TS. Removing from synchronizer...", graph_hash)
+            self._graph_store_synchronizer.remove(str_to_bytes(graph_hash))
+            if self._known_graphs is not None:
+                self._known_graphs.add(graph_hash)
+
+        return written
 
     def _updateStateWithSingleTxn(self, txn, isCommitted=False):
-        # MAYBE: Something to do here?
-        pass
+        # The state is used as an index: ihash => seqNo of the transaction
+        # which contains the graph, so lookups do not need to scan the ledger.
+        graph_hash = txn.get(GRAPH_IHASH_FIELD)
+        if graph_hash is None:
+            return
+
+        seq_no = get_seq_no(txn)
+        self.state.set(self._make_ihash_index_key(graph_hash), str_to_bytes(str(seq_no)))
+
+    def warm_known_graphs(self):
+        if self._known_graphs is None:
+            return
+
+        frm = self._known_graphs.last_warmed_seq_no() + 1
+        if frm > self.ledger.size:
+            return
+
+        logger.info("Warming known graphs set with ledger txns from seqNo {}...".format(frm))
+        self._known_graphs.warm((seq_no, txn.get(GRAPH_IHASH_FIELD))
+                                for seq_no, txn in self.ledger.getAllTxn(frm=frm))
+
+    def rebuild_ihash_index_if_missing(self):
+        if not self.state.isEmpty or self.ledger.size == 0:
+            return
+
+        logger.info("Ihash index is empty while the ledger contains {} txns. Rebuilding it..."
+                    .format(self.ledger.size))
+
+        counter = 0
+        for _, txn in self.ledger.getAllTxn():
+            self._updateStateWithSingleTxn(txn, isCommitted=True)
+            counter += 1
+        self.state.commit(rootHash=self.state.headHash)
+
+        logger.info("Ihash index rebuilt with {} txns.".format(counter))
+
+    def _validate_add_lei_request(self, identifier, req_id, lei, digest=None, item_index=None):
+        # For items of ADD_LEIS requests, reasons are prefixed with the item's index.
+        prefix = "LEI #{}: ".format(item_index) if item_index is not None else ""
 
-    def _validate_add_lei_request(self, identifier, req_id, lei):
         graph_base64 = lei.get(GRAPH_CONTENT_FIELD)
         if graph_base64 is None or len(graph_base64) == 0:
             msg = "'{}' field within '{}' must be present and " \
                   "should not be empty.".format(GRAPH_CONTENT_FIELD, LEI_FIELD)
-            raise InvalidClientRequest(identifier, req_id, msg)
+            raise InvalidClientRequest(identifier, req_id, prefix + msg)
 
         graph_format = lei.get(GRAPH_FORMAT_FIELD)
         supported, reason = self._format_validator.validate_format(graph_format, False)
         if not supported:
-            raise InvalidClientRequest(identifier, req_id, reason)
+            raise InvalidClientRequest(identifier, req_id, prefix + reason)
 
-        graph = from_base64(graph_base64)
-        graph_valid, reason = self._graph_validator.validate_graph(graph, graph_format)
-        if not graph_valid:
+        encoding = lei.get(GRAPH_ENCODING_FIELD)
+        supported, reason = validate_encoding(encoding)
+        if not supported:
+            raise InvalidClientRequest(identifier, req_id, prefix + reason)
+
+        parsed_graph, reason = self._get_prevalidated_graph(digest)
+        if parsed_graph is None and reason is None:
+            parsed_graph, reason = self._decode_and_parse_graph(graph_base64, graph_format, encoding)
+        if parsed_graph is None:
             msg = "Content of graph is invalid. Details: {}".format(reason)
-            raise InvalidClientRequest(identifier, req_id, msg)
+            raise InvalidClientRequest(identifier, req_id, prefix + msg)
 
-        ihash = self._calculate_hash(lei)
-        if self._check_whether_hash_is_already_in_ts(ihash):
+        ihash = parsed_graph.ihash
+        if self._check_whether_graph_is_already_added(ihash):
             msg = "Graph with hash '{}' already added to the ledger".format(ihash)
-            raise InvalidClientRequest(identifier, req_id, msg)
+            raise InvalidClientRequest(identifier, req_id, prefix + msg)
 
-    def _calculate_hash(self, lei):
-        graph = lei.get(GRAPH_CONTENT_FIELD)
-        graph_format = lei.get(GRAPH_FORMAT_FIELD)
-        g = Graph()
-        g.parse(data=from_base64(graph), format=graph_format)
-        return self._hash_calculator.calculate_hash(g)
-
-    def _check_whether_hash_is_already_in_ledger(self, graph_hash):
-        found_data = self.ledger.get(**{GRAPH_IHASH_FIELD: graph_hash})
-        result = found_data is not None
-        logger.debug("Hash of graph ({}) already stored? {}".format(graph_hash, result))
-        return result
+        return parsed_graph
+
+    def _get_parsed_graph(self, req, lei, key=None):
+        key = key if key is not None else req.digest
+        parsed_graph = self._parsed_graphs.pop(key)
+        if parsed_graph is None:
+            logger.debug("Parsed graph for request '%s' not cached. Parsing it again...", key)
+            parsed_graph = self._parse_lei(lei)
+        return parsed_graph
+
+    def _parse_lei(self, lei):
+        return self._decode_and_parse_graph(lei.get(GRAPH_CONTENT_FIELD), lei.get(GRAPH_FORMAT_FIELD),
+                                            lei.get(GRAPH_ENCODING_FIELD))[0]
+
+    def _decode_and_parse_graph(self, graph_base64, graph_format, encoding):
+        try:
+            with self._metrics.timer("graph.decode"):
+                graph_raw_content = decode_content(from_base64(graph_base64), encoding)
+        except Exception as ex:
+            return None, "Cannot decode graph content. Details: {}".format(ex)
+        return self._parse_graph(graph_raw_content, graph_format)
+
+    def _parse_graph(self, graph_raw_content, graph_format):
+        memoized = self._get_memoized_graph(graph_raw_content, graph_format)
+        if memoized is not None:
+            return memoized
+
+        with self._metrics.timer("graph.parse_and_hash"):
+            parsed_graph, reason = parse_graph(graph_raw_content, graph_format, self._graph_validator,
+                                               self._hash_calculator)
+        self._memoize_graph(graph_raw_content, graph_format, parsed_graph.ihash if parsed_graph else None, reason)
+        return parsed_graph, reason
+
+    def _get_memoized_graph(self, graph_raw_content, graph_format):
+        # Returns (parsed graph, None) or (None, reason) for graphs which
+        # were validated before with the very same bytes, otherwise None.
+        if self._graph_memo is None or graph_raw_content is None:
+            return None
+
+        memoized = self._graph_memo.get(graph_raw_content, graph_format)
+        if memoized is None:
+            return None
+
+        ihash, reason = memoized
+        logger.debug("Graph validation result memoized: ihash = %s, reason = %s", ihash, reason)
+        if ihash is None:
+            return None, reason
+        return ParsedGraph(graph_raw_content, graph_format, None, ihash), None
+
+    def _memoize_graph(self, graph_raw_content, graph_format, ihash, reason):
+        if self._graph_memo is None:
+            return
+
+        try:
+            self._graph_memo.put(graph_raw_content, graph_format, ihash, reason)
+        except Exception as ex:
+            logger.warn("Exception thrown while memoizing graph validation result. Details: {}".format(ex))
+
+    @staticmethod
+    def _try_decode(graph_base64, encoding):
+        try:
+            return decode_content(from_base64(graph_base64), encoding)
+        except Exception:
+            return None
+
+    def _get_prevalidated_graph(self, digest):
+        if digest is None:
+            return None, None
+
+        reason = self._prevalidation_failures.pop(digest)
+        if reason is not None:
+            return None, reason
+        return self._parsed_graphs.get(digest), None
+
+    def _get_txn_by_ihash(self, graph_hash):
+        seq_no = self._get_seq_no_by_ihash(graph_hash)
+        if seq_no is None:
+            return None
+
+        with self._metrics.timer("ledger.read"):
+            return self.ledger.getBySeqNo(seq_no)
+
+    def _get_seq_no_by_ihash(self, graph_hash, is_committed=True):
+        seq_no = self.state.get(self._make_ihash_index_key(graph_hash), isCommitted=is_committed)
+        if not seq_no:
+            return None
+
+        return int(bytes_to_str(seq_no))
+
+    def _check_whether_hash_is_in_ihash_index(self, graph_hash):
+        # Uncommitted state is the committed one with applied batches on top.
+        with self._metrics.timer("state.read"):
+            return self._get_seq_no_by_ihash(graph_hash, is_committed=False) is not None
+
+    def _check_whether_graph_is_already_added(self, graph_hash):
+        # The ledger comes first: graphs reach the TS on the writer's threads
+        # some time after they are applied, or later still when the TS is
+        # down, so the TS can only confirm graphs the ledger does not have.
+        if self._check_whether_hash_is_in_ihash_index(graph_hash):
+            logger.debug("Hash of graph (%s) already in the ledger.", graph_hash)
+            return True
+        return self._check_whether_hash_is_already_in_ts(graph_hash)
 
     def _check_whether_hash_is_already_in_ts(self, graph_hash):
+        if self._known_graphs is not None and not self._known_graphs.might_be_stored(graph_hash):
+            logger.debug("Hash of graph (%s) not known locally, so it is not stored in TS.", graph_hash)
+            return False
+
+        prefetched = self._ts_existence.pop(graph_hash)
+        if prefetched is not None:
+            logger.debug("Hash of graph (%s) already stored in TS (prefetched)? %s", graph_hash, prefetched)
+            return prefetched
+
         try:
-            result = self._graph_store.check_if_graph_is_already_stored(graph_hash)
-            logger.debug("Hash of graph ({}) already stored in TS? {}".format(graph_hash, result))
+            with self._metrics.timer("ts.ask"):
+                result = self._graph_store.check_if_graph_is_already_stored(graph_hash)
+            logger.debug("Hash of graph (%s) already stored in TS? %s", graph_hash, result)
             return result
         except Exception as ex:
+            # The ledger has already been checked.
             logger.warn("Exception thrown while checking whether hash is already in TS. Details: {}".format(ex))
-            result = self._check_whether_hash_is_already_in_ledger(graph_hash)
-            logger.debug("Hash of graph ({}) already stored ledger? {}".format(graph_hash, result))
-            return result
+            return False
 
     def _gen_txn_path(self, txn):
         return None
@@ -252,53 +870,227 @@ class GraphchainReqHandler(LedgerRequestHandler):
     def _req_to_txn(self, req):
         return reqToTxn(req)
 
-    def _graph_store_sync_job(self):
-        logger.debug("Graph store sync job starts...")
+    def _graph_store_sync_job(self, pairs):
+        # Called by the synchronizer's scheduler with entries which are due.
+        self._metrics.set_gauge("sync.backlog", self._graph_store_synchronizer.metrics()["backlog"])
+        self._metrics.observe("sync.due", len(pairs))
+        with self._metrics.timer("sync.job"):
+            self._run_graph_store_sync_job(pairs)
+
+    def _run_graph_store_sync_job(self, pairs):
+        logger.debug("Graph store sync job starts with %s due items...", len(pairs))
 
         counter = 0
+        chunk = []
 
-        for pair in self._graph_store_synchronizer.list_all():
-            logger.debug("Handling sync pair '{}'...".format(pair))
+        for pair in pairs:
             graph_hash = bytes_to_str(pair[0])
-            graph_dict = bytes_to_dict(pair[1])
-            graph_raw_content = graph_dict[SYNC_PAIR_GRAPH_CONTENT]
-            graph_format = graph_dict[SYNC_PAIR_GRAPH_FORMAT]
+            logger.debug("Handling sync pair '%s'...", graph_hash)
+            if self._graph_store_writer.is_pending(graph_hash):
+                continue
 
-            self.update_graph_store_with_sync(graph_hash, graph_raw_content, graph_format)
+            chunk.append((graph_hash, pair[1]))
+            if len(chunk) >= GraphStore.DEFAULT_EXISTENCE_CHECK_CHUNK_SIZE:
+                counter += self._sync_graph_store_chunk(chunk)
+                chunk = []
 
-            counter += 1
+        if chunk:
+            counter += self._sync_graph_store_chunk(chunk)
 
-        logger.debug("Graph store sync job finished with {} handled items.".format(counter))
+        logger.debug("Graph store sync job finished with %s handled items.", counter)
+
+    def _sync_graph_store_chunk(self, chunk):
+        # Graphs which are already in the TS (e.g. the confirmation failed
+        # after a successful write) are only removed from the synchronizer.
+        try:
+            with self._metrics.timer("ts.which_graphs_exist"):
+                existing = self._graph_store.which_graphs_exist(graph_hash for graph_hash, _ in chunk)
+        except Exception as ex:
+            logger.warn("Exception thrown while checking whether graphs are already in TS. Details: {}".format(ex))
+            existing = set()
+
+        for graph_hash, value in chunk:
+            if graph_hash in existing:
+                logger.debug("Graph with hash '%s' already in TS. Removing from synchronizer...", graph_hash)
+                self._graph_store_synchronizer.remove(str_to_bytes(graph_hash))
+                continue
+
+            record = decode_sync_record(value)
+            if record.content is not None:
+                graph_raw_content = record.content.tobytes()
+            elif record.seq_no is not None:
+                # Left by an older version; converted on the node's thread at startup.
+                logger.debug("Graph '%s' references the ledger, skipping until it is converted.", graph_hash)
+                continue
+            else:
+                graph_raw_content = self._read_graph_from_blob_store(graph_hash)
+            if graph_raw_content is None:
+                continue
+            self._graph_store_writer.enqueue(graph_hash, graph_raw_content, record.graph_format, block=True)
+
+        return len(chunk)
+
+    def _make_sync_record(self, graph_raw_content, graph_format, seq_no):
+        if self._sync_record_mode == SYNC_RECORD_BLOB and self._blob_store is not None:
+            return encode_blob_record(graph_format)
+        return encode_content_record(graph_raw_content, graph_format, self._sync_compression_threshold)
+
+    def convert_ledger_sync_records(self):
+        # Records which reference the ledger instead of holding the content
+        # are resolved here, on the node's thread, as the ledger is not
+        # thread safe; they are written as content records.
+        converted = []
+        for key, value in list(self._graph_store_synchronizer.list_all()):
+            record = decode_sync_record(value)
+            if record.content is not None or record.seq_no is None:
+                continue
+
+            graph_raw_content = self._read_graph_from_ledger(bytes_to_str(key), record.seq_no)
+            if graph_raw_content is not None:
+                converted.append((key, encode_content_record(graph_raw_content, record.graph_format,
+                                                             self._sync_compression_threshold)))
+
+        if converted:
+            self._graph_store_synchronizer.add_many(converted)
+            logger.info("Converted {} sync records referencing the ledger to content records.".format(len(converted)))
+
+    def _read_graph_from_ledger(self, graph_hash, seq_no):
+        # Only committed txns are in the ledger at startup, so a missing txn
+        # or one holding another graph was reverted.
+        txn = self.ledger.getBySeqNo(seq_no) if seq_no <= self.ledger.size else None
+        if txn is None or txn.get(GRAPH_IHASH_FIELD) != graph_hash:
+            logger.warn("Txn {} does not hold graph '{}'. Removing from synchronizer...".format(seq_no, graph_hash))
+            self._graph_store_synchronizer.remove(str_to_bytes(graph_hash))
+            return None
+
+        return bytes(self._get_graph_raw_content(txn))
+
+    def _read_graph_from_blob_store(self, graph_hash):
+        # Blobs are put before their sync records are added, so a missing
+        # blob (e.g. the blob store was removed) is not going to appear.
+        blob = self._blob_store.get(graph_hash) if self._blob_store is not None else None
+        if blob is None:
+            logger.warn("Blob of graph '{}' not found. Removing from synchronizer...".format(graph_hash))
+            self._graph_store_synchronizer.remove(str_to_bytes(graph_hash))
+            return None
+        return blob.tobytes()
+
+    def _put_blob(self, graph_hash, graph_raw_content):
+        if self._blob_store is not None:
+            with self._metrics.timer("blob_store.put"):
+                self._blob_store.put(graph_hash, graph_raw_content)
+
+    @staticmethod
+    def _get_ntriples_if_parsed(parsed_graph):
+        # N-Triples are serialized here only when the graph was already built;
+        # otherwise the graph store writer threads convert the content, so
+        # apply does not parse graphs hashed by streaming or on the pool.
+        return parsed_graph.ntriples if parsed_graph.has_graph else None
+
+    def _observe_graph(self, parsed_graph):
+        self._metrics.observe("graph.size_bytes", len(parsed_graph.raw_content))
+        self._metrics.increment("graph.applied")
+
+    def _get_graph_raw_content(self, txn):
+        # Blobs are put with the content of every applied or caught-up txn,
+        # and a txn's ihash is unique in the ledger, so the blob of the ihash
+        # holds the content of the txn; without a blob the content is decoded.
+        lei = txn.get(TXN_FIELD).get(DATA_FIELD).get(LEI_FIELD)
+        if self._blob_store is not None:
+            blob = self._blob_store.get(txn.get(GRAPH_IHASH_FIELD))
+            if blob is not None:
+                return blob
+        return decode_lei_content(lei)
 
     def handle_post_txn_added_to_ledger_clbk(self, txn):
-        logger.debug("Handling callback: post_txn_added_to_ledger_clbk. Txn details: {}".format(txn))
+        logger.debug("Handling callback: post_txn_added_to_ledger_clbk. Txn details: %s", Payload(txn))
+        self._catchup_replayer.add(*self._read_caught_up_graph(get_seq_no(txn), txn))
+
+    def _read_caught_up_graph(self, seq_no, txn):
         data_element = txn.get(TXN_FIELD).get(DATA_FIELD)
         graph_format = data_element.get(LEI_FIELD).get(GRAPH_FORMAT_FIELD)
-        decoded_content = data_element.get(LEI_FIELD).get(GRAPH_CONTENT_FIELD)
-        graph_raw_content = from_base64(decoded_content)
+        graph_raw_content = decode_lei_content(data_element.get(LEI_FIELD))
         graph_hash = txn.get(GRAPH_IHASH_FIELD)
+        self._put_blob(graph_hash, graph_raw_content)
+
+        logger.debug("Adding graph to graph store. graph_raw_content='%s', graph_format='%s', graph_hash='%s'",
+                     Payload(graph_raw_content), graph_format, graph_hash)
+        return seq_no, graph_hash, graph_raw_content, graph_format
 
-        logger.debug("Adding graph to graph store. graph_raw_content='{}', graph_format='{}', graph_hash='{}'"
-                     .format(graph_raw_content, graph_format, graph_hash))
+    def replay_interrupted_catchup(self):
+        # Graphs of a catch-up which was interrupted before they were
+        # persisted in the synchronizer are read from the ledger again.
+        self._catchup_replayer.replay_interrupted(
+            lambda frm: (self._read_caught_up_graph(seq_no, txn) for seq_no, txn in self.ledger.getAllTxn(frm=frm)))
 
-        self._graph_store_synchronizer.add(
-            str_to_bytes(graph_hash),
-            dict_to_bytes({SYNC_PAIR_GRAPH_CONTENT: bytes_to_str(graph_raw_content),
-                           SYNC_PAIR_GRAPH_FORMAT: graph_format}))
+    def handle_catchup_started(self):
+        self._catchup_replayer.start(self.ledger.size)
 
-        self.update_graph_store_with_sync(graph_hash, graph_raw_content, graph_format)
+    def handle_catchup_completed(self):
+        self._catchup_replayer.complete()
 
     @staticmethod
     def _transform_txn_for_ledger(txn, graph_hash):
-        logger.debug("Adding graph hash to the transaction: {}".format(txn))
-        # MAYBE: Remove GRAPH_CONTENT?
+        logger.debug("Adding graph hash to the transaction: %s", Payload(txn))
+        # MAYBE: Remove GRAPH_CONTENT? Catch-up transfers ledger txns only,
+        # so the content cannot be replaced by a blob reference for now.
         txn[GRAPH_IHASH_FIELD] = graph_hash
         return txn
 
+    @staticmethod
+    def _make_lei_item_key(digest, index):
+        return "{}:{}".format(digest, index)
+
+    @staticmethod
+    def _make_lei_item_txn(req_txn, lei, index):
+        # Items stay ADD_LEIS txns holding one LEI and its index in the request.
+        # They carry the request's metadata, so the node replies to the request
+        # once (with the first item) and maps its digest to the last item's
+        # seqNo, but not its signature, which covers all items together.
+        txn = init_empty_txn(ADD_LEIS, protocol_version=get_protocol_version(req_txn))
+        append_payload_metadata(txn, frm=get_from(req_txn), req_id=get_req_id(req_txn), digest=get_digest(req_txn))
+        set_payload_data(txn, {LEI_FIELD: lei, LEI_INDEX_FIELD: index})
+        return txn
+
+    def _make_lei_result(self, found_data):
+        txn_fragment = found_data.get(TXN_FIELD)
+        data_fragment = dict(txn_fragment.get(DATA_FIELD))
+        lei_data = dict(data_fragment.get(LEI_FIELD))
+        logger.debug("data_fragment:  %s", Payload(data_fragment))
+
+        # Clients get the content as it was before the encoding.
+        graph_content = lei_data.get(GRAPH_CONTENT_FIELD)
+        if lei_data.get(GRAPH_ENCODING_FIELD) is not None:
+            graph_content = bytes_to_str(to_base64(self._get_graph_raw_content(found_data)))
+
+        return {
+            TXN_TYPE: txn_fragment.get(TXN_TYPE),
+
+            f.SEQ_NO.nm: found_data.get(TXN_METADATA_FIELD).get(f.SEQ_NO.nm),
+            TXN_TIME: found_data.get(TXN_METADATA_FIELD).get(TXN_TIME),
+
+            GRAPH_IHASH_FIELD: found_data.get(GRAPH_IHASH_FIELD),
+            LEI_FIELD: {
+                GRAPH_CONTENT_FIELD: graph_content,
+                GRAPH_FORMAT_FIELD: lei_data.get(GRAPH_FORMAT_FIELD)
+            },
+
+            # TARGET_NYM: data_fragment.get(TARGET_NYM)  # Should this be returned?
+        }
+
+    @staticmethod
+    def _get_lei_result_size(lei_result):
+        return len(lei_result[LEI_FIELD][GRAPH_CONTENT_FIELD] or "") + len(lei_result[GRAPH_IHASH_FIELD]) + \
+            RESPONSE_OVERHEAD
+
+    @staticmethod
+    def _make_ihash_index_key(graph_hash):
+        return str_to_bytes(graph_hash)
+
     @staticmethod
     def _print_debug_data(found_data):
         serializer = JsonSerializer()
 
         txn = ledger_txn_serializer.deserialize(found_data)
         txn = serializer.serialize(txn, toBytes=False)
-        logger.debug("txn: {}".format(txn))
+        logger.debug("txn: %s", Payload(txn))
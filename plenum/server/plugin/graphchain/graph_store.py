@@ -1,9 +1,13 @@
+import importlib
+import re
 from abc import ABC, abstractmethod
 from enum import IntEnum
 
+from rdflib import Graph
 from stp_core.common.log import getlogger
 
 from plenum.server.plugin.graphchain.constants import STARDOG, NEPTUNE
+from plenum.server.plugin.graphchain.http_session import create_session, SPARQL_RESULTS_JSON
 
 logger = getlogger()
 
@@ -13,10 +17,33 @@ HANDLED_TS_TYPES = [
 ]
 
 
+# Backend modules are imported only for the triple store type in use.
+_GRAPH_STORE_CLASSES = {
+    STARDOG: ("plenum.server.plugin.graphchain.stardog_graph_store", "StardogGraphStore"),
+    NEPTUNE: ("plenum.server.plugin.graphchain.neptune_graph_store", "NeptuneGraphStore"),
+}
+
+
 def check_whether_ts_type_is_supported(ts_type: str):
     return ts_type in HANDLED_TS_TYPES
 
 
+def load_graph_store_class(ts_type: str):
+    module_name, class_name = _GRAPH_STORE_CLASSES[ts_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+# Blank nodes in the subject (line start) and object (before the final dot
+# and an optional comment) positions of N-Triples lines, with the labels and
+# whitespace the N-Triples parser accepts. Literals are quoted, so they never
+# match.
+_NT_BLANK_NODE_LABEL = r"[\w:](?:[\w\-:.]*[\w\-:])?"
+_NT_SUBJECT_BLANK_NODE = re.compile(r"^([ \t]*)_:(" + _NT_BLANK_NODE_LABEL + ")", re.MULTILINE)
+_NT_OBJECT_BLANK_NODE = re.compile(r"(\s)_:(" + _NT_BLANK_NODE_LABEL + r')([ \t]*\.[ \t]*(?:#[^"\n]*)?\s*)$',
+                                   re.MULTILINE)
+NTRIPLES_FORMAT = 'nt'
+
+
 class GraphStoreType(IntEnum):
     STARDOG = 1
     NEPTUNE = 2
@@ -25,19 +52,39 @@ class GraphStoreType(IntEnum):
 class GraphStore(ABC):
     IHASH_PREFIX = "http://lei.info/{}"
 
-    INSERT_GRAPH_QUERY_TEMPLATE = """
+    INSERT_GRAPHS_QUERY_TEMPLATE = """
     INSERT DATA {{
+        {}
+    }}
+    """
+
+    GRAPH_BLOCK_TEMPLATE = """
         GRAPH <{}> {{
             {}
         }}
-    }}
     """
 
+    DEFAULT_MAX_UPDATE_SIZE = 1024 * 1024
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_TIMEOUT = 30
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF_FACTOR = 0.5
+
     ASK_IF_GRAPH_IS_ALREADY_STORED = """
     ASK {{GRAPH <{}> {{?s ?p ?o}}}}
     """
 
-    def __init__(self, ts_db_name, ts_url):
+    SELECT_ALREADY_STORED_GRAPHS = """
+    SELECT ?g WHERE {{
+        VALUES ?g {{ {} }}
+        FILTER EXISTS {{ GRAPH ?g {{?s ?p ?o}} }}
+    }}
+    """
+
+    DEFAULT_EXISTENCE_CHECK_CHUNK_SIZE = 500
+
+    def __init__(self, ts_db_name, ts_url, max_update_size=DEFAULT_MAX_UPDATE_SIZE, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR):
         msg = "Creating a new GraphStore with the triple store URL '{}' the database name '{}'." \
             .format(ts_db_name, ts_url)
         logger.info(msg)
@@ -45,19 +92,168 @@ class GraphStore(ABC):
         self._ts_db_name = ts_db_name
         self._ts_url = ts_url
         self._node_ts_url = ts_url + "/" + ts_db_name
+        self._max_update_size = max_update_size
+        self._timeout = timeout
+        self._session = create_session(pool_size, retries, backoff_factor)
 
     @abstractmethod
     def check_whether_db_exists(self):
         pass
 
     @abstractmethod
-    def add_graph(self, raw_graph, graph_format, graph_hash):
+    def _execute_update(self, query):
         pass
 
     @abstractmethod
-    def check_if_graph_is_already_stored(self, graph_name):
+    def _execute_query(self, query) -> dict:
         pass
 
+    def check_if_graph_is_already_stored(self, graph_hash: str) -> bool:
+        ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
+
+        logger.debug("Checking whether graph '%s' is already in the triple store...", ihash)
+
+        query = GraphStore.ASK_IF_GRAPH_IS_ALREADY_STORED.format(ihash)
+        return self._execute_query(query)['boolean']
+
+    def which_graphs_exist(self, graph_hashes, chunk_size=DEFAULT_EXISTENCE_CHECK_CHUNK_SIZE) -> set:
+        """
+        Checks many graphs with one SELECT query per `chunk_size` hashes.
+
+        :return: subset of `graph_hashes` which are already stored
+        """
+        graph_hashes = list(graph_hashes)
+        logger.debug("Checking whether %s graphs are already in the triple store...", len(graph_hashes))
+
+        existing = set()
+        for start in range(0, len(graph_hashes), chunk_size):
+            chunk = {GraphStore.IHASH_PREFIX.format(graph_hash): graph_hash
+                     for graph_hash in graph_hashes[start:start + chunk_size]}
+            values = " ".join("<{}>".format(ihash) for ihash in chunk)
+
+            result = self._execute_query(GraphStore.SELECT_ALREADY_STORED_GRAPHS.format(values))
+            for binding in result['results']['bindings']:
+                graph_hash = chunk.get(binding['g']['value'])
+                if graph_hash is not None:
+                    existing.add(graph_hash)
+
+        return existing
+
+    def add_graph(self, raw_graph, graph_format, graph_hash, ntriples=None):
+        ex = self.add_graphs([(graph_hash, raw_graph, graph_format, ntriples)])[graph_hash]
+        if ex is not None:
+            raise ex
+
+    def add_graphs(self, batch) -> dict:
+        """
+        Stores many graphs using as few SPARQL updates as possible: GRAPH blocks
+        are combined into INSERT DATA requests of at most `max_update_size`
+        characters. When a combined request fails, its graphs which are not
+        stored are retried one by one, so a single broken graph does not fail
+        the whole batch.
+
+        :param batch: list of (graph_hash, raw_graph, graph_format, ntriples);
+            ntriples may be None and are then taken from raw_graph, which is
+            serialized unless it already is N-Triples
+        :return: graph_hash => None if stored or exception which prevented it
+        """
+        results = {}
+        blocks = []
+        for i, (graph_hash, raw_graph, graph_format, ntriples) in enumerate(batch):
+            try:
+                if ntriples is None and graph_format == NTRIPLES_FORMAT:
+                    # Validated N-Triples are INSERT DATA content as they are.
+                    ntriples = bytes(raw_graph).decode("utf-8")
+                elif ntriples is None:
+                    ntriples = self._to_ntriples(raw_graph, graph_format)
+            except Exception as ex:
+                results[graph_hash] = ex
+                continue
+
+            ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
+            block = GraphStore.GRAPH_BLOCK_TEMPLATE.format(ihash, self._scope_blank_nodes(ntriples, i))
+            blocks.append((graph_hash, block))
+
+        for chunk in self._chunk_blocks(blocks):
+            try:
+                self._insert_blocks(chunk)
+                results.update((graph_hash, None) for graph_hash, _ in chunk)
+            except Exception as ex:
+                if len(chunk) == 1:
+                    results[chunk[0][0]] = ex
+                    continue
+
+                logger.warning("Batched insert of {} graphs failed, inserting them one by one. Details: {}"
+                               .format(len(chunk), ex))
+                # The update may have been applied even though it failed (e.g.
+                # on a read timeout) and inserting graphs with blank nodes
+                # again would duplicate them, so only missing graphs are sent.
+                try:
+                    stored = self.which_graphs_exist([graph_hash for graph_hash, _ in chunk])
+                except Exception as check_ex:
+                    logger.warning("Cannot check which graphs of the failed insert are stored. Details: {}"
+                                   .format(check_ex))
+                    results.update((graph_hash, ex) for graph_hash, _ in chunk)
+                    continue
+
+                for graph_hash, block in chunk:
+                    if graph_hash in stored:
+                        results[graph_hash] = None
+                        continue
+                    try:
+                        self._insert_blocks([(graph_hash, block)])
+                        results[graph_hash] = None
+                    except Exception as single_ex:
+                        results[graph_hash] = single_ex
+
+        return results
+
+    def _insert_blocks(self, blocks):
+        logger.debug("Inserting %s graphs into the triple store...", len(blocks))
+        query = GraphStore.INSERT_GRAPHS_QUERY_TEMPLATE.format("".join(block for _, block in blocks))
+        self._execute_update(query)
+
+    def _chunk_blocks(self, blocks):
+        chunk = []
+        chunk_size = 0
+        for graph_hash, block in blocks:
+            if chunk and chunk_size + len(block) > self._max_update_size:
+                yield chunk
+                chunk = []
+                chunk_size = 0
+            chunk.append((graph_hash, block))
+            chunk_size += len(block)
+
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _scope_blank_nodes(ntriples, index):
+        # Blank node labels are scoped to a whole SPARQL update, so labels of
+        # graphs sent in the same request must not collide.
+        prefix = "_:g{}x".format(index)
+        ntriples = _NT_SUBJECT_BLANK_NODE.sub(lambda m: m.group(1) + prefix + m.group(2), ntriples)
+        return _NT_OBJECT_BLANK_NODE.sub(lambda m: m.group(1) + prefix + m.group(2) + m.group(3), ntriples)
+
+    @staticmethod
+    def _to_ntriples(raw_graph, graph_format):
+        g = Graph()
+        g.parse(data=raw_graph, format=graph_format)
+        return g.serialize(format='nt').decode()
+
+    def _get(self, url, auth=None):
+        return self._session.get(url, auth=auth, timeout=self._timeout)
+
+    def _post_update(self, url, query, auth=None):
+        r = self._session.post(url, data={'update': query}, auth=auth, timeout=self._timeout)
+        r.raise_for_status()
+
+    def _post_query(self, url, query, auth=None):
+        r = self._session.post(url, data={'query': query}, auth=auth, timeout=self._timeout,
+                               headers={'Accept': SPARQL_RESULTS_JSON})
+        r.raise_for_status()
+        return r.json()
+
     def _get_endpoint_address(self):
         return self._ts_url
 
@@ -1,9 +1,12 @@
 import os
-from threading import Timer
+import threading
+import time
 
 import rocksdb
 from stp_core.common.log import getlogger
 
+from plenum.server.plugin.graphchain.logger import Payload
+
 logger = getlogger()
 
 
@@ -11,9 +14,40 @@ INTERVAL = 60
 PRIORITY = 1
 UTF_8 = "utf-8"
 
+INITIAL_BACKOFF = 5
+MAX_BACKOFF = 3600
+BATCH_SIZE = 500
+DRAIN_RATE = 100
+
+# Scheduling data is kept in the same db as the entries; graph hashes are
+# hex strings, so these prefixes never collide with entry keys.
+DUE_INDEX_PREFIX = b"\x00"
+SCHEDULE_PREFIX = b"\x01"
+CATCHUP_SEQ_NO_KEY = b"\x02catchup_seq_no"
+
 
 class GraphStoreSynchronizer:
-    def __init__(self, data_dir: str, name: str):
+    """
+    Persistent set of graphs which still have to be written to the triple
+    store, together with a retry schedule.
+
+    Every entry has an attempt counter and a next-attempt timestamp, and is
+    indexed by that timestamp, so a run only reads entries which are due.
+    An entry handed to the scheduled job is rescheduled with exponential
+    backoff right away; it is removed once its graph is stored in the TS.
+    Newly added entries are written to the TS by the caller, so their first
+    retry is scheduled after `initial_backoff` seconds.
+
+    Runs happen on a single thread, which sleeps until the earliest entry
+    is due or a new entry is added, and dispatches at most `drain_rate`
+    entries per second.
+    """
+
+    def __init__(self, data_dir: str, name: str,
+                 initial_backoff: float = INITIAL_BACKOFF,
+                 max_backoff: float = MAX_BACKOFF,
+                 batch_size: int = BATCH_SIZE,
+                 drain_rate: float = DRAIN_RATE):
         logger.info("Initializing graph store synchronizer...")
         self._data_dir = data_dir
         self._name = name
@@ -22,38 +56,237 @@ class GraphStoreSynchronizer:
                              rocksdb.Options(
                                  create_if_missing=True))
 
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._batch_size = max(1, batch_size)
+        self._drain_rate = drain_rate
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
         self._scheduled_job = None
 
+        # Number of entries, counted when the scheduler starts.
+        self._backlog = 0
+        self._dispatched = 0
+
     def start(self, scheduled_job):
+        """
+        :param scheduled_job: called with a list of due (key, value) pairs,
+            where values are memoryviews
+        """
         logger.debug("Starting scheduler for graph store synchronizer...")
 
         self._scheduled_job = scheduled_job
-        t = Timer(INTERVAL, self._run_job)
-        t.daemon = True
-        t.start()
+        self._schedule_unscheduled_entries()
+
+        self._thread = threading.Thread(target=self._run, name="graph-store-synchronizer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
 
     def add(self, key: bytes, value: bytes):
-        logger.debug("Adding a new pair to synchronizer: {} => {}".format(key, value))
-        self.db.put(key, value)
+        logger.debug("Adding a new pair to synchronizer: %s => %s", key, Payload(value))
+        self.add_many([(key, value)])
+
+    def add_many(self, pairs, catchup_seq_no: int = None):
+        """
+        Stores all pairs with a single write.
+
+        :param catchup_seq_no: if set, recorded in the same write as the
+            seqNo up to which graphs of a catch-up have been added
+        """
+        next_attempt = self._now() + self._initial_backoff
+        with self._lock:
+            batch = rocksdb.WriteBatch()
+            for key, value in pairs:
+                if self.db.get(key) is None:
+                    self._backlog += 1
+                batch.put(key, value)
+                self._schedule(batch, key, 0, next_attempt)
+            if catchup_seq_no is not None:
+                batch.put(CATCHUP_SEQ_NO_KEY, str(catchup_seq_no).encode(UTF_8))
+            self.db.write(batch)
+        self._wakeup.set()
+
+    def catchup_seq_no(self):
+        # Set while a catch-up is in progress, or was interrupted; see `add_many`.
+        value = self.db.get(CATCHUP_SEQ_NO_KEY)
+        return int(value.decode(UTF_8)) if value is not None else None
+
+    def set_catchup_seq_no(self, seq_no):
+        if seq_no is None:
+            self.db.delete(CATCHUP_SEQ_NO_KEY)
+        else:
+            self.db.put(CATCHUP_SEQ_NO_KEY, str(seq_no).encode(UTF_8))
 
     def exists(self, key: bytes) -> bool:
         return self.db.get(key) is not None
 
+    def get(self, key: bytes):
+        # Values are handed out as memoryviews, so records can be decoded
+        # without copying the graph content.
+        value = self.db.get(key)
+        return memoryview(value) if value is not None else None
+
+    def attempts(self, key: bytes) -> int:
+        schedule = self._get_schedule(key)
+        return schedule[0] if schedule is not None else 0
+
     def remove(self, key: bytes):
-        try:
-            self.db.delete(key)
-        except rocksdb.errors.NotFound as ex:
-            logger.warning("Attempting to remove unexisting entry with key '{}'. Details: {}"
-                           .format(key.decode(UTF_8), ex))
+        with self._lock:
+            if self.db.get(key) is None:
+                logger.warning("Attempting to remove unexisting entry with key '{}'.".format(key.decode(UTF_8)))
+                return
+
+            batch = rocksdb.WriteBatch()
+            batch.delete(key)
+            self._unschedule(batch, key)
+            self.db.write(batch)
+            self._backlog -= 1
 
     def list_all(self):
         it = self.db.iteritems()
         it.seek_to_first()
-        return it
-
-    def _run_job(self):
-        logger.debug("Running scheduled job...")
-        t = Timer(INTERVAL, self._run_job)
-        t.daemon = True
-        t.start()
-        self._scheduled_job()
+        return ((key, memoryview(value)) for key, value in it if self._is_entry_key(key))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "backlog": self._backlog,
+                "dispatched": self._dispatched,
+            }
+
+    def run_once(self) -> int:
+        """
+        Passes entries which are due to the scheduled job; returns their
+        number. Does nothing if another run is in progress.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            logger.debug("Graph store sync job is already running.")
+            return 0
+
+        try:
+            due = self._take_due_entries(self._now())
+            if due:
+                self._scheduled_job(due)
+            return len(due)
+        finally:
+            self._run_lock.release()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                handled = self.run_once()
+            except Exception as ex:
+                logger.warning("Graph store sync job failed. Details: {}".format(ex))
+                handled = 0
+
+            if handled:
+                # A large backlog is drained gradually instead of at once.
+                self._stopped.wait(handled / self._drain_rate)
+                continue
+
+            self._wakeup.clear()
+            self._wakeup.wait(self._seconds_until_next_due())
+
+    def _take_due_entries(self, now):
+        due = []
+        with self._lock:
+            batch = rocksdb.WriteBatch()
+            it = self.db.iterkeys()
+            it.seek(DUE_INDEX_PREFIX)
+            for index_key in it:
+                if not index_key.startswith(DUE_INDEX_PREFIX) or len(due) >= self._batch_size:
+                    break
+                next_attempt, key = self._decode_due_index_key(index_key)
+                if next_attempt > now:
+                    break
+
+                value = self.db.get(key)
+                schedule = self._get_schedule(key)
+                if value is None or schedule is None:
+                    batch.delete(index_key)
+                    continue
+
+                attempts = schedule[0] + 1
+                batch.delete(index_key)
+                self._put_schedule(batch, key, attempts, now + self._backoff(attempts))
+                due.append((key, memoryview(value)))
+
+            self.db.write(batch)
+            self._dispatched += len(due)
+        return due
+
+    def _seconds_until_next_due(self):
+        it = self.db.iterkeys()
+        it.seek(DUE_INDEX_PREFIX)
+        for index_key in it:
+            if not index_key.startswith(DUE_INDEX_PREFIX):
+                break
+            next_attempt, _ = self._decode_due_index_key(index_key)
+            return min(INTERVAL, max(0.0, next_attempt - self._now()))
+        return INTERVAL
+
+    def _schedule_unscheduled_entries(self):
+        # Entries written by older versions have no schedule; they are due now.
+        counter = 0
+        now = self._now()
+        with self._lock:
+            batch = rocksdb.WriteBatch()
+            self._backlog = 0
+            for key, _ in self.list_all():
+                self._backlog += 1
+                if self._get_schedule(key) is None:
+                    self._put_schedule(batch, key, 0, now)
+                    counter += 1
+            self.db.write(batch)
+        if counter:
+            logger.info("Scheduled {} graph store sync entries without schedule.".format(counter))
+
+    def _schedule(self, batch, key, attempts, next_attempt):
+        self._unschedule(batch, key)
+        self._put_schedule(batch, key, attempts, next_attempt)
+
+    def _unschedule(self, batch, key):
+        schedule = self._get_schedule(key)
+        if schedule is not None:
+            batch.delete(self._make_due_index_key(schedule[1], key))
+            batch.delete(SCHEDULE_PREFIX + key)
+
+    def _put_schedule(self, batch, key, attempts, next_attempt):
+        next_attempt_ms = int(next_attempt * 1000)
+        batch.put(SCHEDULE_PREFIX + key, "{}:{}".format(attempts, next_attempt_ms).encode(UTF_8))
+        batch.put(self._make_due_index_key(next_attempt_ms, key), b"")
+
+    def _get_schedule(self, key):
+        value = self.db.get(SCHEDULE_PREFIX + key)
+        if value is None:
+            return None
+        attempts, next_attempt_ms = value.decode(UTF_8).split(":")
+        return int(attempts), int(next_attempt_ms)
+
+    def _backoff(self, attempts):
+        return min(self._max_backoff, self._initial_backoff * (2 ** min(attempts - 1, 32)))
+
+    @staticmethod
+    def _make_due_index_key(next_attempt_ms, key):
+        return DUE_INDEX_PREFIX + next_attempt_ms.to_bytes(8, 'big') + key
+
+    @staticmethod
+    def _decode_due_index_key(index_key):
+        next_attempt_ms = int.from_bytes(index_key[1:9], 'big')
+        return next_attempt_ms / 1000, index_key[9:]
+
+    @staticmethod
+    def _is_entry_key(key):
+        return not (key.startswith(DUE_INDEX_PREFIX) or key.startswith(SCHEDULE_PREFIX) or key == CATCHUP_SEQ_NO_KEY)
+
+    @staticmethod
+    def _now():
+        return time.time()
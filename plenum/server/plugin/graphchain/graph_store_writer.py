@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+
+from plenum.server.plugin.graphchain.logger import get_logger
+
+logger = get_logger()
+
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 50
+
+
+class GraphStoreWriter:
+    """
+    Writes graphs to the triple store on background threads, so a slow
+    triple store does not stall ordering of the ledger.
+
+    Graphs are persisted in the GraphStoreSynchronizer before they are
+    enqueued here, so the in-memory queue is bounded: when it is full, the
+    graph is not enqueued and the synchronizer's sync job retries it later.
+
+    Every thread takes up to `batch_size` queued graphs at once and passes
+    them to `write_func`, which returns hashes of graphs that were written.
+    Graphs enqueued together with `enqueue_many` are written in one batch.
+    """
+
+    def __init__(self, write_func, concurrency: int = DEFAULT_CONCURRENCY, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        logger.info("Creating graph store writer with concurrency {}, queue size {} and batch size {}."
+                    .format(concurrency, queue_size, batch_size))
+        self._write_func = write_func
+        self._concurrency = concurrency
+        self._batch_size = max(1, batch_size)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._workers = []
+
+        self._written = 0
+        self._failed = 0
+        self._rejected = 0
+        self._batches = 0
+        self._write_time_total = 0.0
+        self._write_time_max = 0.0
+
+    def start(self):
+        logger.debug("Starting {} graph store writer threads...".format(self._concurrency))
+        for i in range(self._concurrency):
+            worker = threading.Thread(target=self._run, name="graph-store-writer-{}".format(i))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        self._workers = []
+
+    def enqueue(self, graph_hash, graph_raw_content, graph_format, ntriples=None, block=False) -> bool:
+        return self.enqueue_many([(graph_hash, graph_raw_content, graph_format, ntriples)], block=block)
+
+    def enqueue_many(self, items, block=False) -> bool:
+        """
+        :param items: list of (graph_hash, graph_raw_content, graph_format, ntriples)
+        """
+        with self._lock:
+            items = [item for item in items if item[0] not in self._pending]
+            self._pending.update(item[0] for item in items)
+        if not items:
+            return True
+
+        try:
+            self._queue.put(items, block=block)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._pending.difference_update(item[0] for item in items)
+                self._rejected += len(items)
+            logger.debug("Graph store writer queue is full; %s graphs are left for the sync job.", len(items))
+            return False
+
+    def is_pending(self, graph_hash) -> bool:
+        with self._lock:
+            return graph_hash in self._pending
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "pending": len(self._pending),
+                "written": self._written,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "batches": self._batches,
+                "batch_latency_avg": self._write_time_total / self._batches if self._batches else 0.0,
+                "batch_latency_max": self._write_time_max,
+            }
+
+    def _run(self):
+        while True:
+            batch, stopped = self._take_batch()
+            if batch:
+                self._write(batch)
+            if stopped:
+                return
+
+    def _take_batch(self):
+        items = self._queue.get()
+        if items is None:
+            return [], True
+
+        batch = list(items)
+        while len(batch) < self._batch_size:
+            try:
+                items = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if items is None:
+                return batch, True
+            batch.extend(items)
+
+        return batch, False
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        try:
+            written = self._write_func(batch)
+        except Exception as ex:
+            logger.warning("Graph store writer failed for a batch of {} graphs. Details: {}".format(len(batch), ex))
+            written = set()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            for item in batch:
+                graph_hash = item[0]
+                self._pending.discard(graph_hash)
+                if graph_hash in written:
+                    self._written += 1
+                else:
+                    self._failed += 1
+            self._batches += 1
+            self._write_time_total += elapsed
+            self._write_time_max = max(self._write_time_max, elapsed)
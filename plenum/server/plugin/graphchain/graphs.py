@@ -25,12 +25,16 @@ class GraphValidator:
         pass
 
     def validate_graph(self, graph: str, graph_format: str):
+        g, reason = self.parse_graph(graph, graph_format)
+        return g is not None, reason
+
+    def parse_graph(self, graph: str, graph_format: str):
         # We try to load graph: if there aren't any exceptions, we assume that
-        # graph is syntactically valid; if an exception has been raised, we
-        # return the False and an reason why parsing failed.
+        # graph is syntactically valid and return it; if an exception has been
+        # raised, we return None and an reason why parsing failed.
         try:
             g = Graph()
             g.parse(data=graph, format=graph_format)
-            return True, None
+            return g, None
         except Exception as ex:
-            return False, str(ex)
+            return None, str(ex)
@@ -1,6 +1,15 @@
+from collections import defaultdict
 from hashlib import sha256
+from io import BytesIO
 
-from rdflib import BNode, Graph
+from rdflib import BNode, Graph, Literal
+from rdflib.plugins.parsers.ntriples import NTriplesParser, ParseError, r_tail, r_wspace
+
+STREAMABLE_FORMATS = ('nt', 'nquads')
+
+
+def sha256_digest(data: bytes) -> bytes:
+    return sha256(data).digest()
 
 
 class InterwovenHashCalculator:
@@ -10,75 +19,171 @@ class InterwovenHashCalculator:
     _BLANK_NODE_OBJECT_NAME = "Magic_O"
     _MOD_OPERAND = (2 ** _HASH_SIZE)
 
+    def __init__(self, hash_backend=sha256_digest):
+        # hash_backend takes encoded triple and returns its raw SHA-256 digest;
+        # it can be replaced by a faster implementation of the same function.
+        self._hash_backend = hash_backend
+
     def calculate_hash(self, graph: Graph) -> str:
-        graph_hash = 0
+        return self.calculate_hashes([graph])[0]
+
+    def calculate_hashes(self, graphs) -> list:
+        # Encodings of terms are shared by all graphs of the batch, since the
+        # same predicates and resources are repeated in most of the triples.
+        encoded_terms = {}
+        return ["{0:064x}".format(self._calculate_graph_hash(graph, encoded_terms)) for graph in graphs]
+
+    def calculate_hash_from_raw(self, raw_graph: bytes, graph_format: str) -> str:
+        # Line-oriented formats are hashed while they are being read, without
+        # building an in-memory rdflib Graph; other formats are parsed first.
+        if not self.supports_streaming(graph_format):
+            g = Graph()
+            g.parse(data=raw_graph, format=graph_format)
+            return self.calculate_hash(g)
+
+        sink = _StreamingHashSink(self)
+        if graph_format == 'nquads':
+            parser = _DefaultGraphNQuadsParser(sink=sink)
+        else:
+            parser = NTriplesParser(sink=sink)
+        parser.parse(BytesIO(raw_graph))
+
+        return "{0:064x}".format(sink.digest())
+
+    @staticmethod
+    def supports_streaming(graph_format: str) -> bool:
+        return graph_format in STREAMABLE_FORMATS
+
+    def _calculate_graph_hash(self, graph: Graph, encoded_terms: dict) -> int:
+        accumulator = _InterwovenHashAccumulator(self._MOD_OPERAND)
 
         for s, p, o in graph:
-            triple_hash = self._calculate_triple_hash(s, p, o)
-            graph_hash = self._modulo_hash(graph_hash, triple_hash)
+            s_bnode = s if isinstance(s, BNode) else None
+            o_bnode = o if isinstance(o, BNode) else None
+            triple_hash = self._calculate_triple_hash(s, p, o, s_bnode, o_bnode, encoded_terms)
+            accumulator.add(triple_hash, s_bnode, o_bnode)
 
-            if self._is_bnode(s):
-                linked_hash_o = self._calculate_hash_for_triples_linked_by_subject(graph, s)
-                linked_hash_s = self._calculate_hash_for_triples_linked_by_object(graph, s)
-                graph_hash = self._modulo_hash(graph_hash, linked_hash_o)
-                graph_hash = self._modulo_hash(graph_hash, linked_hash_s)
+        return accumulator.digest()
 
-            if self._is_bnode(o):
-                linked_hash_o = self._calculate_hash_for_triples_linked_by_subject(graph, o)
-                linked_hash_s = self._calculate_hash_for_triples_linked_by_object(graph, o)
-                graph_hash = self._modulo_hash(graph_hash, linked_hash_o)
-                graph_hash = self._modulo_hash(graph_hash, linked_hash_s)
+    def _calculate_triple_hash(self, s, p, o, s_bnode, o_bnode, encoded_terms):
+        encoded_triple = "".join((
+            self._BLANK_NODE_SUBJECT_NAME if s_bnode is not None else self._encode_term(s, encoded_terms),
+            self._encode_term(p, encoded_terms),
+            self._BLANK_NODE_OBJECT_NAME if o_bnode is not None else self._encode_term(o, encoded_terms)))
 
-        return "{0:064x}".format(graph_hash)
+        return int.from_bytes(self._hash_backend(encoded_triple.encode()), 'big')
 
-    def _calculate_triple_hash(self, s, p, o):
-        encoded_triple = self._encode_triple(s, p, o)
+    @staticmethod
+    def _encode_term(term, encoded_terms):
+        # Literals which rdflib considers equal can still be rendered
+        # differently (e.g. language tags differing in case), so they are
+        # keyed by everything their rendering depends on.
+        key = (str(term), term.language, term.datatype) if isinstance(term, Literal) else term
+        encoded = encoded_terms.get(key)
+        if encoded is None:
+            encoded = encoded_terms[key] = term.n3()
+        return encoded
 
-        triple_hash = sha256(encoded_triple).hexdigest()
-        triple_hash = int(triple_hash, base=16)
+    @staticmethod
+    def _is_bnode(resource):
+        return isinstance(resource, BNode)
 
-        return triple_hash
 
-    def _calculate_hash_for_triples_linked_by_subject(self, graph, resource):
-        partial_hash = 0
+class _InterwovenHashAccumulator:
+    """
+    Sums up triple hashes in a single pass over the graph.
+
+    Every triple which mentions a blank node is interwoven with all triples
+    linked to that node (as subject or object), once per occurrence of the
+    node. Instead of re-scanning the graph for every such occurrence, the
+    hashes of triples linked to each blank node and the number of its
+    occurrences are collected, and the products are added at the end.
+    """
+
+    def __init__(self, mod_operand):
+        self._mod_operand = mod_operand
+        self._graph_hash = 0
+        self._linked_hashes = defaultdict(int)
+        self._occurrences = defaultdict(int)
+
+    def add(self, triple_hash, bnode_subject=None, bnode_object=None):
+        self._graph_hash += triple_hash
+
+        if bnode_subject is not None:
+            self._linked_hashes[bnode_subject] += triple_hash
+            self._occurrences[bnode_subject] += 1
+
+        if bnode_object is not None:
+            self._linked_hashes[bnode_object] += triple_hash
+            self._occurrences[bnode_object] += 1
+
+    def digest(self):
+        graph_hash = self._graph_hash
+        for bnode, linked_hash in self._linked_hashes.items():
+            graph_hash += self._occurrences[bnode] * linked_hash
+        return graph_hash % self._mod_operand
+
+
+class _StreamingHashSink:
+    """
+    Sink for the rdflib N-Triples parser which hashes triples as they are
+    parsed. Apart from the blank-node data kept by the accumulator, only the
+    keys of already seen triples are held, since an rdflib Graph would drop
+    duplicated triples as well.
+    """
+
+    def __init__(self, calculator: InterwovenHashCalculator):
+        self._calculator = calculator
+        self._accumulator = _InterwovenHashAccumulator(calculator._MOD_OPERAND)
+        self._encoded_terms = {}
+        self._seen = set()
+
+    def triple(self, s, p, o):
+        bnode_subject = s if self._calculator._is_bnode(s) else None
+        bnode_object = o if self._calculator._is_bnode(o) else None
+        triple_hash = self._calculator._calculate_triple_hash(s, p, o, bnode_subject, bnode_object,
+                                                              self._encoded_terms)
+
+        if bnode_subject is None and bnode_object is None:
+            key = triple_hash
+        else:
+            key = (triple_hash, bnode_subject, bnode_object)
+        if key in self._seen:
+            return
+        self._seen.add(key)
 
-        linked_triples = graph.triples((None, None, resource))
-        for s, p, o in linked_triples:
-            partial_hash = self._modulo_hash(
-                partial_hash,
-                self._calculate_triple_hash(s, p, o))
+        self._accumulator.add(triple_hash, bnode_subject, bnode_object)
 
-        return partial_hash
+    def digest(self):
+        return self._accumulator.digest()
 
-    def _calculate_hash_for_triples_linked_by_object(self, graph, resource):
-        partial_hash = 0
 
-        linked_triples = graph.triples((resource, None, None))
-        for s, p, o in linked_triples:
-            partial_hash = self._modulo_hash(
-                partial_hash,
-                self._calculate_triple_hash(s, p, o))
+class _DefaultGraphNQuadsParser(NTriplesParser):
+    """
+    N-Quads parser passing to the sink only quads from the default graph.
+    Parsing N-Quads into a plain rdflib Graph keeps just those as well; quads
+    with an explicit graph name land in other contexts.
+    """
 
-        return partial_hash
+    def parseline(self):
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith('#'):
+            return  # The line is empty or a comment
 
-    def _encode_triple(self, s, p, o):
-        if self._is_bnode(s):
-            s_encoded = self._BLANK_NODE_SUBJECT_NAME
-        else:
-            s_encoded = s.n3()
+        subject = self.subject()
+        self.eat(r_wspace)
 
-        p_encoded = p.n3()
+        predicate = self.predicate()
+        self.eat(r_wspace)
 
-        if self._is_bnode(o):
-            o_encoded = self._BLANK_NODE_OBJECT_NAME
-        else:
-            o_encoded = o.n3()
+        obj = self.object()
+        self.eat(r_wspace)
 
-        return (s_encoded + p_encoded + o_encoded).encode()
+        context = self.uriref() or self.nodeid()
+        self.eat(r_tail)
 
-    def _modulo_hash(self, a_number, a_hash):
-        return (a_number + a_hash) % self._MOD_OPERAND
+        if self.line:
+            raise ParseError("Trailing garbage")
 
-    @staticmethod
-    def _is_bnode(resource):
-        return isinstance(resource, BNode)
+        if not context:
+            self.sink.triple(subject, predicate, obj)
@@ -0,0 +1,21 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SPARQL_RESULTS_JSON = 'application/sparql-results+json'
+
+
+def create_session(pool_size: int, retries: int, backoff_factor: float) -> requests.Session:
+    """
+    Creates a keep-alive HTTP session with a connection pool of `pool_size`
+    connections per host. Only failed connection attempts are retried (with
+    exponential backoff): a repeated SPARQL update is not idempotent when
+    the inserted graph contains blank nodes.
+    """
+    retry = Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=backoff_factor)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,141 @@
+import math
+import os
+import threading
+from hashlib import sha256
+
+import rocksdb
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+
+UTF_8 = "utf-8"
+LEDGER_SEQ_NO_KEY = b"\x00ledger_seq_no"
+WARM_BATCH_SIZE = 10000
+
+
+class BloomFilter:
+    """
+    Bloom filter over string keys with a fixed number of bits sized for
+    `capacity` keys and the given false positive rate.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(1, capacity)
+        self._size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self._hash_count = max(1, int(round(self._size / capacity * math.log(2))))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key):
+        digest = sha256(key.encode(UTF_8)).digest()
+        h1 = int.from_bytes(digest[:16], 'big')
+        h2 = int.from_bytes(digest[16:], 'big') | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hash_count))
+
+
+class KnownGraphs:
+    """
+    Local membership layer for ihashes of graphs which this node has stored
+    in its triple store or seen in its ledger. A persistent RocksDB set is
+    fronted by an in-memory Bloom filter: when `might_be_stored` returns
+    False, the graph is certainly not stored and the triple store does not
+    have to be asked; a True answer must still be confirmed remotely.
+    """
+
+    def __init__(self, data_dir: str, name: str, capacity: int, false_positive_rate: float):
+        logger.info("Initializing known graphs set...")
+        self._store_path = os.path.join(data_dir, name)
+        self.db = rocksdb.DB(self._store_path,
+                             rocksdb.Options(
+                                 create_if_missing=True))
+        self._bloom_filter = BloomFilter(capacity, false_positive_rate)
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._bloom_false_positives = 0
+
+        self._load_bloom_filter()
+
+    def add(self, graph_hash: str):
+        self.db.put(graph_hash.encode(UTF_8), b"")
+        # Writer threads add concurrently and setting a bit of the filter is
+        # a read-modify-write, so a bit set by another thread could be lost.
+        with self._lock:
+            self._bloom_filter.add(graph_hash)
+
+    def warm(self, ledger_txns):
+        """
+        Adds ihashes of ledger txns which have not been seen yet.
+
+        :param ledger_txns: iterable of (seq_no, ihash) from the ledger
+        """
+        counter = 0
+        last_seq_no = None
+        batch = rocksdb.WriteBatch()
+        for seq_no, graph_hash in ledger_txns:
+            last_seq_no = seq_no
+            if graph_hash is not None:
+                batch.put(graph_hash.encode(UTF_8), b"")
+                with self._lock:
+                    self._bloom_filter.add(graph_hash)
+                counter += 1
+
+            if batch.count() >= WARM_BATCH_SIZE:
+                self._write_warm_batch(batch, last_seq_no)
+                batch = rocksdb.WriteBatch()
+
+        if last_seq_no is not None:
+            self._write_warm_batch(batch, last_seq_no)
+        logger.info("Known graphs set warmed with {} ihashes from the ledger.".format(counter))
+
+    def _write_warm_batch(self, batch, seq_no):
+        batch.put(LEDGER_SEQ_NO_KEY, str(seq_no).encode(UTF_8))
+        self.db.write(batch)
+
+    def last_warmed_seq_no(self) -> int:
+        value = self.db.get(LEDGER_SEQ_NO_KEY)
+        return int(value.decode(UTF_8)) if value is not None else 0
+
+    def might_be_stored(self, graph_hash: str) -> bool:
+        in_bloom_filter = graph_hash in self._bloom_filter
+        if in_bloom_filter and self.db.get(graph_hash.encode(UTF_8)) is not None:
+            self._count('_misses')
+            return True
+
+        if in_bloom_filter:
+            self._count('_bloom_false_positives')
+        self._count('_hits')
+        return False
+
+    def metrics(self) -> dict:
+        # hits: answered locally (certainly not stored),
+        # misses: possibly stored, to be confirmed by the triple store
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "bloom_false_positives": self._bloom_false_positives,
+            }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _load_bloom_filter(self):
+        counter = 0
+        it = self.db.iterkeys()
+        it.seek_to_first()
+        for key in it:
+            if key == LEDGER_SEQ_NO_KEY:
+                continue
+            self._bloom_filter.add(key.decode(UTF_8))
+            counter += 1
+        logger.info("Loaded {} known ihashes into the Bloom filter.".format(counter))
@@ -1,9 +1,84 @@
+import itertools
+import logging
+from hashlib import sha256
+
 from stp_core.common.log import getlogger
 
 GRAPHCHAIN_LOGGER_NAME = 'GC'
 
+DEFAULT_LOG_LEVEL = 'INFO'
+DEFAULT_MAX_PAYLOAD_LENGTH = 200
+DEFAULT_REQUEST_LOG_SAMPLE_RATE = 1
+
+_settings = {
+    'max_payload_length': DEFAULT_MAX_PAYLOAD_LENGTH,
+}
+
+
+class _Sampler:
+    def __init__(self, rate: int = DEFAULT_REQUEST_LOG_SAMPLE_RATE):
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def __call__(self) -> bool:
+        return next(self._counter) % self.rate == 0
+
+
+_request_sampler = _Sampler()
+
+
+def get_logger():
+    return getlogger(GRAPHCHAIN_LOGGER_NAME)
+
 
 def get_debug_logger():
-    logger = getlogger(GRAPHCHAIN_LOGGER_NAME)
-    logger.setLevel('DEBUG')
-    return logger
+    # Kept for callers outside the plugin; the level is set by configure_logging.
+    return get_logger()
+
+
+def configure_logging(level: str = DEFAULT_LOG_LEVEL,
+                      max_payload_length: int = DEFAULT_MAX_PAYLOAD_LENGTH,
+                      request_log_sample_rate: int = DEFAULT_REQUEST_LOG_SAMPLE_RATE):
+    """
+    :param level: level of the plugin's logger
+    :param max_payload_length: graph contents, txns and requests are cut
+        to this many characters in log lines; 0 logs only size and digest
+    :param request_log_sample_rate: one of this many per-request lines is
+        logged (see `log_request`)
+    """
+    get_logger().setLevel(level)
+    _settings['max_payload_length'] = max_payload_length
+    _request_sampler.rate = max(1, request_log_sample_rate)
+
+
+def log_request(logger, msg, *args):
+    # Per-request INFO lines are sampled, so busy nodes do not log each one.
+    if _request_sampler() and logger.isEnabledFor(logging.INFO):
+        logger.info(msg, *args)
+
+
+class Payload:
+    """
+    Log argument for graph contents and other large values. It is rendered
+    only when the line is emitted: short values as they are, longer ones
+    cut and followed by their size and SHA-256 prefix.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        value = self.value
+        if isinstance(value, memoryview):
+            value = value.tobytes()
+        text = value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+
+        max_length = _settings['max_payload_length']
+        if len(text) <= max_length:
+            return text
+
+        digest = sha256(value if isinstance(value, bytes) else text.encode('utf-8')).hexdigest()[:16]
+        summary = "<{} chars, sha256 {}>".format(len(text), digest)
+        return "{}... {}".format(text[:max_length], summary) if max_length > 0 else summary
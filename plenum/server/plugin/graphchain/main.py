@@ -1,36 +1,49 @@
-import SPARQLWrapper
-import rdflib
-from plenum.common.constants import DOMAIN_LEDGER_ID
+import logging
+import sys
+import threading
+import time
+
+from plenum.common.constants import DOMAIN_LEDGER_ID, TXN_TYPE
 from plenum.common.startable import Mode
+from plenum.common.types import OPERATION
 
 from plenum.server.plugin.graphchain import GRAPHCHAIN_LEDGER_ID
+from plenum.server.plugin.graphchain.blob_store import BlobStore
 from plenum.server.plugin.graphchain.client_authnr import GraphchainAuthNr
 from plenum.server.plugin.graphchain.config import \
     update_nodes_config_with_plugin_settings
 from plenum.server.plugin.graphchain.constants import STARDOG, NEPTUNE
 from plenum.server.plugin.graphchain.exceptions import \
     NoDatabaseWithinTripleStore, TripleStoreTypeNotSupported
+from plenum.server.plugin.graphchain.graph_memo import GraphMemo
 from plenum.server.plugin.graphchain.graph_req_handler import \
     GraphchainReqHandler
-from plenum.server.plugin.graphchain.graph_store import GraphStoreType
+from plenum.server.plugin.graphchain.graph_store import GraphStoreType, load_graph_store_class
 from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
-from plenum.server.plugin.graphchain.logger import get_debug_logger
-from plenum.server.plugin.graphchain.neptune_graph_store import NeptuneGraphStore
-from plenum.server.plugin.graphchain.stardog_graph_store import StardogGraphStore
+from plenum.server.plugin.graphchain.known_graphs import KnownGraphs
+from plenum.server.plugin.graphchain.logger import get_logger, configure_logging
+from plenum.server.plugin.graphchain.metrics import Metrics
+from plenum.server.plugin.graphchain.validation_pool import GraphValidationPool
 from plenum.server.plugin.graphchain.storage import get_graphchain_hash_store, \
     get_graphchain_ledger, get_graphchain_state
 
-logger = get_debug_logger()
+logger = get_logger()
+
+
+MAX_GRAPH_STORE_PROBE_INTERVAL = 60
 
 
 def integrate_plugin_in_node(node):
+    node.config = update_nodes_config_with_plugin_settings(node.config)
+    configure_logging(node.config.graphchainLogLevel,
+                      node.config.graphchainLogMaxPayloadLength,
+                      node.config.graphchainRequestLogSampleRate)
+
     start_msg = "Integrating the GraphChain plugin into the '{}' node.".format(node.name)
     logger.info(start_msg)
 
     _print_node_debug_info(node)
 
-    node.config = update_nodes_config_with_plugin_settings(node.config)
-
     hash_store = get_graphchain_hash_store(node.dataLocation)
     ledger = _prepare_ledger(node, hash_store)
 
@@ -43,12 +56,24 @@ def integrate_plugin_in_node(node):
     graph_store_synchronizer = _prepare_graph_store_synchronizer(node)
 
     graphchain_req_handler = _prepare_request_handler(node, ledger, state, graph_store_synchronizer)
+    graphchain_req_handler.rebuild_ihash_index_if_missing()
+    graphchain_req_handler.warm_known_graphs()
+    graphchain_req_handler.replay_interrupted_catchup()
+    graphchain_req_handler.convert_ledger_sync_records()
+    graphchain_req_handler.warm_response_cache(node.config.graphchainResponseCacheWarmTxns)
+    _register_prevalidation(node, graphchain_req_handler)
 
     def post_txn_added_to_ledger_clbk(ledger_id, txn):
         graphchain_req_handler.handle_post_txn_added_to_ledger_clbk(txn)
         node.postTxnFromCatchupAddedToLedger(ledger_id, txn)
 
-    _register_ledger(node, ledger, post_txn_added_to_ledger_clbk)
+    def pre_catchup_start_clbk():
+        graphchain_req_handler.handle_catchup_started()
+
+    def post_catchup_complete_clbk():
+        graphchain_req_handler.handle_catchup_completed()
+
+    _register_ledger(node, ledger, post_txn_added_to_ledger_clbk, pre_catchup_start_clbk, post_catchup_complete_clbk)
 
     logger.debug("Registering request handler with ID equal to '{}'...".format(GRAPHCHAIN_LEDGER_ID))
     node.register_req_handler(graphchain_req_handler, GRAPHCHAIN_LEDGER_ID)
@@ -57,7 +82,8 @@ def integrate_plugin_in_node(node):
 
 
 def _print_node_debug_info(node):
-    logger.debug("{}".format(node.collectNodeInfo()))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("{}".format(node.collectNodeInfo()))
 
 
 def _prepare_ledger(node, hash_store):
@@ -67,28 +93,73 @@ def _prepare_ledger(node, hash_store):
 
 
 def _prepare_graph_store(node):
-    logger.info("Initializing TS database (rdflib version: {}, SPARQLWrapper version: {})..."
-                .format(rdflib.__version__, SPARQLWrapper.__version__))
+    logger.info("Initializing TS database (rdflib version: {}, requests version: {})..."
+                .format(_module_version('rdflib'), _module_version('requests')))
 
     ts_type = _obtain_ts_type(node.config.ts_type)
     ts_url = node.config.ts_url
     ts_user = node.config.ts_user
     ts_pass = node.config.ts_pass
     ts_db_name = node.name + node.config.ts_db_name_suffix
+    ts_settings = _get_graph_store_settings(node.config)
 
     if ts_type == GraphStoreType.STARDOG:
-        node.graph_store = StardogGraphStore(ts_db_name, ts_url, ts_user, ts_pass)
+        node.graph_store = load_graph_store_class(STARDOG)(ts_db_name, ts_url, ts_user, ts_pass, **ts_settings)
     elif ts_type == GraphStoreType.NEPTUNE:
-        node.graph_store = NeptuneGraphStore(ts_db_name, ts_url)
+        node.graph_store = load_graph_store_class(NEPTUNE)(ts_db_name, ts_url, **ts_settings)
     else:
         msg = "'{}' triple store type is not supported.".format(ts_type)
         raise TripleStoreTypeNotSupported(msg)
 
-    if node.graph_store.check_whether_db_exists():
-        logger.info("Database '{}' within TS exists.".format(ts_db_name))
-    else:
-        msg = "There is not a database '{}' in the triple store with URL '{}'.".format(ts_db_name, ts_url)
-        raise NoDatabaseWithinTripleStore(msg)
+    retries = node.config.graphStoreProbeRetries
+    interval = node.config.graphStoreProbeInterval
+    if not node.config.graphStoreProbeInBackground:
+        if not _probe_graph_store(node.graph_store, ts_db_name, retries, interval):
+            msg = "There is not a database '{}' in the triple store with URL '{}'.".format(ts_db_name, ts_url)
+            raise NoDatabaseWithinTripleStore(msg)
+        return
+
+    # The node starts serving while the TS is probed; graphs which cannot be
+    # written meanwhile are kept in the synchronizer and retried.
+    def probe():
+        if not _probe_graph_store(node.graph_store, ts_db_name, retries, interval):
+            logger.error("There is not a database '{}' in the triple store with URL '{}'. Graphs are kept in "
+                         "the synchronizer until it is available.".format(ts_db_name, ts_url))
+
+    thread = threading.Thread(target=probe, name="graph-store-probe")
+    thread.daemon = True
+    thread.start()
+
+
+def _probe_graph_store(graph_store, ts_db_name, retries, interval):
+    for attempt in range(1, retries + 1):
+        try:
+            if graph_store.check_whether_db_exists():
+                logger.info("Database '{}' within TS exists.".format(ts_db_name))
+                return True
+            reason = "database not found"
+        except Exception as ex:
+            reason = str(ex)
+
+        logger.warning("TS probe {}/{} for database '{}' failed: {}".format(attempt, retries, ts_db_name, reason))
+        if attempt < retries:
+            time.sleep(min(interval * 2 ** (attempt - 1), MAX_GRAPH_STORE_PROBE_INTERVAL))
+    return False
+
+
+def _module_version(name):
+    # Only reports versions of modules which are already loaded.
+    return getattr(sys.modules.get(name), '__version__', "not loaded")
+
+
+def _get_graph_store_settings(config):
+    return {
+        'max_update_size': config.graphStoreMaxUpdateSize,
+        'pool_size': config.graphStoreHttpPoolSize,
+        'timeout': config.graphStoreHttpTimeout,
+        'retries': config.graphStoreHttpRetries,
+        'backoff_factor': config.graphStoreHttpBackoffFactor,
+    }
 
 
 def _obtain_ts_type(ts_type: str):
@@ -116,19 +187,119 @@ def _prepare_authnr(node):
 
 def _prepare_graph_store_synchronizer(node):
     logger.debug("Preparing graph store synchronizer...")
-    return GraphStoreSynchronizer(node.dataLocation, node.config.graphStoreSynchronizerFile)
+    return GraphStoreSynchronizer(node.dataLocation, node.config.graphStoreSynchronizerFile,
+                                  initial_backoff=node.config.graphStoreSyncInitialBackoff,
+                                  max_backoff=node.config.graphStoreSyncMaxBackoff,
+                                  batch_size=node.config.graphStoreSyncBatchSize,
+                                  drain_rate=node.config.graphStoreSyncDrainRate)
 
 
 def _prepare_request_handler(node, ledger, state, graph_store_synchronizer):
     logger.debug("Preparing request handler...")
-    return GraphchainReqHandler(ledger, state, node.graph_store, graph_store_synchronizer)
-
-
-def _register_ledger(node, ledger, post_txn_added_to_ledger_clbk):
+    return GraphchainReqHandler(ledger, state, node.graph_store, graph_store_synchronizer,
+                                parsed_graph_cache_size=node.config.graphchainParsedGraphCacheSize,
+                                get_leis_max_hashes=node.config.graphchainGetLeisMaxHashes,
+                                get_leis_max_response_size=node.config.graphchainGetLeisMaxResponseSize,
+                                add_leis_max_items=node.config.graphchainAddLeisMaxItems,
+                                response_cache_size=node.config.graphchainResponseCacheSize,
+                                validation_pool=_prepare_validation_pool(node),
+                                graph_store_writer_concurrency=node.config.graphStoreWriterConcurrency,
+                                graph_store_writer_queue_size=node.config.graphStoreWriterQueueSize,
+                                graph_store_writer_batch_size=node.config.graphStoreWriterBatchSize,
+                                known_graphs=_prepare_known_graphs(node),
+                                sync_record_mode=node.config.graphStoreSyncRecordMode,
+                                sync_compression_threshold=node.config.graphStoreSyncCompressionThreshold,
+                                catchup_batch_size=node.config.graphStoreCatchupBatchSize,
+                                blob_store=_prepare_blob_store(node),
+                                graph_memo=_prepare_graph_memo(node),
+                                metrics=Metrics(node.config.graphchainMetricsEnabled))
+
+
+def _prepare_blob_store(node):
+    # Graph bodies stay inline in the ledger txns, so the blob store holds
+    # a second copy of them and is used only when enabled.
+    if not node.config.graphchainBlobStoreEnabled:
+        logger.debug("Graph blob store disabled.")
+        return None
+
+    logger.debug("Preparing graph blob store...")
+    return BlobStore(node.dataLocation,
+                     node.config.graphchainBlobStoreDir,
+                     node.config.graphchainBlobStoreSegmentSize)
+
+
+def _prepare_graph_memo(node):
+    logger.debug("Preparing graph memo...")
+    return GraphMemo(node.dataLocation,
+                     node.config.graphchainGraphMemoFile,
+                     node.config.graphchainGraphMemoCapacity)
+
+
+def _prepare_known_graphs(node):
+    logger.debug("Preparing known graphs set...")
+    return KnownGraphs(node.dataLocation,
+                       node.config.graphStoreKnownGraphsFile,
+                       node.config.graphStoreKnownGraphsCapacity,
+                       node.config.graphStoreKnownGraphsFalsePositiveRate)
+
+
+def _prepare_validation_pool(node):
+    pool_size = node.config.graphchainValidationPoolSize
+    if pool_size <= 0:
+        logger.debug("Graph validation pool disabled.")
+        return None
+
+    logger.debug("Preparing graph validation pool...")
+    return GraphValidationPool(pool_size, node.config.graphchainValidationTimeout)
+
+
+def _register_prevalidation(node, graphchain_req_handler):
+    # Static validation runs while the client stack hands received messages
+    # to the node one by one, so messages are collected first and graphs of
+    # all ADD_LEI and ADD_LEIS requests among them are validated in parallel.
+    logger.debug("Registering prevalidation of client requests...")
+    client_stack = node.clientstack
+    process_received = client_stack.processReceived
+    handle_client_msg = client_stack.msgHandler
+
+    def prevalidating_process_received(limit):
+        received = []
+        client_stack.msgHandler = received.append
+        try:
+            count = process_received(limit)
+        finally:
+            client_stack.msgHandler = handle_client_msg
+
+        graphchain_req_handler.prevalidate_requests(_to_write_requests(node, [msg for msg, _ in received]))
+        for wrapped_msg in received:
+            handle_client_msg(wrapped_msg)
+        return count
+
+    client_stack.processReceived = prevalidating_process_received
+
+
+def _to_write_requests(node, msgs):
+    requests = []
+    for msg in msgs:
+        operation = msg.get(OPERATION)
+        if not isinstance(operation, dict) or operation.get(TXN_TYPE) not in GraphchainReqHandler.write_types:
+            continue
+        try:
+            requests.append(node.client_request_class(**msg))
+        except Exception:
+            # The node rejects the message itself when it handles it.
+            continue
+    return requests
+
+
+def _register_ledger(node, ledger, post_txn_added_to_ledger_clbk, pre_catchup_start_clbk=None,
+                     post_catchup_complete_clbk=None):
     logger.debug("Registering ledger...")
     if GRAPHCHAIN_LEDGER_ID not in node.ledger_ids:
         node.ledger_ids.append(GRAPHCHAIN_LEDGER_ID)
     node.ledgerManager.addLedger(GRAPHCHAIN_LEDGER_ID,
                                  ledger,
+                                 preCatchupStartClbk=pre_catchup_start_clbk,
+                                 postCatchupCompleteClbk=post_catchup_complete_clbk,
                                  postTxnAddedToLedgerClbk=post_txn_added_to_ledger_clbk)
     node.on_new_ledger_added(GRAPHCHAIN_LEDGER_ID)
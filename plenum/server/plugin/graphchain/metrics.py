@@ -0,0 +1,117 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of histogram buckets: powers of two from 1 to 2^40, which
+# covers durations from microseconds to days and sizes up to a terabyte.
+BUCKET_BOUNDS = [2.0 ** exponent for exponent in range(0, 41)]
+# Durations are recorded in microseconds.
+MICROSECONDS = 1000000
+
+
+class Histogram:
+    """
+    Fixed log2 buckets plus count, sum, min and max. Recording a value is a
+    binary search and a few additions, so it can be done on hot paths.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def percentile(self, fraction: float):
+        # Upper bound of the bucket holding the percentile, capped by max.
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Named histograms, counters and gauges of the plugin. Durations of
+    stages are recorded with `timer` in microseconds. Disabled metrics
+    record nothing.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, name: str, value: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    @contextmanager
+    def timer(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * MICROSECONDS)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "histograms": {name: histogram.summary() for name, histogram in self._histograms.items()},
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
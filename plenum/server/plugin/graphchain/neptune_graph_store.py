@@ -1,17 +1,13 @@
-import requests
-from SPARQLWrapper import SPARQLWrapper, JSON
-from rdflib import Graph
-
 from plenum.server.plugin.graphchain.graph_store import GraphStore
-from plenum.server.plugin.graphchain.logger import get_debug_logger
+from plenum.server.plugin.graphchain.logger import get_logger
 
-logger = get_debug_logger()
+logger = get_logger()
 
 
 class NeptuneGraphStore(GraphStore):
 
-    def __init__(self, ts_name, ts_url):
-        super(NeptuneGraphStore, self).__init__(ts_name, ts_url)
+    def __init__(self, ts_name, ts_url, **kwargs):
+        super(NeptuneGraphStore, self).__init__(ts_name, ts_url, **kwargs)
 
         msg = "Created a new NeptuneGraphStore with URL equal to '{}'." \
             .format(ts_url)
@@ -21,38 +17,16 @@ class NeptuneGraphStore(GraphStore):
         logger.debug("Checking whether a triple store with db '{}' exists...".format(self._ts_url))
 
         url = self._ts_url + "?query=SELECT%20%3Fs%20WHERE%20%7B%20%3Fs%20%3Fs%20%3Fs%20.%20%7D"
-        r = requests.get(url)
+        r = self._get(url)
         status_code = r.status_code
         logger.debug("Status type of response whether db exists: {}.".format(status_code))
 
         return status_code == 200
 
-    def add_graph(self, raw_graph, graph_format, graph_hash):
-        logger.debug("Adding graph to the triple store...")
-
-        ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
-
-        g = Graph()
-        g.parse(data=raw_graph, format=graph_format)
-
-        sparql_query = SPARQLWrapper(self._ts_url, self._ts_url)
-
-        query = GraphStore.INSERT_GRAPH_QUERY_TEMPLATE.format(ihash, g.serialize(format='nt').decode())
-        sparql_query.setQuery(query)
-        sparql_query.setMethod('POST')
-        sparql_query.query()
-
-    def check_if_graph_is_already_stored(self, graph_hash):
-        ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
-
-        logger.debug("Checking whether graph '{}' is already in the triple store...".format(ihash))
-
-        query = GraphStore.ASK_IF_GRAPH_IS_ALREADY_STORED.format(ihash)
+    def _execute_update(self, query):
+        logger.debug("Sending update to the triple store...")
 
-        sparql_query = SPARQLWrapper(self._ts_url, self._ts_url)
+        self._post_update(self._ts_url, query)
 
-        sparql_query.setQuery(query)
-        sparql_query.method = 'POST'
-        sparql_query.setReturnFormat(JSON)
-        result = sparql_query.query()
-        return result.convert()['boolean']
+    def _execute_query(self, query):
+        return self._post_query(self._ts_url, query)
@@ -0,0 +1,58 @@
+from rdflib import Graph
+
+from plenum.server.plugin.graphchain.graphs import GraphValidator
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+
+NTRIPLES_FORMAT = 'nt'
+
+
+class ParsedGraph:
+    """
+    Result of parsing a single submitted graph. It is created once during
+    static validation and reused by `apply` and the graph store write, so
+    the content does not have to be parsed again.
+    """
+
+    def __init__(self, raw_content: bytes, graph_format: str, graph: Graph, ihash: str):
+        self.raw_content = raw_content
+        self.graph_format = graph_format
+        self.ihash = ihash
+        self._graph = graph
+        self._ntriples = None
+
+    @property
+    def has_graph(self) -> bool:
+        # False for graphs hashed by streaming until `graph` is read; the graph
+        # store then converts their content on its own threads.
+        return self._graph is not None
+
+    @property
+    def graph(self) -> Graph:
+        # Graphs hashed by streaming are parsed only when they are needed.
+        if self._graph is None:
+            self._graph = Graph()
+            self._graph.parse(data=self.raw_content, format=self.graph_format)
+        return self._graph
+
+    @property
+    def ntriples(self) -> str:
+        if self._ntriples is None:
+            self._ntriples = self.graph.serialize(format=NTRIPLES_FORMAT).decode()
+        return self._ntriples
+
+
+def parse_graph(graph_raw_content: bytes, graph_format: str,
+                graph_validator: GraphValidator, hash_calculator: InterwovenHashCalculator):
+    # For line-oriented formats parsing with the streaming hash calculator
+    # also validates the content, so no rdflib Graph has to be built here.
+    if hash_calculator.supports_streaming(graph_format):
+        try:
+            ihash = hash_calculator.calculate_hash_from_raw(graph_raw_content, graph_format)
+        except Exception as ex:
+            return None, str(ex)
+        return ParsedGraph(graph_raw_content, graph_format, None, ihash), None
+
+    graph, reason = graph_validator.parse_graph(graph_raw_content, graph_format)
+    if graph is None:
+        return None, reason
+    return ParsedGraph(graph_raw_content, graph_format, graph, hash_calculator.calculate_hash(graph)), None
@@ -1,16 +1,12 @@
-import requests
-from SPARQLWrapper import SPARQLWrapper, JSON
-from rdflib import Graph
-
 from plenum.server.plugin.graphchain.graph_store import GraphStore
-from plenum.server.plugin.graphchain.logger import get_debug_logger
+from plenum.server.plugin.graphchain.logger import get_logger
 
-logger = get_debug_logger()
+logger = get_logger()
 
 
 class StardogGraphStore(GraphStore):
-    def __init__(self, ts_db_name, ts_url, ts_user, ts_pass):
-        super(StardogGraphStore, self).__init__(ts_db_name, ts_url)
+    def __init__(self, ts_db_name, ts_url, ts_user, ts_pass, **kwargs):
+        super(StardogGraphStore, self).__init__(ts_db_name, ts_url, **kwargs)
 
         self._ts_user = ts_user
         self._ts_pass = ts_pass
@@ -23,44 +19,19 @@ class StardogGraphStore(GraphStore):
         logger.debug("Checking whether a triple store with db '{}' exists...".format(self._node_ts_url))
 
         url = self._get_ts_db_url()
-        r = requests.get(url, auth=(self._ts_user, self._ts_pass))
+        r = self._get(url, auth=self._get_auth())
         status_code = r.status_code
         logger.debug("Status type of response whether db exists: {}.".format(status_code))
 
         return status_code == 200
 
-    def add_graph(self, raw_graph, graph_format, graph_hash):
-        logger.debug("Adding graph to the triple store with URL '{}'...".format(self._get_sparql_endpoint_for_update()))
-
-        ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
-
-        g = Graph()
-        g.parse(data=raw_graph, format=graph_format)
-
-        sparql_query = SPARQLWrapper(
-            self._get_sparql_endpoint_for_query(),
-            self._get_sparql_endpoint_for_update())
-
-        query = GraphStore.INSERT_GRAPH_QUERY_TEMPLATE.format(ihash, g.serialize(format='nt').decode())
-        sparql_query.setQuery(query)
-        sparql_query.method = 'POST'
-        sparql_query.setCredentials(self._ts_user, self._ts_pass)
-        sparql_query.query()
-
-    def check_if_graph_is_already_stored(self, graph_hash: str) -> bool:
-        ihash = GraphStore.IHASH_PREFIX.format(graph_hash)
-
-        logger.debug("Checking whether graph '{}' is already in the triple store...".format(ihash))
+    def _execute_update(self, query):
+        logger.debug("Sending update to the triple store with URL '%s'...", self._get_sparql_endpoint_for_update())
 
-        query = GraphStore.ASK_IF_GRAPH_IS_ALREADY_STORED.format(ihash)
+        self._post_update(self._get_sparql_endpoint_for_update(), query, auth=self._get_auth())
 
-        sparql_query = SPARQLWrapper(
-            self._get_sparql_endpoint_for_query(),
-            self._get_sparql_endpoint_for_update())
+    def _execute_query(self, query):
+        return self._post_query(self._get_sparql_endpoint_for_query(), query, auth=self._get_auth())
 
-        sparql_query.setQuery(query)
-        sparql_query.method = 'POST'
-        sparql_query.setReturnFormat(JSON)
-        sparql_query.setCredentials(self._ts_user, self._ts_pass)
-        result = sparql_query.query()
-        return result.convert()['boolean']
+    def _get_auth(self):
+        return self._ts_user, self._ts_pass
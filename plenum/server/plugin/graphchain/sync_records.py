@@ -0,0 +1,132 @@
+import struct
+import zlib
+from collections import namedtuple
+
+from plenum.server.plugin.graphchain.constants import SYNC_PAIR_GRAPH_CONTENT, SYNC_PAIR_GRAPH_FORMAT
+from plenum.server.plugin.graphchain.helpers import bytes_to_dict, str_to_bytes
+
+# Values of graph store synchronizer entries. A record is a fixed header:
+#   kind (1 byte) | format code (1 byte) | flags (1 byte) | value (8 bytes)
+# where value is the length of the content which follows the header, or
+# the ledger seqNo of the txn with the graph when no content is stored.
+# Blob references carry no value: the graph is read from the blob store by
+# the entry's key. Formats without a code of their own (MIME types, 'trig'
+# and whatever else rdflib accepts) are stored right after the header as a
+# length-prefixed UTF-8 string, before the content.
+RECORD_HEADER = struct.Struct(">BBBQ")
+FORMAT_LENGTH = struct.Struct(">H")
+
+RECORD_KIND_CONTENT = 1
+RECORD_KIND_LEDGER_REF = 2
+RECORD_KIND_BLOB_REF = 3
+
+FLAG_COMPRESSED = 0x01
+
+SYNC_RECORD_CONTENT = 'content'
+SYNC_RECORD_LEDGER = 'ledger'
+SYNC_RECORD_BLOB = 'blob'
+
+DEFAULT_COMPRESSION_THRESHOLD = 64 * 1024
+
+_FORMAT_CODES = {
+    'n3': 1,
+    'nquads': 2,
+    'nt': 3,
+    'trix': 4,
+    'turtle': 5,
+    'xml': 6,
+}
+_FORMATS = {code: graph_format for graph_format, code in _FORMAT_CODES.items()}
+_FORMAT_CODE_NONE = 0
+_FORMAT_CODE_INLINE = 0xFF
+
+# Records stored by older versions are JSON objects.
+_LEGACY_RECORD_START = ord("{")
+
+SyncRecord = namedtuple('SyncRecord', ['graph_format', 'content', 'seq_no'])
+
+
+def encode_content_record(graph_raw_content: bytes, graph_format: str,
+                          compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD) -> bytes:
+    """
+    Graphs of at least `compression_threshold` bytes are compressed with
+    zlib; None disables compression.
+    """
+    flags = 0
+    if compression_threshold is not None and len(graph_raw_content) >= compression_threshold:
+        graph_raw_content = zlib.compress(graph_raw_content)
+        flags |= FLAG_COMPRESSED
+
+    format_code, inline_format = _encode_format(graph_format)
+    header = RECORD_HEADER.pack(RECORD_KIND_CONTENT, format_code, flags, len(graph_raw_content))
+    return header + inline_format + graph_raw_content
+
+
+def encode_ledger_record(seq_no: int, graph_format: str) -> bytes:
+    format_code, inline_format = _encode_format(graph_format)
+    return RECORD_HEADER.pack(RECORD_KIND_LEDGER_REF, format_code, 0, seq_no) + inline_format
+
+
+def encode_blob_record(graph_format: str) -> bytes:
+    format_code, inline_format = _encode_format(graph_format)
+    return RECORD_HEADER.pack(RECORD_KIND_BLOB_REF, format_code, 0, 0) + inline_format
+
+
+def decode_sync_record(value) -> SyncRecord:
+    """
+    Decodes a record from bytes or a memoryview. Uncompressed content is
+    returned as a memoryview of `value`, so it is not copied.
+    """
+    view = memoryview(value)
+    if view[0] == _LEGACY_RECORD_START:
+        graph_dict = bytes_to_dict(view.tobytes())
+        return SyncRecord(graph_dict[SYNC_PAIR_GRAPH_FORMAT],
+                          memoryview(str_to_bytes(graph_dict[SYNC_PAIR_GRAPH_CONTENT])),
+                          None)
+
+    kind, format_code, flags, header_value = RECORD_HEADER.unpack_from(view)
+    graph_format, content_offset = _decode_format(view, format_code)
+
+    if kind == RECORD_KIND_LEDGER_REF:
+        return SyncRecord(graph_format, None, header_value)
+
+    if kind == RECORD_KIND_BLOB_REF:
+        return SyncRecord(graph_format, None, None)
+
+    if kind != RECORD_KIND_CONTENT:
+        raise ValueError("Unknown sync record kind: {}".format(kind))
+
+    content = view[content_offset:content_offset + header_value]
+    if flags & FLAG_COMPRESSED:
+        content = memoryview(zlib.decompress(content))
+    return SyncRecord(graph_format, content, None)
+
+
+def _encode_format(graph_format):
+    """
+    :return: format code for the header and bytes to put right after it
+    """
+    if graph_format is None:
+        return _FORMAT_CODE_NONE, b""
+
+    format_code = _FORMAT_CODES.get(graph_format)
+    if format_code is not None:
+        return format_code, b""
+
+    encoded = graph_format.encode()
+    return _FORMAT_CODE_INLINE, FORMAT_LENGTH.pack(len(encoded)) + encoded
+
+
+def _decode_format(view, format_code):
+    """
+    :return: graph format and offset of the data which follows it
+    """
+    if format_code == _FORMAT_CODE_NONE:
+        return None, RECORD_HEADER.size
+
+    if format_code != _FORMAT_CODE_INLINE:
+        return _FORMATS[format_code], RECORD_HEADER.size
+
+    start = RECORD_HEADER.size + FORMAT_LENGTH.size
+    length, = FORMAT_LENGTH.unpack_from(view, RECORD_HEADER.size)
+    return view[start:start + length].tobytes().decode(), start + length
@@ -6,3 +6,6 @@ PREFIX = '7850'
 class GraphTransactions(Transactions):
     ADD_LEI = PREFIX + '0'
     GET_LEI = PREFIX + '1'
+    GET_LEIS = PREFIX + '2'
+    ADD_LEIS = PREFIX + '3'
+    GET_METRICS = PREFIX + '4'
@@ -0,0 +1,263 @@
+"""
+Offline rebuild of a node's triple store database from its graphchain ledger.
+
+The node has to be stopped. Txns are read from the ledger in seqNo order,
+their LEI graphs are converted to N-Triples on a pool of worker processes
+and either written as sharded N-Quads files, with graphs named
+http://lei.info/{ihash}, for the triple store's bulk loader, or inserted
+into the triple store with batched SPARQL updates. The last handled seqNo
+is checkpointed after every shard, so an interrupted rebuild is resumed.
+
+    python -m plenum.server.plugin.graphchain.ts_rebuild --data-dir DIR --out-dir DIR
+    python -m plenum.server.plugin.graphchain.ts_rebuild --data-dir DIR --checkpoint FILE \\
+        --ts-type stardog --ts-url URL --ts-db DB [--ts-user USER --ts-pass PASS]
+"""
+import argparse
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from plenum.common.config_util import getConfig
+
+from plenum.server.plugin.graphchain.config import update_nodes_config_with_plugin_settings
+from plenum.server.plugin.graphchain.constants import GRAPH_IHASH_FIELD, TXN_FIELD, DATA_FIELD, LEI_FIELD, \
+    GRAPH_FORMAT_FIELD, STARDOG, NEPTUNE
+from plenum.server.plugin.graphchain.content_encodings import decode_lei_content
+from plenum.server.plugin.graphchain.exceptions import TripleStoreTypeNotSupported
+from plenum.server.plugin.graphchain.graph_store import GraphStore, load_graph_store_class
+from plenum.server.plugin.graphchain.logger import get_logger, configure_logging
+from plenum.server.plugin.graphchain.storage import get_graphchain_hash_store, get_graphchain_ledger
+
+logger = get_logger()
+
+
+DEFAULT_SHARD_SIZE = 10000
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+DEFAULT_INSERT_BATCH_SIZE = 50
+SHARD_FILE_TEMPLATE = "graphchain-{:012d}-{:012d}.nq"
+
+_NT_LINE_END = re.compile(r"\s*\.\s*$", re.MULTILINE)
+
+
+def convert_txns(items):
+    """
+    Runs in a worker process.
+
+    :param items: list of (seq_no, ihash, LEI of the txn)
+    :return: list of (seq_no, ihash, ntriples, reason); ntriples is None
+        and reason is set when the graph cannot be converted
+    """
+    results = []
+    for seq_no, graph_hash, lei in items:
+        try:
+            ntriples = GraphStore._to_ntriples(decode_lei_content(lei), lei.get(GRAPH_FORMAT_FIELD))
+            results.append((seq_no, graph_hash, ntriples, None))
+        except Exception as ex:
+            results.append((seq_no, graph_hash, None, str(ex)))
+    return results
+
+
+def to_nquads(ntriples: str, graph_hash: str, seq_no: int) -> str:
+    # Bulk loaders scope blank node labels to a whole file, so labels are
+    # made unique per graph first.
+    ntriples = GraphStore._scope_blank_nodes(ntriples, seq_no)
+    graph_name = " <{}> .".format(GraphStore.IHASH_PREFIX.format(graph_hash))
+    return _NT_LINE_END.sub(graph_name, ntriples.strip()) + "\n"
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self._path = path
+
+    def load(self) -> int:
+        if not os.path.exists(self._path):
+            return 0
+        with open(self._path) as f:
+            return json.load(f)["seq_no"]
+
+    def save(self, seq_no: int):
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"seq_no": seq_no}, f)
+        os.replace(tmp_path, self._path)
+
+
+class NQuadsShardSink:
+    """
+    Writes every shard of converted graphs to its own N-Quads file.
+    """
+
+    def __init__(self, out_dir: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self._out_dir = out_dir
+
+    def write(self, results):
+        first_seq_no, last_seq_no = results[0][0], results[-1][0]
+        path = os.path.join(self._out_dir, SHARD_FILE_TEMPLATE.format(first_seq_no, last_seq_no))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq_no, graph_hash, ntriples, _ in results:
+                f.write(to_nquads(ntriples, graph_hash, seq_no))
+        os.replace(tmp_path, path)
+
+
+class GraphStoreSink:
+    """
+    Inserts every shard of converted graphs into the triple store.
+
+    A rebuild stops at the first failed insert and is checkpointed after
+    every shard, so only the first shard written by a (resumed) run may be
+    partly stored already. Its graphs are checked in the triple store first,
+    as inserting graphs with blank nodes again would duplicate them.
+    """
+
+    def __init__(self, graph_store: GraphStore, batch_size: int = DEFAULT_INSERT_BATCH_SIZE):
+        self._graph_store = graph_store
+        self._batch_size = batch_size
+        self._check_stored = True
+
+    def write(self, results):
+        for i in range(0, len(results), self._batch_size):
+            batch = [(graph_hash, None, None, ntriples)
+                     for _, graph_hash, ntriples, _ in results[i:i + self._batch_size]]
+            if self._check_stored:
+                stored = self._graph_store.which_graphs_exist(graph_hash for graph_hash, _, _, _ in batch)
+                batch = [item for item in batch if item[0] not in stored]
+            for graph_hash, ex in self._graph_store.add_graphs(batch).items():
+                if ex is not None:
+                    raise ex
+        self._check_stored = False
+
+
+def read_ledger_items(ledger, frm: int):
+    for seq_no, txn in ledger.getAllTxn(frm=frm):
+        graph_hash = txn.get(GRAPH_IHASH_FIELD)
+        lei = txn.get(TXN_FIELD, {}).get(DATA_FIELD, {}).get(LEI_FIELD)
+        if graph_hash is None or lei is None:
+            continue
+        yield seq_no, graph_hash, lei
+
+
+def rebuild(ledger, sink, checkpoint: Checkpoint, pool_size: int = DEFAULT_POOL_SIZE,
+            shard_size: int = DEFAULT_SHARD_SIZE):
+    frm = checkpoint.load() + 1
+    logger.info("Rebuilding triple store from ledger txns starting at seqNo {} ({} txns in the ledger)..."
+                .format(frm, ledger.size))
+
+    started_at = time.perf_counter()
+    converted = 0
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=pool_size) as executor:
+        # Shards are converted in parallel but written and checkpointed in
+        # seqNo order; at most two shards per worker are in flight.
+        in_flight = deque()
+        for shard in _shards(read_ledger_items(ledger, frm), shard_size):
+            in_flight.append((shard[-1][0], executor.submit(convert_txns, shard)))
+            if len(in_flight) >= 2 * pool_size:
+                converted, failed = _write_shard(in_flight.popleft(), sink, checkpoint, converted, failed,
+                                                 started_at)
+
+        while in_flight:
+            converted, failed = _write_shard(in_flight.popleft(), sink, checkpoint, converted, failed, started_at)
+
+    logger.info("Triple store rebuild finished: {} graphs converted, {} failed, {:.1f}s."
+                .format(converted, failed, time.perf_counter() - started_at))
+    return converted, failed
+
+
+def _shards(items, shard_size):
+    shard = []
+    for item in items:
+        shard.append(item)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def _write_shard(shard_future, sink, checkpoint, converted, failed, started_at):
+    last_seq_no, future = shard_future
+    results = []
+    for seq_no, graph_hash, ntriples, reason in future.result():
+        if ntriples is None:
+            logger.warning("Graph '{}' of txn {} cannot be converted. Details: {}".format(graph_hash, seq_no, reason))
+            failed += 1
+        else:
+            results.append((seq_no, graph_hash, ntriples, reason))
+
+    if results:
+        sink.write(results)
+    checkpoint.save(last_seq_no)
+
+    converted += len(results)
+    elapsed = time.perf_counter() - started_at
+    logger.info("Rebuilt up to seqNo {}: {} graphs, {:.1f} graphs/s.".format(last_seq_no, converted,
+                                                                            converted / elapsed if elapsed else 0.0))
+    return converted, failed
+
+
+def _create_graph_store(args, config):
+    settings = {
+        'max_update_size': config.graphStoreMaxUpdateSize,
+        'pool_size': config.graphStoreHttpPoolSize,
+        'timeout': config.graphStoreHttpTimeout,
+        'retries': config.graphStoreHttpRetries,
+        'backoff_factor': config.graphStoreHttpBackoffFactor,
+    }
+    if args.ts_type == STARDOG:
+        return load_graph_store_class(STARDOG)(args.ts_db, args.ts_url, args.ts_user, args.ts_pass, **settings)
+    elif args.ts_type == NEPTUNE:
+        return load_graph_store_class(NEPTUNE)(args.ts_db, args.ts_url, **settings)
+    raise TripleStoreTypeNotSupported("Triple store type '{}' is not supported.".format(args.ts_type))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuilds a triple store database from the graphchain ledger.")
+    parser.add_argument("--data-dir", required=True, help="data directory of the (stopped) node")
+    parser.add_argument("--out-dir", help="directory for N-Quads shards; the triple store is not used then")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out-dir>/rebuild.checkpoint)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--ts-type", choices=[STARDOG, NEPTUNE])
+    parser.add_argument("--ts-url")
+    parser.add_argument("--ts-db")
+    parser.add_argument("--ts-user")
+    parser.add_argument("--ts-pass")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    if args.out_dir is None and args.ts_type is None:
+        parser.error("either --out-dir or --ts-type is required")
+    if args.checkpoint is None:
+        if args.out_dir is None:
+            parser.error("--checkpoint is required when writing to the triple store")
+        args.checkpoint = os.path.join(args.out_dir, "rebuild.checkpoint")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    configure_logging(args.log_level)
+    config = update_nodes_config_with_plugin_settings(getConfig())
+
+    hash_store = get_graphchain_hash_store(args.data_dir)
+    ledger = get_graphchain_ledger(args.data_dir, config.graphchainTransactionsFile, hash_store, config)
+
+    if args.out_dir is not None:
+        sink = NQuadsShardSink(args.out_dir)
+    else:
+        sink = GraphStoreSink(_create_graph_store(args, config))
+
+    try:
+        rebuild(ledger, sink, Checkpoint(args.checkpoint), args.pool_size, args.shard_size)
+    finally:
+        ledger.stop()
+
+
+if __name__ == '__main__':
+    main()
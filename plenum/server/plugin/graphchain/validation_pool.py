@@ -0,0 +1,93 @@
+import multiprocessing
+import time
+
+from plenum.server.plugin.graphchain.content_encodings import decode_content
+from plenum.server.plugin.graphchain.graphs import GraphValidator
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+from plenum.server.plugin.graphchain.helpers import from_base64
+from plenum.server.plugin.graphchain.logger import get_logger
+from plenum.server.plugin.graphchain.parsed_graphs import parse_graph
+
+logger = get_logger()
+
+# Workers are not forked from the node: by the time the pool is created its
+# writer, synchronizer and probe threads run, and a forked child could
+# inherit their locks (logging, RocksDB) held.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def validate_and_hash(graph_base64: str, graph_format: str, encoding: str = None):
+    """
+    Runs in a worker process: decodes and parses the graph and calculates its
+    ihash. Returns a pair (ihash, None) or (None, reason) when graph is invalid.
+    """
+    try:
+        graph_raw_content = decode_content(from_base64(graph_base64), encoding)
+    except Exception as ex:
+        return None, "Cannot decode graph content. Details: {}".format(ex)
+
+    parsed_graph, reason = parse_graph(graph_raw_content, graph_format,
+                                       GraphValidator(), InterwovenHashCalculator())
+    if parsed_graph is None:
+        return None, reason
+    return parsed_graph.ihash, None
+
+
+class GraphValidationPool:
+    """
+    Parses and hashes submitted graphs on worker processes, so a batch of
+    incoming ADD_LEI requests is validated in parallel instead of one by one
+    on the node's event-loop thread.
+    """
+
+    def __init__(self, pool_size: int, timeout: float):
+        logger.info("Creating graph validation pool with {} workers and timeout {}s.".format(pool_size, timeout))
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._pool = None
+
+    def validate(self, items: dict) -> dict:
+        """
+        Waits at most `timeout` seconds for the whole batch. Graphs which are
+        not validated by then are reported as failed and the workers are
+        terminated, as a worker stuck on a graph cannot be interrupted; a new
+        pool is started for the next batch.
+
+        :param items: key => (base64 graph content, graph format, content encoding)
+        :return: key => (ihash, reason), see `validate_and_hash`
+        """
+        pool = self._get_pool()
+        async_results = {key: pool.apply_async(validate_and_hash, item) for key, item in items.items()}
+        deadline = time.monotonic() + self._timeout
+
+        results = {}
+        timed_out = []
+        for key, async_result in async_results.items():
+            async_result.wait(max(0.0, deadline - time.monotonic()))
+            if not async_result.ready():
+                timed_out.append(key)
+                continue
+            try:
+                results[key] = async_result.get()
+            except Exception as ex:
+                logger.warning("Worker failed while validating graph. Details: {}".format(ex))
+                results[key] = None, str(ex)
+
+        if timed_out:
+            logger.warning("{} of {} graphs not validated within {}s. Restarting validation workers..."
+                           .format(len(timed_out), len(async_results), self._timeout))
+            for key in timed_out:
+                results[key] = None, "Validation of graph timed out after {}s.".format(self._timeout)
+            self.stop()
+
+        return results
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.get_context(START_METHOD).Pool(self._pool_size)
+        return self._pool
@@ -0,0 +1,146 @@
+import base64
+import re
+import time
+
+import pytest
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from plenum.common.constants import TXN_TYPE
+from plenum.common.ledger import Ledger
+from plenum.common.request import Request
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+
+from plenum.server.plugin.graphchain.constants import ADD_LEI, ADD_LEIS, LEI_FIELD, LEIS_FIELD, \
+    GRAPH_CONTENT_FIELD, GRAPH_FORMAT_FIELD
+from plenum.server.plugin.graphchain.graph_req_handler import GraphchainReqHandler
+from plenum.server.plugin.graphchain.graph_store import GraphStore
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+
+IDENTIFIER = "Th7MpTaRZVRYnPiabds81Y"
+
+
+class MemoryGraphStore:
+    """
+    Triple store double keeping graph hashes only. While `writable` is
+    False, writes fail as if the TS was down.
+    """
+
+    def __init__(self):
+        self.graphs = set()
+        self.writable = True
+
+    def check_if_graph_is_already_stored(self, graph_hash):
+        return graph_hash in self.graphs
+
+    def which_graphs_exist(self, graph_hashes, chunk_size=None):
+        return {graph_hash for graph_hash in graph_hashes if graph_hash in self.graphs}
+
+    def add_graphs(self, batch):
+        if not self.writable:
+            return {graph_hash: ConnectionError("TS is down") for graph_hash, _, _, _ in batch}
+
+        self.graphs.update(graph_hash for graph_hash, _, _, _ in batch)
+        return {graph_hash: None for graph_hash, _, _, _ in batch}
+
+
+APPLIED = "applied"
+APPLIED_BUT_FAILED = "applied_but_failed"
+FAILED = "failed"
+
+
+class RecordingGraphStore(GraphStore):
+    """
+    Graph store keeping SPARQL updates and the names of inserted graphs
+    instead of sending them. `update_outcome` tells for an update whether it
+    is applied and whether it then fails, as on a read timeout.
+    """
+
+    def __init__(self):
+        super().__init__("db", "http://localhost")
+        self.updates = []
+        self.stored = set()
+        self.update_outcome = lambda query: APPLIED
+        self.queries_fail = False
+
+    def check_whether_db_exists(self):
+        return True
+
+    def _execute_update(self, query):
+        outcome = self.update_outcome(query)
+        if outcome != FAILED:
+            self.updates.append(query)
+            self.stored.update(re.findall(r"GRAPH <([^>]+)>", query))
+        if outcome != APPLIED:
+            raise ConnectionError("Update failed")
+
+    def _execute_query(self, query):
+        if self.queries_fail:
+            raise ConnectionError("Query failed")
+        return {"results": {"bindings": [{"g": {"value": name}} for name in self.stored
+                                         if "<{}>".format(name) in query]}}
+
+
+def make_lei(entity: int, name: str = "ACME") -> dict:
+    content = '<http://lei.info/e/{}> <http://lei.info/voc/name> "{}" .\n'.format(entity, name)
+    return {GRAPH_CONTENT_FIELD: base64.b64encode(content.encode()).decode(), GRAPH_FORMAT_FIELD: 'nt'}
+
+
+def make_request(operation: dict, req_id: int) -> Request:
+    return Request(identifier=IDENTIFIER, reqId=req_id, operation=operation, protocolVersion=2)
+
+
+def make_add_lei_request(entity: int, req_id: int = None) -> Request:
+    return make_request({TXN_TYPE: ADD_LEI, LEI_FIELD: make_lei(entity)}, req_id if req_id is not None else entity)
+
+
+def make_add_leis_request(entities, req_id: int) -> Request:
+    return make_request({TXN_TYPE: ADD_LEIS, LEIS_FIELD: [make_lei(entity) for entity in entities]}, req_id)
+
+
+def create_batch(handler, requests):
+    for request in requests:
+        handler.doStaticValidation(request)
+        handler.apply(request, int(time.time()))
+    handler.onBatchCreated(handler.state.headHash)
+
+
+def commit_batch(handler, request_count):
+    return handler.commit(request_count, handler.state.headHash,
+                          handler.ledger.hashToStr(handler.ledger.uncommittedRootHash), int(time.time()))
+
+
+def reject_batch(handler, request_count, committed_state_root):
+    # The node reverts the state and discards one txn per request, then
+    # notifies the handler.
+    handler.state.revertToHead(committed_state_root)
+    handler.ledger.discardTxns(request_count)
+    handler.onBatchRejected()
+
+
+@pytest.fixture
+def graph_store():
+    return MemoryGraphStore()
+
+
+@pytest.fixture
+def known_graphs():
+    return None
+
+
+@pytest.fixture
+def handler_kwargs():
+    return {}
+
+
+@pytest.fixture
+def req_handler(tmpdir, graph_store, known_graphs, handler_kwargs):
+    data_dir = str(tmpdir)
+    ledger = Ledger(CompactMerkleTree(hashStore=MemoryHashStore()), dataDir=data_dir, fileName="graphchain_ledger")
+    state = PruningState(KeyValueStorageInMemory())
+    synchronizer = GraphStoreSynchronizer(data_dir, "graphchain_sync")
+    handler = GraphchainReqHandler(ledger, state, graph_store, synchronizer, known_graphs=known_graphs,
+                                   **handler_kwargs)
+    yield handler
+    handler.graph_store_writer.stop()
+    synchronizer.stop()
@@ -0,0 +1,72 @@
+from plenum.common.constants import TXN_SIGNATURE
+from plenum.common.txn_util import get_type, get_payload_data, get_req_id, get_digest
+
+from conftest import make_add_lei_request, make_add_leis_request, create_batch, commit_batch, reject_batch
+from plenum.server.plugin.graphchain.constants import GRAPH_IHASH_FIELD, ADD_LEIS, LEI_FIELD, LEIS_FIELD, \
+    LEI_INDEX_FIELD
+
+
+def test_add_leis_commits_one_txn_per_graph(req_handler):
+    create_batch(req_handler, [make_add_leis_request([1, 2, 3], req_id=1)])
+    committed = commit_batch(req_handler, 1)
+
+    assert req_handler.ledger.size == 3
+    assert req_handler.ledger.uncommitted_size == 3
+    ihashes = [txn[GRAPH_IHASH_FIELD] for txn in committed]
+    assert len(set(ihashes)) == 3
+    assert [req_handler._get_seq_no_by_ihash(ihash) for ihash in ihashes] == [1, 2, 3]
+
+
+def test_batch_mixing_add_lei_and_add_leis_is_committed(req_handler):
+    create_batch(req_handler, [make_add_lei_request(1),
+                               make_add_leis_request([2, 3], req_id=2),
+                               make_add_lei_request(4)])
+    committed = commit_batch(req_handler, 3)
+
+    assert req_handler.ledger.size == 4
+    assert req_handler.ledger.uncommitted_size == 4
+    assert [req_handler._get_seq_no_by_ihash(txn[GRAPH_IHASH_FIELD]) for txn in committed] == [1, 2, 3, 4]
+
+
+def test_rejected_add_leis_batch_discards_all_its_txns(req_handler):
+    create_batch(req_handler, [make_add_leis_request([1, 2], req_id=1)])
+    commit_batch(req_handler, 1)
+    committed_state_root = req_handler.state.committedHeadHash
+
+    create_batch(req_handler, [make_add_lei_request(3), make_add_leis_request([4, 5, 6], req_id=4)])
+    assert req_handler.ledger.uncommitted_size == 6
+    reject_batch(req_handler, 2, committed_state_root)
+
+    assert req_handler.ledger.size == 2
+    assert req_handler.ledger.uncommitted_size == 2
+
+    # The next batch is counted on its own.
+    create_batch(req_handler, [make_add_leis_request([7, 8], req_id=7)])
+    commit_batch(req_handler, 1)
+    assert req_handler.ledger.size == 4
+    assert req_handler.ledger.uncommitted_size == 4
+
+
+def test_rejected_requests_not_yet_in_batch_discard_all_their_txns(req_handler):
+    committed_state_root = req_handler.state.committedHeadHash
+    request = make_add_leis_request([1, 2, 3], req_id=1)
+    req_handler.doStaticValidation(request)
+    req_handler.apply(request, 0)
+
+    reject_batch(req_handler, 1, committed_state_root)
+
+    assert req_handler.ledger.uncommitted_size == 0
+
+
+def test_add_leis_items_keep_request_metadata_but_not_its_signature(req_handler):
+    request = make_add_leis_request([1, 2], req_id=1)
+    request.signature = "signature of all items"
+    create_batch(req_handler, [request])
+    committed = commit_batch(req_handler, 1)
+
+    assert [get_type(txn) for txn in committed] == [ADD_LEIS, ADD_LEIS]
+    assert [get_payload_data(txn) for txn in committed] == [
+        {LEI_FIELD: lei, LEI_INDEX_FIELD: index} for index, lei in enumerate(request.operation[LEIS_FIELD])]
+    # The node maps a request's digest to a seqNo only when all txns have a reqId.
+    assert all(get_req_id(txn) == 1 and get_digest(txn) == request.digest for txn in committed)
+    assert all(not txn[TXN_SIGNATURE] for txn in committed)
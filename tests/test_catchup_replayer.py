@@ -0,0 +1,124 @@
+import pytest
+
+from plenum.server.plugin.graphchain.catchup_replayer import CatchupReplayer
+from plenum.server.plugin.graphchain.graph_store_synchronizer import GraphStoreSynchronizer
+from plenum.server.plugin.graphchain.sync_records import encode_ledger_record, decode_sync_record
+
+BATCH_SIZE = 3
+LEDGER_SIZE = 10
+
+
+class RecordingWriter:
+
+    def __init__(self):
+        self.batches = []
+
+    def enqueue_many(self, items, block=False):
+        self.batches.append([graph_hash for graph_hash, _, _, _ in items])
+        return True
+
+    @property
+    def enqueued(self):
+        return [graph_hash for batch in self.batches for graph_hash in batch]
+
+    def metrics(self):
+        return {}
+
+
+@pytest.fixture
+def synchronizer(tmpdir):
+    synchronizer = GraphStoreSynchronizer(str(tmpdir), "graphchain_sync")
+    yield synchronizer
+    synchronizer.stop()
+
+
+@pytest.fixture
+def writer():
+    return RecordingWriter()
+
+
+def make_replayer(synchronizer, writer):
+    return CatchupReplayer(synchronizer, writer,
+                           lambda graph_raw_content, graph_format, seq_no: encode_ledger_record(seq_no, graph_format),
+                           BATCH_SIZE)
+
+
+@pytest.fixture
+def replayer(synchronizer, writer):
+    return make_replayer(synchronizer, writer)
+
+
+def graph(seq_no):
+    return seq_no, "{:064x}".format(seq_no), b"", 'nt'
+
+
+def stored_seq_nos(synchronizer):
+    return sorted(decode_sync_record(value).seq_no for _, value in synchronizer.list_all())
+
+
+def test_graphs_are_buffered_until_batch_is_full(replayer, synchronizer, writer):
+    replayer.start(LEDGER_SIZE)
+    for seq_no in range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE):
+        replayer.add(*graph(seq_no))
+
+    assert stored_seq_nos(synchronizer) == []
+    assert writer.enqueued == []
+    assert synchronizer.catchup_seq_no() == LEDGER_SIZE
+    assert replayer.progress()["buffered"] == BATCH_SIZE - 1
+
+
+def test_full_batch_is_persisted_and_handed_to_writer_at_once(replayer, synchronizer, writer, monkeypatch):
+    writes = []
+    add_many = synchronizer.add_many
+    monkeypatch.setattr(synchronizer, "add_many", lambda pairs, **kwargs: writes.append(add_many(pairs, **kwargs)))
+    replayer.start(LEDGER_SIZE)
+    for seq_no in range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 2):
+        replayer.add(*graph(seq_no))
+
+    assert len(writes) == 1
+    assert writer.batches == [[graph(seq_no)[1] for seq_no in range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 1)]]
+    assert stored_seq_nos(synchronizer) == list(range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 1))
+    assert synchronizer.catchup_seq_no() == LEDGER_SIZE + BATCH_SIZE
+
+    replayer.complete()
+    assert len(writes) == 2
+    assert len(writer.enqueued) == BATCH_SIZE + 1
+    assert stored_seq_nos(synchronizer) == list(range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 2))
+    assert synchronizer.catchup_seq_no() is None
+
+
+def test_graphs_outside_of_catchup_are_not_buffered(replayer, synchronizer, writer):
+    replayer.add(*graph(1))
+
+    assert writer.enqueued == [graph(1)[1]]
+    assert stored_seq_nos(synchronizer) == [1]
+    assert synchronizer.catchup_seq_no() is None
+
+
+def test_graphs_of_interrupted_catchup_are_replayed_from_ledger(replayer, synchronizer, writer):
+    ledger = [graph(seq_no) for seq_no in range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 3)]
+    replayer.start(LEDGER_SIZE)
+    for item in ledger:
+        replayer.add(*item)
+    # The node stops with the last graphs still buffered.
+    assert stored_seq_nos(synchronizer) == list(range(LEDGER_SIZE + 1, LEDGER_SIZE + BATCH_SIZE + 1))
+
+    read_from = []
+
+    def ledger_txns(frm):
+        read_from.append(frm)
+        return (item for item in ledger if item[0] >= frm)
+
+    make_replayer(synchronizer, writer).replay_interrupted(ledger_txns)
+
+    assert read_from == [LEDGER_SIZE + BATCH_SIZE + 1]
+    assert stored_seq_nos(synchronizer) == [seq_no for seq_no, _, _, _ in ledger]
+    assert synchronizer.catchup_seq_no() is None
+
+
+def test_nothing_is_replayed_after_completed_catchup(replayer, synchronizer, writer):
+    replayer.start(LEDGER_SIZE)
+    replayer.add(*graph(LEDGER_SIZE + 1))
+    replayer.complete()
+
+    replayer.replay_interrupted(lambda frm: pytest.fail("Ledger was read"))
@@ -0,0 +1,50 @@
+import zlib
+
+import pytest
+
+from plenum.server.plugin.graphchain.content_encodings import IDENTITY, ZLIB, ZSTD, supported_encodings, \
+    encode_content, decode_content
+
+CONTENT = b'<http://lei.info/e/1> <http://lei.info/voc/name> "ACME" .\n' * 1000
+MAX_SIZE = 16 * 1024
+
+
+@pytest.fixture(params=supported_encodings())
+def encoding(request):
+    return request.param
+
+
+def test_content_round_trips(encoding):
+    assert decode_content(encode_content(CONTENT, encoding), encoding) == CONTENT
+
+
+def test_decoded_content_over_max_size_is_rejected(encoding):
+    if encoding == IDENTITY:
+        pytest.skip("identity content is not decoded")
+
+    with pytest.raises(ValueError, match="exceeds"):
+        decode_content(encode_content(CONTENT, encoding), encoding, max_size=MAX_SIZE)
+
+
+def test_truncated_zlib_content_is_rejected():
+    encoded = zlib.compress(CONTENT)
+
+    with pytest.raises(ValueError, match="not a complete"):
+        decode_content(encoded[:len(encoded) // 2], ZLIB)
+
+
+def test_zstd_content_without_declared_size_over_max_size_is_rejected():
+    zstandard = pytest.importorskip("zstandard")
+    encoded = zstandard.ZstdCompressor(write_content_size=False).compress(CONTENT)
+
+    with pytest.raises(zstandard.ZstdError):
+        decode_content(encoded, ZSTD, max_size=MAX_SIZE)
+    assert decode_content(encoded, ZSTD) == CONTENT
+
+
+def test_truncated_zstd_content_is_rejected():
+    zstandard = pytest.importorskip("zstandard")
+    encoded = encode_content(CONTENT, ZSTD)
+
+    with pytest.raises(zstandard.ZstdError):
+        decode_content(encoded[:len(encoded) // 2], ZSTD)
@@ -0,0 +1,69 @@
+import pytest
+from plenum.common.exceptions import InvalidClientRequest
+
+from conftest import make_add_lei_request, make_add_leis_request, create_batch, commit_batch, reject_batch
+from plenum.server.plugin.graphchain.constants import LEI_FIELD
+from plenum.server.plugin.graphchain.known_graphs import KnownGraphs
+
+
+@pytest.fixture(params=["without_known_graphs", "with_known_graphs"])
+def known_graphs(request, tmpdir):
+    if request.param == "without_known_graphs":
+        return None
+    return KnownGraphs(str(tmpdir), "known_graphs", 1000, 0.01)
+
+
+@pytest.fixture
+def ts_down(graph_store):
+    # Graphs never reach the TS, as if their writes were still pending or
+    # failed, so neither the TS nor the known graphs set knows them.
+    graph_store.writable = False
+
+
+def test_duplicate_of_committed_graph_is_rejected(req_handler, ts_down):
+    create_batch(req_handler, [make_add_lei_request(1)])
+    commit_batch(req_handler, 1)
+
+    with pytest.raises(InvalidClientRequest, match="already added"):
+        req_handler.doStaticValidation(make_add_lei_request(1, req_id=100))
+
+
+def test_duplicate_of_applied_graph_is_rejected(req_handler, ts_down):
+    create_batch(req_handler, [make_add_lei_request(1)])
+
+    with pytest.raises(InvalidClientRequest, match="already added"):
+        req_handler.doStaticValidation(make_add_lei_request(1, req_id=100))
+
+
+def test_duplicate_of_add_leis_item_is_rejected(req_handler, ts_down):
+    create_batch(req_handler, [make_add_leis_request([1, 2], req_id=1)])
+    commit_batch(req_handler, 1)
+
+    with pytest.raises(InvalidClientRequest, match="already added"):
+        req_handler.doStaticValidation(make_add_lei_request(2, req_id=100))
+
+
+def test_graph_of_rejected_batch_can_be_added_again(req_handler, ts_down):
+    committed_state_root = req_handler.state.committedHeadHash
+    create_batch(req_handler, [make_add_lei_request(1)])
+    reject_batch(req_handler, 1, committed_state_root)
+
+    req_handler.doStaticValidation(make_add_lei_request(1, req_id=100))
+
+
+def test_new_graph_is_accepted(req_handler, ts_down):
+    create_batch(req_handler, [make_add_lei_request(1)])
+    commit_batch(req_handler, 1)
+
+    req_handler.doStaticValidation(make_add_lei_request(2))
+
+
+def test_graph_stored_in_ts_only_is_rejected(req_handler, graph_store, known_graphs):
+    request = make_add_lei_request(1)
+    ihash = req_handler._parse_lei(request.operation[LEI_FIELD]).ihash
+    graph_store.graphs.add(ihash)
+    if known_graphs is not None:
+        known_graphs.add(ihash)
+
+    with pytest.raises(InvalidClientRequest, match="already added"):
+        req_handler.doStaticValidation(request)
@@ -0,0 +1,89 @@
+import pytest
+from plenum.common.constants import TXN_TYPE
+from plenum.common.exceptions import InvalidClientRequest
+
+from conftest import make_add_lei_request, make_request, create_batch, commit_batch
+from plenum.server.plugin.graphchain.blob_store import BlobStore
+from plenum.server.plugin.graphchain.constants import GET_LEIS, GRAPH_IHASHES_FIELD, GRAPH_IHASH_FIELD, \
+    LEI_FIELD, LEIS_FIELD, TRUNCATED_FIELD, GRAPH_CONTENT_FIELD
+
+UNKNOWN_HASH = "0" * 64
+
+
+@pytest.fixture
+def graph_hashes(req_handler):
+    requests = [make_add_lei_request(entity) for entity in range(3)]
+    create_batch(req_handler, requests)
+    committed = commit_batch(req_handler, len(requests))
+    return [txn[GRAPH_IHASH_FIELD] for txn in committed]
+
+
+def get_leis(req_handler, graph_hashes):
+    return req_handler.get_query_response(make_request({TXN_TYPE: GET_LEIS, GRAPH_IHASHES_FIELD: graph_hashes}, 1))
+
+
+def test_get_leis_returns_leis_in_requested_order(req_handler, graph_hashes):
+    requested = [graph_hashes[2], UNKNOWN_HASH, graph_hashes[0], graph_hashes[2]]
+    result = get_leis(req_handler, requested)
+
+    assert [lei[GRAPH_IHASH_FIELD] for lei in result[LEIS_FIELD]] == requested
+    assert result[LEIS_FIELD][1][LEI_FIELD] is None
+    assert result[TRUNCATED_FIELD] == []
+
+
+def test_get_leis_truncates_response_over_max_size(req_handler, graph_hashes):
+    lei_size = len(get_leis(req_handler, graph_hashes[:1])[LEIS_FIELD][0][LEI_FIELD][GRAPH_CONTENT_FIELD])
+    req_handler._get_leis_max_response_size = 2 * lei_size
+
+    result = get_leis(req_handler, graph_hashes)
+
+    assert [lei[GRAPH_IHASH_FIELD] for lei in result[LEIS_FIELD]] == graph_hashes[:2]
+    assert result[TRUNCATED_FIELD] == graph_hashes[2:]
+
+
+def test_get_leis_returns_first_lei_over_max_size(req_handler, graph_hashes):
+    req_handler._get_leis_max_response_size = 1
+
+    result = get_leis(req_handler, graph_hashes)
+
+    assert [lei[GRAPH_IHASH_FIELD] for lei in result[LEIS_FIELD]] == graph_hashes[:1]
+    assert result[TRUNCATED_FIELD] == graph_hashes[1:]
+
+
+@pytest.mark.parametrize("invalid_hashes", [None, "abc", [], [1, 2], {"a": 1}])
+def test_get_leis_with_invalid_hashes(req_handler, invalid_hashes):
+    request = make_request({TXN_TYPE: GET_LEIS, GRAPH_IHASHES_FIELD: invalid_hashes}, 1)
+
+    with pytest.raises(InvalidClientRequest):
+        req_handler.doStaticValidation(request)
+    # Plenum runs the query handler even after a failed static validation.
+    result = req_handler.get_query_response(request)
+    assert result[LEIS_FIELD] == []
+    assert result[TRUNCATED_FIELD] == []
+
+
+def test_get_leis_with_too_many_hashes_is_not_resolved(req_handler, graph_hashes):
+    req_handler._get_leis_max_hashes = len(graph_hashes) - 1
+    request = make_request({TXN_TYPE: GET_LEIS, GRAPH_IHASHES_FIELD: graph_hashes}, 1)
+
+    with pytest.raises(InvalidClientRequest):
+        req_handler.doStaticValidation(request)
+    assert req_handler.get_query_response(request)[LEIS_FIELD] == []
+
+
+def test_get_leis_reads_content_from_blob_store(tmpdir, req_handler):
+    req_handler._blob_store = BlobStore(str(tmpdir), "graphchain_blobs")
+    requests = [make_add_lei_request(entity) for entity in range(2)]
+    create_batch(req_handler, requests)
+    committed = commit_batch(req_handler, len(requests))
+    graph_hashes = [txn[GRAPH_IHASH_FIELD] for txn in committed]
+
+    # Blob references are not added to txns, so the ledger format is the
+    # same whether or not the blob store is enabled.
+    assert all("blob" not in txn for txn in committed)
+    assert all(graph_hash in req_handler.blob_store for graph_hash in graph_hashes)
+    with_blobs = get_leis(req_handler, graph_hashes)
+    req_handler._blob_store.stop()
+    req_handler._blob_store = None
+    assert get_leis(req_handler, graph_hashes) == with_blobs
+
@@ -0,0 +1,86 @@
+from rdflib import Graph, BNode
+
+from conftest import RecordingGraphStore, APPLIED, APPLIED_BUT_FAILED, FAILED
+from plenum.server.plugin.graphchain.graph_store import GraphStore
+
+
+RAW_NTRIPLES = (
+    '# a comment\n'
+    '  _:b.1 <http://lei.info/voc/name> "_:x ." .\n'
+    '_:b.1 <http://lei.info/voc/parent> _:b:2 . # parent\n'
+    '_:b:2 <http://lei.info/voc/name> "ACME" .\r\n'
+    '<http://lei.info/e/1> <http://lei.info/voc/child> _:b.1.\n'
+)
+
+
+def test_blank_nodes_of_raw_ntriples_are_scoped():
+    assert GraphStore._scope_blank_nodes(RAW_NTRIPLES, 7) == (
+        '# a comment\n'
+        '  _:g7xb.1 <http://lei.info/voc/name> "_:x ." .\n'
+        '_:g7xb.1 <http://lei.info/voc/parent> _:g7xb:2 . # parent\n'
+        '_:g7xb:2 <http://lei.info/voc/name> "ACME" .\r\n'
+        '<http://lei.info/e/1> <http://lei.info/voc/child> _:g7xb.1.\n'
+    )
+
+
+def test_blank_nodes_of_serialized_graph_are_scoped():
+    graph = Graph()
+    graph.parse(data=RAW_NTRIPLES, format='nt')
+    ntriples = graph.serialize(format='nt').decode()
+    labels = {bnode.n3() for triple in graph for bnode in triple if isinstance(bnode, BNode)}
+
+    scoped = GraphStore._scope_blank_nodes(ntriples, 3)
+
+    assert len(labels) == 2
+    assert all(label not in scoped.replace("_:g3x", "") for label in labels)
+    assert scoped.count("_:g3x") == ntriples.count("_:") - 1
+
+
+def test_ntriples_content_is_inserted_without_parsing(monkeypatch):
+    def fail(*args):
+        raise AssertionError("N-Triples content was parsed")
+
+    monkeypatch.setattr(GraphStore, "_to_ntriples", staticmethod(fail))
+    graph_store = RecordingGraphStore()
+
+    results = graph_store.add_graphs([("h1", RAW_NTRIPLES.encode(), 'nt', None)])
+
+    assert results == {"h1": None}
+    assert "<http://lei.info/e/1> <http://lei.info/voc/child> _:g0xb.1.\n" in graph_store.updates[0]
+
+
+def ntriples_batch(*graph_hashes):
+    return [(graph_hash, None, None, '_:b <http://lei.info/voc/name> "{}" .\n'.format(graph_hash))
+            for graph_hash in graph_hashes]
+
+
+def test_applied_insert_which_failed_is_not_sent_again():
+    graph_store = RecordingGraphStore()
+    graph_store.update_outcome = lambda query: APPLIED_BUT_FAILED if len(graph_store.updates) == 0 else APPLIED
+
+    results = graph_store.add_graphs(ntriples_batch("h1", "h2"))
+
+    assert results == {"h1": None, "h2": None}
+    assert len(graph_store.updates) == 1
+
+
+def test_graphs_of_failed_insert_are_inserted_one_by_one():
+    graph_store = RecordingGraphStore()
+    graph_store.update_outcome = lambda query: FAILED if '"broken"' in query else APPLIED
+
+    results = graph_store.add_graphs(ntriples_batch("h1", "broken", "h3"))
+
+    assert results["h1"] is None and results["h3"] is None
+    assert isinstance(results["broken"], ConnectionError)
+    assert graph_store.stored == {GraphStore.IHASH_PREFIX.format("h1"), GraphStore.IHASH_PREFIX.format("h3")}
+
+
+def test_failed_insert_is_not_retried_when_stored_graphs_are_unknown():
+    graph_store = RecordingGraphStore()
+    graph_store.update_outcome = lambda query: APPLIED_BUT_FAILED
+    graph_store.queries_fail = True
+
+    results = graph_store.add_graphs(ntriples_batch("h1", "h2"))
+
+    assert all(isinstance(ex, ConnectionError) for ex in results.values())
+    assert len(graph_store.updates) == 1
@@ -0,0 +1,82 @@
+import pytest
+from rdflib import Graph
+
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+
+GOLDEN_VECTORS = [
+    (
+        "",
+        "0000000000000000000000000000000000000000000000000000000000000000",
+    ),
+    (
+        '<http://lei.info/e/1> <http://lei.info/voc/name> "ACME" .\n',
+        "dc610b9b24a134b5e0839442b2f9beb209ce6f4450565ac003c9d46c686d7ef9",
+    ),
+    (
+        '<http://lei.info/e/1> <http://lei.info/voc/address> _:a .\n'
+        '_:a <http://lei.info/voc/city> "Warsaw" .\n'
+        '_:a <http://lei.info/voc/country> "PL" .\n',
+        "68bd9c490b07a8ed448324e6b5685326bb1b9ce4250afe6c38100a937fa917f0",
+    ),
+    (
+        '_:r <http://lei.info/voc/startNode> <http://lei.info/e/1> .\n'
+        '_:r <http://lei.info/voc/address> _:a .\n'
+        '_:a <http://lei.info/voc/self> _:a .\n'
+        '_:a <http://lei.info/voc/city> "Lodz"@pl .\n',
+        "d205cfca29f1f3b30de5cc6d7dd020845297eef6042fd59a50203ac85fea865c",
+    ),
+]
+
+
+@pytest.fixture
+def calculator():
+    return InterwovenHashCalculator()
+
+
+def _parse(content, graph_format='nt'):
+    g = Graph()
+    g.parse(data=content, format=graph_format)
+    return g
+
+
+@pytest.mark.parametrize("content, expected", GOLDEN_VECTORS)
+def test_calculate_hash_matches_golden_vector(calculator, content, expected):
+    assert calculator.calculate_hash(_parse(content)) == expected
+
+
+@pytest.mark.parametrize("content, expected", GOLDEN_VECTORS)
+def test_streaming_hash_matches_golden_vector(calculator, content, expected):
+    assert calculator.calculate_hash_from_raw(content.encode(), 'nt') == expected
+
+
+@pytest.mark.parametrize("content, expected", GOLDEN_VECTORS)
+def test_parsed_hash_matches_golden_vector(calculator, content, expected):
+    raw_turtle = _parse(content).serialize(format='turtle')
+    assert calculator.calculate_hash_from_raw(raw_turtle, 'turtle') == expected
+
+
+def test_batch_hashes_match_golden_vectors(calculator):
+    graphs = [_parse(content) for content, _ in GOLDEN_VECTORS]
+    assert calculator.calculate_hashes(graphs) == [expected for _, expected in GOLDEN_VECTORS]
+
+
+def test_nquads_hash_ignores_named_graphs(calculator):
+    content, expected = GOLDEN_VECTORS[2]
+    named = '<http://lei.info/e/2> <http://lei.info/voc/name> "Other" <http://lei.info/g/1> .\n'
+    assert calculator.calculate_hash_from_raw((content + named).encode(), 'nquads') == expected
+
+
+def test_streaming_hash_skips_duplicated_triples(calculator):
+    content, expected = GOLDEN_VECTORS[1]
+    assert calculator.calculate_hash_from_raw((content * 3).encode(), 'nt') == expected
+
+
+def test_batch_hashes_do_not_depend_on_other_graphs_of_batch(calculator):
+    # rdflib considers these literals equal, but they are rendered differently.
+    upper = _parse('<http://lei.info/e/1> <http://lei.info/voc/name> "ACME"@EN .\n')
+    lower = _parse('<http://lei.info/e/1> <http://lei.info/voc/name> "ACME"@en .\n')
+
+    assert calculator.calculate_hashes([upper, lower]) == [calculator.calculate_hash(upper),
+                                                           calculator.calculate_hash(lower)]
+    assert calculator.calculate_hashes([lower, upper]) == [calculator.calculate_hash(lower),
+                                                           calculator.calculate_hash(upper)]
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import pytest
+
+from plenum.server.plugin.graphchain.known_graphs import KnownGraphs
+
+THREAD_COUNT = 4
+HASHES_PER_THREAD = 50
+
+
+class SwitchingBits(bytearray):
+    # Lets other threads run between reading and writing a byte of the
+    # Bloom filter, as a thread switch in `|=` would.
+    def __getitem__(self, index):
+        value = super().__getitem__(index)
+        time.sleep(0)
+        return value
+
+
+@pytest.fixture
+def known_graphs(tmpdir):
+    known_graphs = KnownGraphs(str(tmpdir), "known_graphs", 100, 0.5)
+    known_graphs._bloom_filter._bits = SwitchingBits(known_graphs._bloom_filter._bits)
+    return known_graphs
+
+
+def test_concurrently_added_graphs_might_be_stored(known_graphs):
+    graph_hashes = [["{:064x}".format(thread * HASHES_PER_THREAD + i) for i in range(HASHES_PER_THREAD)]
+                    for thread in range(THREAD_COUNT)]
+    threads = [threading.Thread(target=lambda hashes=hashes: [known_graphs.add(h) for h in hashes])
+               for hashes in graph_hashes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(known_graphs.might_be_stored(h) for hashes in graph_hashes for h in hashes)
@@ -0,0 +1,102 @@
+import pytest
+from plenum.common.constants import TXN_TYPE
+from plenum.common.request import Request
+
+from conftest import make_add_lei_request, make_add_leis_request, make_request, create_batch
+from plenum.server.plugin.graphchain.constants import GET_LEI, GRAPH_IHASH_FIELD
+from plenum.server.plugin.graphchain.main import _register_prevalidation
+from plenum.server.plugin.graphchain.validation_pool import GraphValidationPool
+
+
+class ClientStack:
+
+    def __init__(self, msgs, events):
+        self._msgs = list(msgs)
+        self.msgHandler = lambda wrapped_msg: events.append(("handled", wrapped_msg[0]["reqId"]))
+
+    def processReceived(self, limit):
+        count = 0
+        while self._msgs and count < limit:
+            self.msgHandler((self._msgs.pop(0), "client"))
+            count += 1
+        return count
+
+
+class Node:
+    client_request_class = Request
+
+    def __init__(self, msgs, events):
+        self.clientstack = ClientStack(msgs, events)
+
+
+class ReqHandler:
+
+    def __init__(self, events):
+        self._events = events
+
+    def prevalidate_requests(self, requests):
+        self._events.append(("prevalidated", [request.reqId for request in requests]))
+
+
+def test_received_requests_are_prevalidated_before_node_handles_them():
+    msgs = [
+        make_add_lei_request(1).as_dict,
+        make_request({TXN_TYPE: GET_LEI, GRAPH_IHASH_FIELD: "0" * 64}, 2).as_dict,
+        make_add_lei_request(3).as_dict,
+        {"reqId": 4, "operation": "malformed"},
+    ]
+    events = []
+    node = Node(msgs, events)
+    handle_client_msg = node.clientstack.msgHandler
+    _register_prevalidation(node, ReqHandler(events))
+
+    assert node.clientstack.processReceived(10) == 4
+    assert events == [("prevalidated", [1, 3]), ("handled", 1), ("handled", 2), ("handled", 3), ("handled", 4)]
+    assert node.clientstack.msgHandler is handle_client_msg
+
+
+@pytest.fixture
+def validation_pool(req_handler):
+    pool = GraphValidationPool(1, 10)
+    req_handler._validation_pool = pool
+    yield pool
+    pool.stop()
+
+
+def test_prevalidated_graph_is_used_by_static_validation(req_handler, validation_pool):
+    request = make_add_lei_request(1)
+
+    req_handler.prevalidate_requests([request])
+    assert request.digest in req_handler._parsed_graphs
+
+    req_handler.doStaticValidation(request)
+    req_handler.apply(request, 0)
+    assert req_handler.ledger.uncommitted_size == 1
+
+
+def test_apply_does_not_build_graphs_hashed_by_streaming(req_handler, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Graph was built")
+
+    enqueued = []
+    monkeypatch.setattr("plenum.server.plugin.graphchain.parsed_graphs.Graph", fail)
+    monkeypatch.setattr(req_handler._graph_store_writer, "enqueue_many", lambda items, block=False: enqueued.extend(items))
+
+    create_batch(req_handler, [make_add_lei_request(1), make_add_leis_request([2, 3], req_id=2)])
+
+    assert [ntriples for _, _, _, ntriples in enqueued] == [None, None, None]
+
+
+def test_apply_does_not_build_graphs_validated_on_pool(req_handler, validation_pool, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Graph was built")
+
+    requests = [make_add_lei_request(1, req_id=1), make_add_lei_request(2, req_id=2)]
+    enqueued = []
+    req_handler.prevalidate_requests(requests)
+    monkeypatch.setattr("plenum.server.plugin.graphchain.parsed_graphs.Graph", fail)
+    monkeypatch.setattr(req_handler._graph_store_writer, "enqueue_many", lambda items, block=False: enqueued.extend(items))
+
+    create_batch(req_handler, requests)
+
+    assert [ntriples for _, _, _, ntriples in enqueued] == [None, None]
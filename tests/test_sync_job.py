@@ -0,0 +1,64 @@
+import pytest
+from plenum.common.txn_util import get_seq_no
+
+from conftest import make_add_lei_request, create_batch, commit_batch
+from plenum.server.plugin.graphchain.constants import GRAPH_IHASH_FIELD
+from plenum.server.plugin.graphchain.helpers import str_to_bytes
+from plenum.server.plugin.graphchain.sync_records import SYNC_RECORD_LEDGER, encode_ledger_record, \
+    decode_sync_record
+
+UNKNOWN_HASH = "0" * 64
+
+
+@pytest.fixture
+def ts_down(graph_store):
+    # Graphs are not written to the TS, so they stay in the synchronizer.
+    graph_store.writable = False
+
+
+@pytest.fixture
+def committed_txns(req_handler, ts_down):
+    create_batch(req_handler, [make_add_lei_request(1), make_add_lei_request(2)])
+    return commit_batch(req_handler, 2)
+
+
+def sync_record(req_handler, graph_hash):
+    return decode_sync_record(req_handler._graph_store_synchronizer.get(str_to_bytes(graph_hash)))
+
+
+@pytest.mark.parametrize("handler_kwargs", [{"sync_record_mode": SYNC_RECORD_LEDGER}])
+def test_ledger_sync_record_mode_stores_content(req_handler, committed_txns):
+    for txn in committed_txns:
+        assert sync_record(req_handler, txn[GRAPH_IHASH_FIELD]).content is not None
+
+
+def put_ledger_records(req_handler, records):
+    req_handler._graph_store_synchronizer.add_many(
+        [(str_to_bytes(graph_hash), encode_ledger_record(seq_no, 'nt')) for graph_hash, seq_no in records])
+
+
+def test_sync_job_does_not_read_ledger(req_handler, committed_txns, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(req_handler.ledger, "getBySeqNo", lambda seq_no: pytest.fail("Ledger was read"))
+    monkeypatch.setattr(req_handler.graph_store_writer, "enqueue", lambda *args, **kwargs: enqueued.append(args))
+    put_ledger_records(req_handler, [(txn[GRAPH_IHASH_FIELD], get_seq_no(txn)) for txn in committed_txns])
+
+    req_handler._sync_graph_store_chunk(
+        [(txn[GRAPH_IHASH_FIELD], req_handler._graph_store_synchronizer.get(str_to_bytes(txn[GRAPH_IHASH_FIELD])))
+         for txn in committed_txns])
+
+    assert enqueued == []
+
+
+def test_ledger_sync_records_are_converted_to_content(req_handler, committed_txns):
+    put_ledger_records(req_handler, [(txn[GRAPH_IHASH_FIELD], get_seq_no(txn)) for txn in committed_txns] +
+                       [(UNKNOWN_HASH, 1), (UNKNOWN_HASH[1:] + "1", 100)])
+
+    req_handler.convert_ledger_sync_records()
+
+    for txn in committed_txns:
+        record = sync_record(req_handler, txn[GRAPH_IHASH_FIELD])
+        assert record.content.tobytes() == req_handler._get_graph_raw_content(txn)
+        assert record.graph_format == 'nt'
+    assert not req_handler._graph_store_synchronizer.exists(str_to_bytes(UNKNOWN_HASH))
+    assert not req_handler._graph_store_synchronizer.exists(str_to_bytes(UNKNOWN_HASH[1:] + "1"))
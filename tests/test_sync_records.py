@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from plenum.server.plugin.graphchain.constants import SYNC_PAIR_GRAPH_CONTENT, SYNC_PAIR_GRAPH_FORMAT
+from plenum.server.plugin.graphchain.graphs import FormatValidator
+from plenum.server.plugin.graphchain.sync_records import encode_content_record, encode_ledger_record, \
+    encode_blob_record, decode_sync_record
+
+# Static validation of ADD_LEI does not require a known format, so besides
+# the formats with their own codes, records must keep whatever rdflib takes.
+GRAPH_FORMATS = [
+    'n3', 'nquads', 'nt', 'trix', 'turtle', 'xml',
+    'trig', 'json-ld', 'text/turtle', 'application/n-triples', 'application/rdf+xml', 'ttl', 'żółw',
+    '', None,
+]
+GRAPH_RAW_CONTENT = b'<http://lei.info/e/1> <http://lei.info/voc/name> "ACME" .\n' * 100
+
+
+@pytest.mark.parametrize("graph_format", GRAPH_FORMATS)
+def test_validator_accepts_format(graph_format):
+    assert FormatValidator().validate_format(graph_format, False) == (True, None)
+
+
+@pytest.mark.parametrize("graph_format", GRAPH_FORMATS)
+@pytest.mark.parametrize("compression_threshold", [None, 0])
+def test_content_record_round_trip(graph_format, compression_threshold):
+    record = decode_sync_record(encode_content_record(GRAPH_RAW_CONTENT, graph_format, compression_threshold))
+
+    assert record.graph_format == graph_format
+    assert record.content.tobytes() == GRAPH_RAW_CONTENT
+    assert record.seq_no is None
+
+
+@pytest.mark.parametrize("graph_format", GRAPH_FORMATS)
+def test_content_record_round_trip_from_memoryview(graph_format):
+    value = encode_content_record(GRAPH_RAW_CONTENT, graph_format, None)
+    record = decode_sync_record(memoryview(value))
+
+    assert record.graph_format == graph_format
+    assert record.content.tobytes() == GRAPH_RAW_CONTENT
+
+
+@pytest.mark.parametrize("graph_format", GRAPH_FORMATS)
+def test_ledger_record_round_trip(graph_format):
+    assert decode_sync_record(encode_ledger_record(2 ** 40 + 7, graph_format)) == (graph_format, None, 2 ** 40 + 7)
+
+
+@pytest.mark.parametrize("graph_format", GRAPH_FORMATS)
+def test_blob_record_round_trip(graph_format):
+    assert decode_sync_record(encode_blob_record(graph_format)) == (graph_format, None, None)
+
+
+def test_legacy_json_record():
+    value = json.dumps({SYNC_PAIR_GRAPH_CONTENT: GRAPH_RAW_CONTENT.decode(), SYNC_PAIR_GRAPH_FORMAT: "text/turtle"}).encode()
+    record = decode_sync_record(value)
+
+    assert record.graph_format == "text/turtle"
+    assert record.content.tobytes() == GRAPH_RAW_CONTENT
+    assert record.seq_no is None
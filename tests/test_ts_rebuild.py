@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import RecordingGraphStore, APPLIED, FAILED
+from plenum.server.plugin.graphchain.graph_store import GraphStore
+from plenum.server.plugin.graphchain.ts_rebuild import GraphStoreSink
+
+BATCH_SIZE = 2
+
+
+def converted(*graph_hashes):
+    return [(seq_no, graph_hash, '_:b <http://lei.info/voc/name> "{}" .\n'.format(graph_hash), None)
+            for seq_no, graph_hash in enumerate(graph_hashes, 1)]
+
+
+def inserts_of(graph_store, graph_hash):
+    return sum(update.count("<{}>".format(GraphStore.IHASH_PREFIX.format(graph_hash)))
+               for update in graph_store.updates)
+
+
+def test_resumed_rebuild_does_not_insert_stored_graphs_again():
+    graph_store = RecordingGraphStore()
+    graph_store.update_outcome = lambda query: FAILED if '"h3"' in query else APPLIED
+    shard = converted("h1", "h2", "h3", "h4")
+
+    with pytest.raises(ConnectionError):
+        GraphStoreSink(graph_store, BATCH_SIZE).write(shard)
+
+    graph_store.update_outcome = lambda query: APPLIED
+    GraphStoreSink(graph_store, BATCH_SIZE).write(shard)
+
+    assert [inserts_of(graph_store, graph_hash) for graph_hash in ("h1", "h2", "h3", "h4")] == [1, 1, 1, 1]
+
+
+def test_only_first_shard_of_run_is_checked_in_triple_store():
+    graph_store = RecordingGraphStore()
+    sink = GraphStoreSink(graph_store, BATCH_SIZE)
+    sink.write(converted("h1", "h2"))
+
+    graph_store.queries_fail = True
+    sink.write(converted("h3", "h4"))
+
+    assert [inserts_of(graph_store, graph_hash) for graph_hash in ("h1", "h2", "h3", "h4")] == [1, 1, 1, 1]
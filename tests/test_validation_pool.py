@@ -0,0 +1,54 @@
+import base64
+import time
+
+import pytest
+
+from plenum.server.plugin.graphchain import validation_pool
+from plenum.server.plugin.graphchain.hashes import InterwovenHashCalculator
+from plenum.server.plugin.graphchain.validation_pool import GraphValidationPool
+
+VALID_GRAPH = '<http://lei.info/e/1> <http://lei.info/voc/name> "ACME" .\n'
+
+
+def sleeping_validate_and_hash(graph_base64, graph_format, encoding=None):
+    time.sleep(float(graph_base64))
+    return graph_base64, None
+
+
+@pytest.fixture
+def pool():
+    pool = GraphValidationPool(2, 10)
+    yield pool
+    pool.stop()
+
+
+def test_pool_validates_and_hashes_graphs(pool):
+    results = pool.validate({
+        "valid": (base64.b64encode(VALID_GRAPH.encode()).decode(), 'nt', None),
+        "invalid": (base64.b64encode(b"not a graph").decode(), 'nt', None),
+        "unsupported_encoding": (base64.b64encode(VALID_GRAPH.encode()).decode(), 'nt', "unknown"),
+    })
+
+    assert results["valid"] == (InterwovenHashCalculator().calculate_hash_from_raw(VALID_GRAPH.encode(), 'nt'), None)
+    assert results["invalid"][0] is None and results["invalid"][1]
+    assert results["unsupported_encoding"][0] is None and results["unsupported_encoding"][1]
+
+
+def test_batch_waits_for_one_deadline_and_recycles_workers(monkeypatch):
+    # Forked workers run the patched function.
+    monkeypatch.setattr(validation_pool, "START_METHOD", "fork")
+    monkeypatch.setattr(validation_pool, "validate_and_hash", sleeping_validate_and_hash)
+    pool = GraphValidationPool(1, 1)
+    try:
+        items = {i: ("5", 'nt', None) for i in range(4)}
+        start = time.perf_counter()
+        results = pool.validate(items)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 3
+        assert all(ihash is None and "timed out" in reason for ihash, reason in results.values())
+        assert pool._pool is None
+
+        assert pool.validate({"fast": ("0", 'nt', None)}) == {"fast": ("0", None)}
+    finally:
+        pool.stop()